@@ -0,0 +1,80 @@
+"""Measure request throughput as the number of open sessions grows.
+
+The engine is replaced by an in-process echo transport so the numbers reflect
+the router and session registry rather than engine latency.
+
+Usage:
+
+    PYTHONPATH=. python benchmarks/registry_throughput.py --sessions 10 100 1000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from fastgtp import GTPTransportManager, create_app
+
+
+class EchoTransport:
+    """Transport that answers every command immediately."""
+
+    async def open(self) -> None:
+        return None
+
+    async def send_command(self, command: str) -> str:
+        return "= echo\n\n"
+
+    async def aclose(self) -> None:
+        return None
+
+    def copy(self) -> EchoTransport:
+        return EchoTransport()
+
+
+async def measure(sessions: int, requests: int, concurrency: int) -> tuple[float, float]:
+    manager = GTPTransportManager(EchoTransport())
+    session_ids = [await manager.open_session() for _ in range(sessions)]
+
+    started = time.perf_counter()
+    for session_id in random.choices(session_ids, k=requests):
+        await manager.get_transport(session_id)
+    lookups = requests / (time.perf_counter() - started)
+
+    app = create_app(manager)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        targets = iter(random.choices(session_ids, k=requests))
+
+        async def worker() -> None:
+            for session_id in targets:
+                res = await client.get(f"/{session_id}/name")
+                res.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        throughput = requests / (time.perf_counter() - started)
+
+    await manager.close_all()
+    return lookups, throughput
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10} {'lookups/s':>14} {'requests/s':>12}")
+    for count in args.sessions:
+        lookups, throughput = await measure(count, args.requests, args.concurrency)
+        print(f"{count:>10} {lookups:>14.0f} {throughput:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
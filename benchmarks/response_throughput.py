@@ -0,0 +1,141 @@
+"""Measure request throughput of the command endpoints.
+
+The engine is replaced by an in-process fake that answers every command
+immediately, and requests are fed to the ASGI application directly, so the
+numbers reflect request handling and serialization only. The best of
+``--repeat`` runs is reported.
+
+Usage:
+
+    PYTHONPATH=. python benchmarks/response_throughput.py --requests 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from fastgtp import GTPTransportManager, create_app
+
+COMMANDS = [f"command_{index}" for index in range(200)]
+
+
+class FakeEngine:
+    """Transport answering GTP commands without a process."""
+
+    async def open(self) -> None:
+        return None
+
+    async def send_command(self, command: str) -> str:
+        name = command.split(maxsplit=1)[0]
+        if name == "list_commands":
+            return "= " + "\n".join(COMMANDS) + "\n\n"
+        if name == "get_komi":
+            return "= 7.5\n\n"
+        if name == "name":
+            return "= Fake\n\n"
+        return "= \n\n"
+
+    async def aclose(self) -> None:
+        return None
+
+    def copy(self) -> FakeEngine:
+        return FakeEngine()
+
+
+# Method, path below the session and JSON body of each workload.
+WORKLOADS: dict[str, tuple[str, str, Any]] = {
+    "play": ("POST", "play", {"color": "B", "vertex": "D4"}),
+    "get_komi": ("GET", "komi", None),
+    "name": ("GET", "name", None),
+    "commands": ("GET", "commands", None),
+    "batch": ("POST", "batch", {"commands": ["play B D4", "play W Q16"] * 8}),
+}
+
+
+async def call(app: Any, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+    """Run one request through the ASGI application."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    received = False
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def measure(workload: str, requests: int, concurrency: int) -> float:
+    manager = GTPTransportManager(FakeEngine())
+    app = create_app(manager)
+    method, path, payload = WORKLOADS[workload]
+    body = b"" if payload is None else json.dumps(payload).encode()
+    paths = []
+    for _ in range(concurrency):
+        _, opened = await call(app, "POST", "/open_session", b"")
+        paths.append(f"/{json.loads(opened)['session_id']}/{path}")
+    remaining = iter(range(requests))
+
+    async def worker(target: str) -> None:
+        for _ in remaining:
+            status, _ = await call(app, method, target, body)
+            if status != 200:
+                raise RuntimeError(f"{workload} answered {status}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(target) for target in paths))
+    throughput = requests / (time.perf_counter() - started)
+    await manager.close_all()
+    return throughput
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS))
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per endpoint; the best is shown."
+    )
+    args = parser.parse_args()
+
+    print(f"{'endpoint':>10} {'requests/s':>12}")
+    for name in args.workloads:
+        best = 0.0
+        for _ in range(args.repeat):
+            throughput = await measure(name, args.requests, args.concurrency)
+            best = max(best, throughput)
+        print(f"{name:>10} {best:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
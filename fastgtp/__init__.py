@@ -1,5 +1,9 @@
 """fastgtp - Translate Go Text Protocol engines into REST APIs."""
 
+from .server.archive import GameArchive
+from .server.book import OpeningBook, OpeningBookBuilder
+from .server.clock import GameClock, TimeControl
+from .server.events import SessionEvents
 from .server.gtp import (
     ParsedCommand,
     ParsedResponse,
@@ -7,6 +11,11 @@ from .server.gtp import (
     parse_command_line,
     parse_response,
 )
+from .server.metering import EngineMeter, QuotaExceededError
+from .server.monitor import ProcessStats, ResourceMonitor, read_process_stats
+from .server.placement import PlacementScheduler
+from .server.pool import EnginePool
+from .server.recording import RecordingGTPTransport, ReplayGTPTransport
 from .server.router import (
     FastGtp,
     NameResponse,
@@ -17,7 +26,21 @@ from .server.router import (
     create_app,
     get_transport_manager,
 )
-from .server.transport import GTPTransport, GTPTransportManager, SubprocessGTPTransport
+from .server.scheduler import CommandScheduler
+from .server.session import GTPSession
+from .server.speculation import SpeculationMetrics, Speculator
+from .server.startup import Startup
+from .server.transport import (
+    AdmissionError,
+    EngineCapacityError,
+    EngineStartupError,
+    EngineSwap,
+    GTPTransport,
+    GTPTransportManager,
+    QueueFullError,
+    QueueTimeoutError,
+    SubprocessGTPTransport,
+)
 
 __all__ = [
     "FastGtp",
@@ -27,10 +50,36 @@ __all__ = [
     "OpenSessionResponse",
     "VersionResponse",
     "create_app",
+    "ProcessStats",
+    "ResourceMonitor",
+    "read_process_stats",
+    "PlacementScheduler",
+    "EnginePool",
+    "GameArchive",
     "get_transport_manager",
+    "AdmissionError",
+    "EngineCapacityError",
+    "EngineStartupError",
+    "EngineSwap",
+    "QueueFullError",
+    "QueueTimeoutError",
+    "QuotaExceededError",
+    "CommandScheduler",
+    "EngineMeter",
+    "GTPSession",
+    "OpeningBook",
+    "OpeningBookBuilder",
+    "SessionEvents",
+    "GameClock",
+    "TimeControl",
+    "SpeculationMetrics",
+    "Speculator",
+    "Startup",
     "GTPTransport",
     "GTPTransportManager",
     "SubprocessGTPTransport",
+    "RecordingGTPTransport",
+    "ReplayGTPTransport",
     "ParsedCommand",
     "ParsedResponse",
     "build_command",
@@ -0,0 +1,7 @@
+"""Allow ``python -m fastgtp``."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,314 @@
+"""Load generator driving a fastgtp server through its HTTP endpoints.
+
+Every simulated client opens its own session and runs one of the workloads
+below, picked at random according to a weighted mix:
+
+- ``game``: the engine plays both sides with ``genmove``.
+- ``review``: a recorded game is replayed with ``play`` and exported with
+  ``sgf`` and ``board`` as a review tool would.
+- ``spectator``: a short game is played, then the position is polled with
+  conditional ``sgf`` requests as a live viewer would.
+
+Latencies are reported per endpoint template, such as
+``POST /{session_id}/genmove``, so the numbers can be compared across runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Mapping
+
+import httpx
+
+from .server.gtp import format_vertex
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(fraction * len(ordered))))
+    return ordered[rank - 1]
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    """Latencies and failures observed for one endpoint."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def summary(self) -> dict[str, float | int]:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "mean_ms": 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50_ms": 1000 * percentile(ordered, 0.50),
+            "p95_ms": 1000 * percentile(ordered, 0.95),
+            "p99_ms": 1000 * percentile(ordered, 0.99),
+            "max_ms": 1000 * ordered[-1] if ordered else 0.0,
+        }
+
+
+@dataclass(slots=True)
+class BenchReport:
+    """Outcome of a load test run."""
+
+    sessions: int
+    elapsed: float = 0.0
+    workloads: dict[str, int] = field(default_factory=dict)
+    endpoints: dict[str, EndpointStats] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return sum(stats.requests for stats in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(stats.errors for stats in self.endpoints.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "sessions": self.sessions,
+            "elapsed_s": self.elapsed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "throughput_rps": self.requests / self.elapsed if self.elapsed else 0.0,
+            "workloads": dict(self.workloads),
+            "endpoints": {
+                name: stats.summary() for name, stats in sorted(self.endpoints.items())
+            },
+        }
+
+    def format_table(self) -> str:
+        """Render the report as a plain-text table."""
+        summary = self.to_dict()
+        lines = [
+            f"{summary['requests']} requests from {self.sessions} sessions "
+            f"in {self.elapsed:.2f}s ({summary['throughput_rps']:.1f} req/s, "
+            f"{summary['error_rate']:.2%} errors)",
+            "",
+            f"{'endpoint':<36} {'count':>7} {'errors':>7} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+        ]
+        for name, stats in summary["endpoints"].items():
+            lines.append(
+                f"{name:<36} {stats['requests']:>7} {stats['errors']:>7} "
+                f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['p99_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+
+class _Client:
+    """HTTP client recording latency and errors per endpoint template."""
+
+    def __init__(self, client: httpx.AsyncClient, report: BenchReport):
+        self._client = client
+        self._report = report
+
+    async def request(
+        self,
+        method: str,
+        template: str,
+        session_id: str | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response | None:
+        name = f"{method} {template}"
+        url = template.replace("{session_id}", session_id or "")
+        stats = self._report.endpoints.setdefault(name, EndpointStats())
+        started = time.perf_counter()
+        try:
+            response = await self._client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors += 1
+            return None
+        stats.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            stats.errors += 1
+            return None
+        return response
+
+
+@dataclass(frozen=True, slots=True)
+class BenchOptions:
+    """Shape of the simulated games."""
+
+    board_size: int = 9
+    moves: int = 20
+    polls: int = 20
+
+
+def scripted_moves(
+    board_size: int, count: int, rng: random.Random
+) -> list[tuple[str, str]]:
+    """Return legal alternating moves that never capture.
+
+    Stones only go on points of one checkerboard color, so no stone ever
+    touches another and every move is legal on an empty board.
+    """
+    points = [
+        format_vertex(column, row)
+        for column in range(board_size)
+        for row in range(board_size)
+        if (column + row) % 2 == 0
+    ]
+    rng.shuffle(points)
+    return [
+        ("B" if i % 2 == 0 else "W", vertex) for i, vertex in enumerate(points[:count])
+    ]
+
+
+async def _game(
+    client: _Client, session_id: str, options: BenchOptions, rng: random.Random
+) -> None:
+    for i in range(options.moves):
+        color = "B" if i % 2 == 0 else "W"
+        response = await client.request(
+            "POST", "/{session_id}/genmove", session_id, json={"color": color}
+        )
+        if response is None or response.json()["move"].upper() == "RESIGN":
+            return
+
+
+async def _review(
+    client: _Client, session_id: str, options: BenchOptions, rng: random.Random
+) -> None:
+    for color, vertex in scripted_moves(options.board_size, options.moves, rng):
+        response = await client.request(
+            "POST",
+            "/{session_id}/play",
+            session_id,
+            json={"color": color, "vertex": vertex},
+        )
+        if response is None:
+            return
+    await client.request("GET", "/{session_id}/sgf", session_id)
+    await client.request(
+        "GET", "/{session_id}/board", session_id, params={"format": "raw"}
+    )
+
+
+async def _spectator(
+    client: _Client, session_id: str, options: BenchOptions, rng: random.Random
+) -> None:
+    for color, vertex in scripted_moves(options.board_size, min(options.moves, 4), rng):
+        await client.request(
+            "POST",
+            "/{session_id}/play",
+            session_id,
+            json={"color": color, "vertex": vertex},
+        )
+    etag: str | None = None
+    for _ in range(options.polls):
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await client.request(
+            "GET", "/{session_id}/sgf", session_id, headers=headers
+        )
+        if response is not None:
+            etag = response.headers.get("ETag", etag)
+
+
+Workload = Callable[[_Client, str, BenchOptions, random.Random], Awaitable[None]]
+
+WORKLOADS: dict[str, Workload] = {
+    "game": _game,
+    "review": _review,
+    "spectator": _spectator,
+}
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parse a workload mix such as ``game=1,review=2``."""
+    mix: dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in WORKLOADS:
+            raise ValueError(f"Unknown workload {name!r}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Workload weight for {name!r} cannot be negative")
+    if not mix or not any(mix.values()):
+        raise ValueError("The workload mix is empty")
+    return mix
+
+
+async def run_bench(
+    client: httpx.AsyncClient,
+    *,
+    sessions: int = 4,
+    mix: Mapping[str, float] | None = None,
+    iterations: int = 1,
+    duration: float | None = None,
+    options: BenchOptions = BenchOptions(),
+    seed: int = 0,
+) -> BenchReport:
+    """Drive ``sessions`` concurrent clients against the server behind ``client``.
+
+    Each client runs ``iterations`` workloads, or keeps starting new ones until
+    ``duration`` seconds have passed when it is given. Every workload opens a
+    fresh session, sets the board size and quits the session at the end.
+    """
+
+    if sessions < 1:
+        raise ValueError("sessions must be at least 1")
+    mix = dict(mix or {"game": 1.0})
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    report = BenchReport(sessions=sessions)
+    recorder = _Client(client, report)
+    started = time.perf_counter()
+    deadline = started + duration if duration is not None else None
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed * 1_000_003 + index)
+        done = 0
+        while (deadline is None and done < iterations) or (
+            deadline is not None and time.perf_counter() < deadline
+        ):
+            done += 1
+            name = rng.choices(names, weights)[0]
+            report.workloads[name] = report.workloads.get(name, 0) + 1
+            response = await recorder.request("POST", "/open_session")
+            if response is None:
+                continue
+            session_id = response.json()["session_id"]
+            try:
+                size = await recorder.request(
+                    "POST",
+                    "/{session_id}/boardsize",
+                    session_id,
+                    json={"x": options.board_size},
+                )
+                if size is not None:
+                    await WORKLOADS[name](recorder, session_id, options, rng)
+            finally:
+                await recorder.request("POST", "/{session_id}/quit", session_id)
+
+    await asyncio.gather(*(worker(index) for index in range(sessions)))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+__all__ = [
+    "BenchOptions",
+    "BenchReport",
+    "EndpointStats",
+    "WORKLOADS",
+    "parse_mix",
+    "percentile",
+    "run_bench",
+    "scripted_moves",
+]
@@ -0,0 +1,202 @@
+"""Command-line entry points: ``fastgtp bench`` and ``fastgtp book``.
+
+Usage examples:
+
+    fastgtp bench --url http://localhost:8000 --sessions 32 --duration 60
+    fastgtp bench --app fastgtp.server.main:app --mix game=1,spectator=4 --json
+    fastgtp book games/ --max-moves 20 --output openings.book
+    fastgtp book --engine "gnugo --mode gtp" --games 200 --board-size 9 -o 9x9.book
+
+With ``--app`` the application is imported and served in-process, so the
+numbers include request handling but no network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import sys
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+
+def _load_app(spec: str) -> Any:
+    module_name, _, attribute = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "app")
+
+
+@contextlib.asynccontextmanager
+async def _client(args: argparse.Namespace) -> AsyncIterator[Any]:
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+            yield client
+        return
+
+    app = _load_app(args.app)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://fastgtp", timeout=timeout
+        ) as client:
+            yield client
+
+
+async def _bench(args: argparse.Namespace) -> int:
+    from .bench import BenchOptions, parse_mix, run_bench
+
+    mix = parse_mix(args.mix)
+    async with _client(args) as client:
+        report = await run_bench(
+            client,
+            sessions=args.sessions,
+            mix=mix,
+            iterations=args.iterations,
+            duration=args.duration,
+            options=BenchOptions(
+                board_size=args.board_size, moves=args.moves, polls=args.polls
+            ),
+            seed=args.seed,
+        )
+
+    if args.json:
+        output = json.dumps(report.to_dict(), indent=2)
+    else:
+        output = report.format_table()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 1 if report.requests and report.errors == report.requests else 0
+
+
+def _sgf_files(paths: Sequence[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(".sgf"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+async def _book(args: argparse.Namespace) -> int:
+    from .server.book import OpeningBookBuilder
+    from .server.transport import SubprocessGTPTransport
+
+    builder = OpeningBookBuilder(args.max_moves)
+    games = skipped = 0
+    for path in _sgf_files(args.sgf):
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            text = handle.read()
+        try:
+            builder.add_sgf(text)
+        except ValueError as exc:
+            skipped += 1
+            print(f"skipping {path}: {exc}", file=sys.stderr)
+        else:
+            games += 1
+    if args.engine:
+        transport = SubprocessGTPTransport(args.engine)
+        try:
+            await builder.add_engine_games(
+                transport,
+                args.games,
+                board_size=(args.board_size, args.board_size),
+                komi=args.komi,
+            )
+        finally:
+            await transport.aclose()
+        games += args.games
+
+    positions = builder.write(args.output)
+    print(f"{positions} positions from {games} games written to {args.output}")
+    if skipped:
+        print(f"{skipped} files skipped", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fastgtp")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench = commands.add_parser(
+        "bench", help="Generate load and report latency percentiles."
+    )
+    target = bench.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running fastgtp server.")
+    target.add_argument(
+        "--app", help="Import path of an application to serve in-process."
+    )
+    bench.add_argument("--sessions", type=int, default=4, help="Concurrent clients.")
+    bench.add_argument(
+        "--mix",
+        default="game=1",
+        help="Weighted workloads, e.g. game=1,review=2,spectator=4.",
+    )
+    bench.add_argument(
+        "--iterations", type=int, default=1, help="Workloads run by each client."
+    )
+    bench.add_argument(
+        "--duration",
+        type=float,
+        help="Keep starting workloads for this many seconds instead.",
+    )
+    bench.add_argument("--board-size", type=int, default=9)
+    bench.add_argument("--moves", type=int, default=20, help="Moves per game.")
+    bench.add_argument("--polls", type=int, default=20, help="Polls per spectator.")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument(
+        "--timeout", type=float, default=60.0, help="Per-request timeout in seconds."
+    )
+    bench.add_argument("--json", action="store_true", help="Print JSON.")
+    bench.add_argument("--output", help="Write the report to this file.")
+
+    book = commands.add_parser(
+        "book", help="Build an opening book from SGF games or engine self-play."
+    )
+    book.add_argument(
+        "sgf", nargs="*", help="SGF files, or directories searched for them."
+    )
+    book.add_argument("--engine", help="Engine command to play openings against itself.")
+    book.add_argument(
+        "--games", type=int, default=100, help="Self-play openings for --engine."
+    )
+    book.add_argument("--board-size", type=int, default=19)
+    book.add_argument("--komi", type=float)
+    book.add_argument(
+        "--max-moves", type=int, default=20, help="Moves kept from each game."
+    )
+    book.add_argument("-o", "--output", required=True, help="Book file to write.")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "bench":
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            parser.error("fastgtp bench requires httpx (pip install fastgtp[bench])")
+        try:
+            return asyncio.run(_bench(args))
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.command == "book":
+        if not args.sgf and not args.engine:
+            parser.error("fastgtp book needs SGF files or --engine")
+        return asyncio.run(_book(args))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+"""Async client for fastgtp servers.
+
+Usage example:
+
+    async with FastGtpClient("http://localhost:8000") as client:
+        session = await client.open_session()
+        await session.boardsize(19)
+        await session.play("B", "D4")
+        move = await session.genmove("W")
+
+One client keeps a pool of keep-alive connections and should be shared by the
+whole application. Raw commands sent concurrently on a session with
+:meth:`ClientSession.command` are coalesced into a single ``/batch`` request,
+and long command lists or scoring jobs can be streamed chunk by chunk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Iterable, Literal, Sequence, TypeVar
+
+import httpx
+from pydantic import BaseModel
+
+from .server.router import (
+    BatchResponse,
+    ClockResponse,
+    CommandResponse,
+    CommandResult,
+    CommandsResponse,
+    GenMoveResponse,
+    KomiValueResponse,
+    NameResponse,
+    OpenSessionResponse,
+    OwnershipResponse,
+    ProtocolVersionResponse,
+    SchedulerResponse,
+    ScoreBatchResponse,
+    ScoreResponse,
+    SgfResponse,
+    SpeculationResponse,
+    VersionResponse,
+)
+
+Color = Literal["B", "W"]
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class FastGtpError(Exception):
+    """Raised when the server rejects a request.
+
+    ``retry_after`` carries the server's ``Retry-After`` hint for 429/503.
+    """
+
+    def __init__(
+        self, status_code: int, detail: str, *, retry_after: float | None = None
+    ):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class GTPCommandError(FastGtpError):
+    """Raised when the engine answers a command of a batch with a failure."""
+
+    def __init__(self, detail: str):
+        super().__init__(502, detail)
+
+
+class FastGtpClient:
+    """Pooled async client for the endpoints of :class:`~fastgtp.FastGtp`.
+
+    Parameters
+    ----------
+    base_url:
+        Root URL of the server.
+    api_key, client_id:
+        Identify the caller to the server's scheduler.
+    priority:
+        Lower the scheduling class of every request, e.g. ``"batch"``.
+    max_connections, max_keepalive:
+        Connection pool limits.
+    coalesce:
+        Merge concurrent :meth:`ClientSession.command` calls into batches.
+    transport:
+        Custom httpx transport, e.g. ``httpx.ASGITransport`` for an
+        in-process application.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        *,
+        api_key: str | None = None,
+        client_id: str | None = None,
+        priority: Literal["interactive", "analysis", "batch"] | None = None,
+        timeout: float = 60.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        coalesce: bool = True,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        headers: dict[str, str] = {}
+        if api_key is not None:
+            headers["X-API-Key"] = api_key
+        if client_id is not None:
+            headers["X-Client-Id"] = client_id
+        if priority is not None:
+            headers["X-Priority"] = priority
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+            transport=transport,
+        )
+        self.coalesce = coalesce
+        self._batch_supported: bool | None = None
+
+    async def __aenter__(self) -> FastGtpClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self._http.aclose()
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send a request and raise :class:`FastGtpError` on error statuses."""
+        response = await self._http.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            retry_after = response.headers.get("Retry-After")
+            raise FastGtpError(
+                response.status_code,
+                detail if isinstance(detail, str) else str(detail),
+                retry_after=float(retry_after) if retry_after else None,
+            )
+        return response
+
+    async def _model(
+        self, model: type[ModelT], method: str, path: str, **kwargs: Any
+    ) -> ModelT:
+        response = await self.request(method, path, **kwargs)
+        return model.model_validate_json(response.content)
+
+    async def open_session(self) -> ClientSession:
+        """Open a session on its own engine."""
+        opened = await self._model(OpenSessionResponse, "POST", "/open_session")
+        return ClientSession(self, opened.session_id)
+
+    def session(self, session_id: str) -> ClientSession:
+        """Return a handle on an existing session."""
+        return ClientSession(self, session_id)
+
+    async def score(
+        self, positions: Sequence[dict[str, Any]], *, threshold: float = 0.5
+    ) -> list[ScoreResponse]:
+        """Score positions given as ``POST /score`` position objects."""
+        result = await self._model(
+            ScoreBatchResponse,
+            "POST",
+            "/score",
+            json={"positions": list(positions), "threshold": threshold},
+        )
+        return result.scores
+
+    async def iter_scores(
+        self,
+        positions: Iterable[dict[str, Any]],
+        *,
+        threshold: float = 0.5,
+        chunk_size: int = 256,
+    ) -> AsyncIterator[ScoreResponse]:
+        """Score any number of positions, yielding results chunk by chunk."""
+        chunk: list[dict[str, Any]] = []
+        for position in positions:
+            chunk.append(position)
+            if len(chunk) >= chunk_size:
+                for score in await self.score(chunk, threshold=threshold):
+                    yield score
+                chunk = []
+        if chunk:
+            for score in await self.score(chunk, threshold=threshold):
+                yield score
+
+    async def scheduler_stats(self) -> SchedulerResponse:
+        return await self._model(SchedulerResponse, "GET", "/scheduler")
+
+    async def speculation_stats(self) -> SpeculationResponse:
+        return await self._model(SpeculationResponse, "GET", "/speculation")
+
+
+class ClientSession:
+    """Typed methods for one session of a :class:`FastGtpClient`."""
+
+    def __init__(self, client: FastGtpClient, session_id: str):
+        self.client = client
+        self.session_id = session_id
+        self._pending: list[tuple[str, asyncio.Future[str]]] = []
+        self._flusher: asyncio.Task[None] | None = None
+        self._sgf: tuple[str, str] | None = None
+
+    def __repr__(self) -> str:
+        return f"ClientSession({self.session_id!r})"
+
+    def _path(self, endpoint: str) -> str:
+        return f"/{self.session_id}/{endpoint}"
+
+    async def _post(self, endpoint: str, payload: dict[str, Any] | None = None) -> str:
+        response = await self.client.request("POST", self._path(endpoint), json=payload)
+        return response.json().get("detail", "")
+
+    async def name(self) -> str:
+        return (await self.client._model(NameResponse, "GET", self._path("name"))).name
+
+    async def version(self) -> str:
+        path = self._path("version")
+        return (await self.client._model(VersionResponse, "GET", path)).version
+
+    async def protocol_version(self) -> str:
+        path = self._path("protocol_version")
+        result = await self.client._model(ProtocolVersionResponse, "GET", path)
+        return result.protocol_version
+
+    async def list_commands(self) -> list[str]:
+        path = self._path("commands")
+        return (await self.client._model(CommandsResponse, "GET", path)).commands
+
+    async def boardsize(self, x: int, y: int | None = None) -> str:
+        return await self._post("boardsize", {"x": x, "y": y})
+
+    async def komi(self, value: float) -> str:
+        return await self._post("komi", {"value": value})
+
+    async def get_komi(self) -> float:
+        path = self._path("komi")
+        return (await self.client._model(KomiValueResponse, "GET", path)).komi
+
+    async def play(self, color: Color, vertex: str) -> str:
+        return await self._post("play", {"color": color, "vertex": vertex})
+
+    async def clear_board(self) -> str:
+        return await self._post("clear_board")
+
+    async def genmove(self, color: Color, *, ponder: bool = False) -> str:
+        result = await self.client._model(
+            GenMoveResponse,
+            "POST",
+            self._path("genmove"),
+            json={"color": color, "ponder": ponder},
+        )
+        return result.move
+
+    async def sgf(self) -> str:
+        """Return the game as SGF, revalidating a cached copy by ``ETag``."""
+        headers = {"If-None-Match": self._sgf[0]} if self._sgf else {}
+        response = await self.client.request("GET", self._path("sgf"), headers=headers)
+        if response.status_code == 304 and self._sgf is not None:
+            return self._sgf[1]
+        sgf = SgfResponse.model_validate_json(response.content).sgf
+        etag = response.headers.get("ETag")
+        self._sgf = (etag, sgf) if etag else None
+        return sgf
+
+    async def load_sgf(self, content: str, move: int | None = None) -> str:
+        return await self._post("sgf", {"content": content, "move": move})
+
+    async def board(
+        self,
+        features: Sequence[str] = ("black", "white"),
+        *,
+        last_n: int = 0,
+        format: Literal["npy", "raw"] = "npy",
+    ) -> bytes:
+        """Return the position as packed feature planes."""
+        response = await self.client.request(
+            "GET",
+            self._path("board"),
+            params={"features": ",".join(features), "last_n": last_n, "format": format},
+        )
+        return response.content
+
+    async def ownership(self) -> OwnershipResponse:
+        path = self._path("ownership")
+        return await self.client._model(OwnershipResponse, "GET", path)
+
+    async def score(self, *, threshold: float = 0.5) -> ScoreResponse:
+        return await self.client._model(
+            ScoreResponse, "GET", self._path("score"), params={"threshold": threshold}
+        )
+
+    async def set_clock(
+        self,
+        kind: Literal["absolute", "byoyomi", "canadian"],
+        main_time: float,
+        *,
+        period_time: float = 0.0,
+        periods: int = 0,
+        stones: int = 0,
+    ) -> ClockResponse:
+        return await self.client._model(
+            ClockResponse,
+            "POST",
+            self._path("clock"),
+            json={
+                "kind": kind,
+                "main_time": main_time,
+                "period_time": period_time,
+                "periods": periods,
+                "stones": stones,
+            },
+        )
+
+    async def clock(self) -> ClockResponse:
+        return await self.client._model(ClockResponse, "GET", self._path("clock"))
+
+    async def fork(self) -> ClientSession:
+        """Open a new session starting from this session's position."""
+        forked = await self.client._model(
+            OpenSessionResponse, "POST", self._path("fork")
+        )
+        return ClientSession(self.client, forked.session_id)
+
+    async def quit(self) -> bool:
+        response = await self.client.request("POST", self._path("quit"))
+        return bool(response.json().get("closed"))
+
+    async def command(self, command: str) -> str:
+        """Send a raw GTP command and return its payload.
+
+        Commands issued concurrently are sent together in one ``/batch``
+        request, in the order they were issued.
+        """
+        if not self.client.coalesce:
+            return await self._single(command)
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._pending.append((command, future))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+
+    async def batch(self, commands: Sequence[str]) -> list[CommandResult]:
+        """Send ``commands`` in one round trip and return every result."""
+        if self.client._batch_supported is not False:
+            try:
+                result = await self.client._model(
+                    BatchResponse,
+                    "POST",
+                    self._path("batch"),
+                    json={"commands": list(commands)},
+                )
+            except FastGtpError as exc:
+                # Servers without the batch endpoint answer a plain 404.
+                if exc.status_code != 404 or exc.detail != "Not Found":
+                    raise
+                self.client._batch_supported = False
+            else:
+                self.client._batch_supported = True
+                return result.results
+
+        results: list[CommandResult] = []
+        for command in commands:
+            try:
+                payload = await self._single(command)
+            except FastGtpError as exc:
+                if exc.status_code != 502:
+                    raise
+                results.append(CommandResult(success=False, error=exc.detail))
+            else:
+                results.append(CommandResult(success=True, payload=payload))
+        return results
+
+    async def iter_commands(
+        self, commands: Iterable[str], *, chunk_size: int = 64
+    ) -> AsyncIterator[CommandResult]:
+        """Send many commands in batches, yielding results as they arrive."""
+        chunk: list[str] = []
+        for command in commands:
+            chunk.append(command)
+            if len(chunk) >= chunk_size:
+                for result in await self.batch(chunk):
+                    yield result
+                chunk = []
+        if chunk:
+            for result in await self.batch(chunk):
+                yield result
+
+    async def _single(self, command: str) -> str:
+        result = await self.client._model(
+            CommandResponse, "POST", self._path("command"), json={"command": command}
+        )
+        return result.detail
+
+    async def _flush(self) -> None:
+        try:
+            while self._pending:
+                # Let every caller scheduled in this loop iteration join.
+                await asyncio.sleep(0)
+                pending, self._pending = self._pending, []
+                try:
+                    if len(pending) == 1:
+                        results = [await self._single_result(pending[0][0])]
+                    else:
+                        results = await self.batch([command for command, _ in pending])
+                except Exception as exc:
+                    for _, future in pending:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for (_, future), result in zip(pending, results):
+                    if future.done():
+                        continue
+                    if result.success:
+                        future.set_result(result.payload)
+                    else:
+                        future.set_exception(
+                            GTPCommandError(result.error or "Unknown GTP error")
+                        )
+        finally:
+            self._flusher = None
+
+    async def _single_result(self, command: str) -> CommandResult:
+        try:
+            return CommandResult(success=True, payload=await self._single(command))
+        except FastGtpError as exc:
+            if exc.status_code != 502:
+                raise
+            return CommandResult(success=False, error=exc.detail)
+
+
+__all__ = [
+    "ClientSession",
+    "FastGtpClient",
+    "FastGtpError",
+    "GTPCommandError",
+]
@@ -1,5 +1,9 @@
 """Server package for the fastgtp project."""
 
+from .archive import GameArchive
+from .book import OpeningBook, OpeningBookBuilder
+from .clock import GameClock, TimeControl
+from .events import SessionEvents
 from .gtp import (
     ParsedCommand,
     ParsedResponse,
@@ -7,6 +11,11 @@ from .gtp import (
     parse_command_line,
     parse_response,
 )
+from .metering import EngineMeter, QuotaExceededError
+from .monitor import ProcessStats, ResourceMonitor, read_process_stats
+from .placement import PlacementScheduler
+from .pool import EnginePool
+from .recording import RecordingGTPTransport, ReplayGTPTransport
 from .router import (
     FastGtp,
     NameResponse,
@@ -17,7 +26,21 @@ from .router import (
     create_app,
     get_transport_manager,
 )
-from .transport import GTPTransport, GTPTransportManager, SubprocessGTPTransport
+from .scheduler import CommandScheduler
+from .session import GTPSession
+from .speculation import SpeculationMetrics, Speculator
+from .startup import Startup
+from .transport import (
+    AdmissionError,
+    EngineCapacityError,
+    EngineStartupError,
+    EngineSwap,
+    GTPTransport,
+    GTPTransportManager,
+    QueueFullError,
+    QueueTimeoutError,
+    SubprocessGTPTransport,
+)
 
 __all__ = [
     "FastGtp",
@@ -27,10 +50,36 @@ __all__ = [
     "OpenSessionResponse",
     "VersionResponse",
     "create_app",
+    "ProcessStats",
+    "ResourceMonitor",
+    "read_process_stats",
+    "PlacementScheduler",
+    "EnginePool",
+    "GameArchive",
     "get_transport_manager",
+    "AdmissionError",
+    "EngineCapacityError",
+    "EngineStartupError",
+    "EngineSwap",
+    "QueueFullError",
+    "QueueTimeoutError",
+    "QuotaExceededError",
+    "CommandScheduler",
+    "EngineMeter",
+    "GTPSession",
+    "OpeningBook",
+    "OpeningBookBuilder",
+    "SessionEvents",
+    "GameClock",
+    "TimeControl",
+    "SpeculationMetrics",
+    "Speculator",
+    "Startup",
     "GTPTransport",
     "GTPTransportManager",
     "SubprocessGTPTransport",
+    "RecordingGTPTransport",
+    "ReplayGTPTransport",
     "ParsedCommand",
     "ParsedResponse",
     "build_command",
@@ -0,0 +1,554 @@
+"""Append-only archive of finished games with an on-disk position index.
+
+Games are stored with two bytes per move and indexed by the normalized
+Zobrist key of every position they reach (see :func:`.book.canonical_key`),
+so "which games reached this position" is a binary search per index segment.
+The archive directory holds::
+
+    games.dat     per game "<HBBfd" (moves, width, height, komi, finished_at),
+                  then one u16 per move: point, 0x7FFF for a pass, with the
+                  high bit set for white
+    games.idx     u64 offset into games.dat per game id
+    segments      manifest of the live index segments, one "level name" a line
+    *.seg         "<8sII" (magic, format version, entries), then the entries
+                  sorted by key as three arrays: u64 keys, u32 game ids and
+                  u16 move numbers
+
+:meth:`GameArchive.append` only buffers a game. Buffered games are encoded,
+hashed and written by a worker thread, at the latest every ``flush_interval``
+seconds, each flush adding one index segment. A flush that fails is undone on
+disk and its games stay buffered for the next one. Once ``fanout`` segments share
+a level they are merged into one of the next level, so a lookup touches a
+logarithmic number of segments. Segments are memory-mapped and searched in
+place.
+"""
+
+from __future__ import annotations
+
+import array
+import asyncio
+import bisect
+import contextlib
+import heapq
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Sequence
+
+from .board import Board
+from .book import _Unpacked, _zobrist, canonical_key, symmetries
+from .gtp import format_vertex
+from .session import Move
+
+SEGMENT_MAGIC = b"FGTPPIDX"
+FORMAT_VERSION = 1
+
+_GAME = struct.Struct("<HBBfd")
+_SEGMENT = struct.Struct("<8sII")
+_PASS = 0x7FFF
+_WHITE = 0x8000
+_MAX_MOVES = 0xFFFF
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ArchivedGame:
+    """A finished game read back from the archive."""
+
+    game_id: int
+    board_size: tuple[int, int]
+    komi: float | None
+    moves: list[Move]
+    finished_at: float
+
+
+@dataclass(frozen=True, slots=True)
+class PositionHit:
+    """A game that reached a position after ``move_number`` moves."""
+
+    game_id: int
+    move_number: int
+
+
+@dataclass(frozen=True, slots=True)
+class _Pending:
+    board_size: tuple[int, int]
+    komi: float | None
+    finished_at: float
+    moves: bytes
+
+
+def encode_moves(board_size: tuple[int, int], moves: Iterable[Move]) -> bytes:
+    """Encode ``moves`` with two bytes per move.
+
+    Raises
+    ------
+    ValueError
+        If a move is off the board or the game is too long to store.
+    """
+    board = Board(*board_size)
+    encoded = array.array("H")
+    for color, vertex in moves:
+        point = board.index(vertex)
+        code = _PASS if point is None else point
+        encoded.append(code | _WHITE if color.upper().startswith("W") else code)
+    if len(encoded) > _MAX_MOVES:
+        raise ValueError(f"Games are limited to {_MAX_MOVES} moves")
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        encoded.byteswap()
+    return encoded.tobytes()
+
+
+def decode_moves(board_size: tuple[int, int], data: bytes) -> list[Move]:
+    """Decode moves written by :func:`encode_moves`."""
+    width, height = board_size
+    codes = array.array("H", data)
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        codes.byteswap()
+    moves: list[Move] = []
+    for code in codes:
+        color = "W" if code & _WHITE else "B"
+        point = code & ~_WHITE
+        if point == _PASS:
+            moves.append((color, "pass"))
+        else:
+            row, column = divmod(point, width)
+            moves.append((color, format_vertex(column, height - 1 - row)))
+    return moves
+
+
+def position_keys(
+    board_size: tuple[int, int], data: bytes, limit: int | None = None
+) -> Iterator[int]:
+    """Yield the normalized key after each of the encoded moves.
+
+    The keys equal :func:`.book.canonical_key` of the position with the
+    opponent of the last mover to play, but are updated incrementally.
+    """
+    width, height = board_size
+    base, white_to_play, table = _zobrist(width, height)
+    permutations = symmetries(width, height)
+    board = Board(width, height)
+    stones = [0] * len(permutations)
+    codes = array.array("H", data)
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        codes.byteswap()
+    for number, code in enumerate(codes):
+        if limit is not None and number >= limit:
+            return
+        white = bool(code & _WHITE)
+        point = code & ~_WHITE
+        if point != _PASS:
+            row, column = divmod(point, width)
+            vertex = format_vertex(column, height - 1 - row)
+            color = 2 if white else 1
+            captured = board.play("W" if white else "B", vertex)
+            if board.cells[point] == color:
+                for symmetry, permutation in enumerate(permutations):
+                    key = stones[symmetry] ^ table[permutation[point]][color]
+                    for stone in captured:
+                        key ^= table[permutation[stone]][3 - color]
+                    stones[symmetry] = key
+            else:
+                # Suicide removed stones play() does not report; start over.
+                stones = [0] * len(permutations)
+                for index, value in enumerate(board.cells):
+                    if value:
+                        for symmetry, permutation in enumerate(permutations):
+                            stones[symmetry] ^= table[permutation[index]][value]
+        to_play = base if white else base ^ white_to_play
+        yield min(to_play ^ key for key in stones)
+
+
+class _Segment:
+    """A memory-mapped, sorted run of index entries."""
+
+    def __init__(self, path: str, level: int):
+        self.path = path
+        self.level = level
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, entries = _SEGMENT.unpack_from(self._map)
+        except struct.error as exc:
+            self._map.close()
+            raise ValueError(f"{path} is not an index segment") from exc
+        if magic != SEGMENT_MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(
+                f"{path} is not an index segment of version {FORMAT_VERSION}"
+            )
+        self.entries = entries
+        keys_offset = _SEGMENT.size
+        games_offset = keys_offset + 8 * entries
+        moves_offset = games_offset + 4 * entries
+        if len(self._map) < moves_offset + 2 * entries:
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+        view = memoryview(self._map)
+        self.keys: Sequence[int]
+        self.games: Sequence[int]
+        self.moves: Sequence[int]
+        if sys.byteorder == "little":
+            self.keys = view[keys_offset:games_offset].cast("Q")
+            self.games = view[games_offset:moves_offset].cast("I")
+            self.moves = view[moves_offset : moves_offset + 2 * entries].cast("H")
+        else:  # pragma: no cover - big-endian hosts
+            self.keys = _Unpacked(view, keys_offset, "<Q", entries)
+            self.games = _Unpacked(view, games_offset, "<I", entries)
+            self.moves = _Unpacked(view, moves_offset, "<H", entries)
+        self._view = view
+
+    def find(self, key: int) -> range:
+        first = bisect.bisect_left(self.keys, key)
+        return range(first, bisect.bisect_right(self.keys, key, lo=first))
+
+    def entries_iter(self) -> Iterator[tuple[int, int, int]]:
+        return zip(self.keys, self.games, self.moves)
+
+    def close(self) -> None:
+        for view in (self.keys, self.games, self.moves, self._view):
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
+
+
+def _write_segment(path: str, entries: Iterable[tuple[int, int, int]]) -> int:
+    keys = array.array("Q")
+    games = array.array("I")
+    moves = array.array("H")
+    for key, game_id, number in entries:
+        keys.append(key)
+        games.append(game_id)
+        moves.append(number)
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        for column in (keys, games, moves):
+            column.byteswap()
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(_SEGMENT.pack(SEGMENT_MAGIC, FORMAT_VERSION, len(keys)))
+        for column in (keys, games, moves):
+            handle.write(column.tobytes())
+    os.replace(temporary, path)
+    return len(keys)
+
+
+class GameArchive:
+    """Store finished games and find the games that reached a position.
+
+    Parameters
+    ----------
+    path:
+        Directory holding the archive; created if missing.
+    index_moves:
+        Index only the positions after at most this many moves of each game.
+    flush_interval:
+        Seconds buffered games may wait before the background flush.
+    batch_size:
+        Buffered games that trigger a flush without waiting.
+    fanout:
+        Index segments of one level that are merged into the next.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        index_moves: int | None = None,
+        flush_interval: float = 1.0,
+        batch_size: int = 1024,
+        fanout: int = 4,
+    ):
+        if fanout < 2:
+            raise ValueError("fanout must be at least 2")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.index_moves = index_moves
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._fanout = fanout
+        self._pending: list[_Pending] = []
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+        self._offsets = array.array("Q")
+        with contextlib.suppress(FileNotFoundError):
+            with open(self._file("games.idx"), "rb") as handle:
+                self._offsets.frombytes(handle.read())
+            if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+                self._offsets.byteswap()
+        # Unbuffered, so that a failed write leaves nothing behind to flush.
+        self._games = open(self._file("games.dat"), "a+b", buffering=0)
+        self._sequence = 0
+        self._segments: list[_Segment] = []
+        for level, name in self._read_manifest():
+            self._segments.append(_Segment(self._file(name), level))
+            self._sequence = max(self._sequence, int(name.split(".")[0], 16) + 1)
+
+    def __len__(self) -> int:
+        """Number of games written to disk."""
+        return len(self._offsets)
+
+    @property
+    def pending(self) -> int:
+        """Number of games buffered for the next flush."""
+        return len(self._pending)
+
+    @property
+    def segments(self) -> int:
+        """Number of live index segments."""
+        return len(self._segments)
+
+    def append(
+        self,
+        board_size: tuple[int, int],
+        moves: Iterable[Move],
+        *,
+        komi: float | None = None,
+        finished_at: float | None = None,
+    ) -> None:
+        """Buffer a finished game; it is written and indexed by the next flush.
+
+        Raises
+        ------
+        ValueError
+            If a move is off the board or the game is too long to store.
+        """
+        self._pending.append(
+            _Pending(
+                board_size,
+                komi,
+                time.time() if finished_at is None else finished_at,
+                encode_moves(board_size, moves),
+            )
+        )
+        if len(self._pending) >= self._batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write and index the buffered games; return how many were written.
+
+        If writing fails, the files are rolled back and the games stay
+        buffered before any appended since.
+        """
+        async with self._flush_lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            first_id = len(self._offsets)
+            try:
+                offsets, segments, retired = await asyncio.to_thread(
+                    self._write, pending, first_id, list(self._segments)
+                )
+            except BaseException:
+                self._pending[:0] = pending
+                raise
+            # Swapped on the event loop, where lookups run, so that no lookup
+            # sees a closed segment.
+            self._offsets.extend(offsets)
+            for segment in retired:
+                segment.close()
+            self._segments = segments
+            return len(pending)
+
+    def start(self) -> None:
+        """Start flushing buffered games in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flush and write what is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def close(self) -> None:
+        """Close the archive files; buffered games are lost."""
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+        self._games.close()
+
+    def find(
+        self, board: Board, to_play: str, *, limit: int | None = 100
+    ) -> tuple[int, list[PositionHit]]:
+        """Return how many archived games reached a position and the latest.
+
+        Positions are matched up to rotation and reflection. Hits are ordered
+        from the most recently archived game; a game that reached the
+        position more than once is listed once per occurrence.
+        """
+        key, _ = canonical_key(board, to_play)
+        ranges = [(segment, segment.find(key)) for segment in self._segments]
+        total = sum(len(found) for _, found in ranges)
+        hits: list[PositionHit] = []
+        # Newer segments hold newer games, and entries are sorted by game id.
+        for segment, found in reversed(ranges):
+            for position in reversed(found):
+                if limit is not None and len(hits) >= limit:
+                    return total, hits
+                hits.append(
+                    PositionHit(segment.games[position], segment.moves[position])
+                )
+        return total, hits
+
+    def get(self, game_id: int) -> ArchivedGame:
+        """Read an archived game.
+
+        Raises
+        ------
+        KeyError
+            If no game with that id has been written.
+        """
+        if not 0 <= game_id < len(self._offsets):
+            raise KeyError(game_id)
+        offset = self._offsets[game_id]
+        header = os.pread(self._games.fileno(), _GAME.size, offset)
+        count, width, height, komi, finished_at = _GAME.unpack(header)
+        data = os.pread(self._games.fileno(), 2 * count, offset + _GAME.size)
+        return ArchivedGame(
+            game_id,
+            (width, height),
+            None if math.isnan(komi) else komi,
+            decode_moves((width, height), data),
+            finished_at,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self._flush_interval)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                _logger.exception(
+                    "Archive flush failed; %d games stay buffered", self.pending
+                )
+                # Retry after a full interval, even if games keep arriving.
+                await asyncio.sleep(self._flush_interval)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_manifest(self) -> list[tuple[int, str]]:
+        try:
+            with open(self._file("segments"), encoding="ascii") as handle:
+                lines = handle.read().split("\n")
+        except FileNotFoundError:
+            return []
+        result = []
+        for line in lines:
+            if line.strip():
+                level, name = line.split()
+                result.append((int(level), name))
+        return result
+
+    def _write_manifest(self, segments: Sequence[_Segment]) -> None:
+        temporary = self._file("segments.tmp")
+        with open(temporary, "w", encoding="ascii") as handle:
+            for segment in segments:
+                handle.write(f"{segment.level} {os.path.basename(segment.path)}\n")
+        os.replace(temporary, self._file("segments"))
+
+    def _new_segment(
+        self, entries: Iterable[tuple[int, int, int]], level: int
+    ) -> _Segment:
+        name = f"{self._sequence:012x}.seg"
+        self._sequence += 1
+        _write_segment(self._file(name), entries)
+        return _Segment(self._file(name), level)
+
+    def _write(
+        self, pending: list[_Pending], first_id: int, segments: list[_Segment]
+    ) -> tuple[list[int], list[_Segment], list[_Segment]]:
+        """Append games and their index segment; runs in a worker thread.
+
+        On failure the files are truncated back to ``first_id`` games and the
+        new segments removed, so that they still match ``_offsets``.
+        """
+        size = os.fstat(self._games.fileno()).st_size
+        data = bytearray()
+        offsets: list[int] = []
+        entries: list[tuple[int, int, int]] = []
+        for game_id, game in enumerate(pending, first_id):
+            offsets.append(size + len(data))
+            komi = math.nan if game.komi is None else game.komi
+            data += _GAME.pack(
+                len(game.moves) // 2, *game.board_size, komi, game.finished_at
+            )
+            data += game.moves
+            keys = position_keys(game.board_size, game.moves, self.index_moves)
+            entries.extend(
+                (key, game_id, number) for number, key in enumerate(keys, 1)
+            )
+        packed = array.array("Q", offsets)
+        if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+            packed.byteswap()
+        entries.sort()
+
+        created: list[_Segment] = []
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[self._games.write(view) :]
+            with open(self._file("games.idx"), "ab") as handle:
+                handle.write(packed.tobytes())
+
+            created.append(self._new_segment(entries, 0))
+            live = segments + created
+            retired: list[_Segment] = []
+            level = 0
+            while True:
+                same = [segment for segment in live if segment.level == level]
+                if len(same) < self._fanout:
+                    break
+                # Oldest first, so entries of equal keys stay ordered by game id.
+                merged = self._new_segment(
+                    heapq.merge(
+                        *(segment.entries_iter() for segment in same),
+                        key=lambda entry: entry[0],
+                    ),
+                    level + 1,
+                )
+                created.append(merged)
+                position = live.index(same[0])
+                live = [segment for segment in live if segment not in same]
+                live.insert(position, merged)
+                retired.extend(same)
+                level += 1
+            self._write_manifest(live)
+        except BaseException:
+            for segment in created:
+                segment.close()
+                with contextlib.suppress(OSError):
+                    os.unlink(segment.path)
+            with contextlib.suppress(OSError):
+                self._games.truncate(size)
+            with contextlib.suppress(OSError):
+                os.truncate(self._file("games.idx"), 8 * first_id)
+            raise
+        for segment in retired:
+            with contextlib.suppress(OSError):
+                os.unlink(segment.path)
+        return offsets, live, retired
+
+
+__all__ = [
+    "ArchivedGame",
+    "GameArchive",
+    "PositionHit",
+    "decode_moves",
+    "encode_moves",
+    "position_keys",
+]
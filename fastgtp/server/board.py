@@ -0,0 +1,133 @@
+"""Server-side board model rebuilt from a session's recorded moves.
+
+The board is a flat ``bytearray`` in row-major order with row 0 at the top
+edge, matching the layout of SGF and of most neural network inputs. It lets
+the server answer position questions without asking the engine.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from .gtp import parse_vertex
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+_STONES = {"B": BLACK, "W": WHITE}
+
+
+class Board:
+    """Go board applying moves with captures.
+
+    ``captures`` counts the stones captured by black and by white.
+    """
+
+    __slots__ = ("width", "height", "cells", "captures")
+
+    def __init__(self, width: int, height: int):
+        if width < 1 or height < 1:
+            raise ValueError("board dimensions must be positive")
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+        self.captures = [0, 0]
+
+    @classmethod
+    def from_moves(
+        cls, board_size: tuple[int, int], moves: Iterable[tuple[str, str]]
+    ) -> Board:
+        """Build the position reached by playing ``moves`` on an empty board."""
+        board = cls(*board_size)
+        for color, vertex in moves:
+            board.play(color, vertex)
+        return board
+
+    def copy(self) -> Board:
+        board = Board(self.width, self.height)
+        board.cells[:] = self.cells
+        board.captures = list(self.captures)
+        return board
+
+    def index(self, vertex: str) -> int | None:
+        """Return the cell index of ``vertex``, or ``None`` for a pass."""
+        point = parse_vertex(vertex)
+        if point is None:
+            return None
+        column, row = point
+        if column >= self.width or row >= self.height:
+            raise ValueError(f"Vertex {vertex!r} is off the board")
+        return (self.height - 1 - row) * self.width + column
+
+    def neighbors(self, index: int) -> list[int]:
+        row, column = divmod(index, self.width)
+        result: list[int] = []
+        if row > 0:
+            result.append(index - self.width)
+        if row < self.height - 1:
+            result.append(index + self.width)
+        if column > 0:
+            result.append(index - 1)
+        if column < self.width - 1:
+            result.append(index + 1)
+        return result
+
+    def group(self, index: int) -> tuple[list[int], set[int]]:
+        """Return the stones of the group at ``index`` and its liberties."""
+        color = self.cells[index]
+        stones = [index]
+        seen = {index}
+        liberties: set[int] = set()
+        for stone in stones:
+            for neighbor in self.neighbors(stone):
+                value = self.cells[neighbor]
+                if value == EMPTY:
+                    liberties.add(neighbor)
+                elif value == color and neighbor not in seen:
+                    seen.add(neighbor)
+                    stones.append(neighbor)
+        return stones, liberties
+
+    def play(self, color: str, vertex: str) -> list[int]:
+        """Place a stone, remove captured groups and return their points."""
+        index = self.index(vertex)
+        if index is None:
+            return []
+        stone = _STONES[color.upper()[0]]
+        opponent = BLACK + WHITE - stone
+        self.cells[index] = stone
+
+        captured: list[int] = []
+        for neighbor in self.neighbors(index):
+            if self.cells[neighbor] != opponent:
+                continue
+            stones, liberties = self.group(neighbor)
+            if not liberties:
+                captured.extend(stones)
+                for point in stones:
+                    self.cells[point] = EMPTY
+
+        self.captures[stone - 1] += len(captured)
+
+        stones, liberties = self.group(index)
+        if not liberties:
+            # Suicide is only legal under some rule sets; mirror the engine.
+            for point in stones:
+                self.cells[point] = EMPTY
+            self.captures[opponent - 1] += len(stones)
+        return captured
+
+    def liberties(self) -> list[int]:
+        """Return, for every point, the liberty count of the group on it."""
+        counts = [0] * len(self.cells)
+        for index, value in enumerate(self.cells):
+            if value == EMPTY or counts[index]:
+                continue
+            stones, liberties = self.group(index)
+            for stone in stones:
+                counts[stone] = len(liberties)
+        return counts
+
+
+__all__ = ["BLACK", "Board", "EMPTY", "WHITE"]
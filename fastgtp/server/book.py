@@ -0,0 +1,540 @@
+"""Memory-mapped opening book consulted before ``genmove``.
+
+Positions are keyed by a 64-bit Zobrist hash normalized over the board's
+symmetries, so rotations, reflections and transpositions of an opening share
+one entry. The book file holds a sorted key table, a ``(first, count)`` index
+per key and the candidate moves of every position in canonical orientation::
+
+    header   "<8sIIII"  magic, format version, positions, moves, max_moves
+    keys     positions * u64, ascending
+    index    positions * (u32 first move, u32 move count)
+    moves    moves * "<HHIf"  point (0xFFFF = pass), reserved, weight, value
+
+The file is mapped rather than read, and a lookup is one ``bisect`` over the
+mapped key table, so opening a book costs no memory beyond the pages touched.
+:class:`OpeningBookBuilder` writes books from SGF games or from an engine
+playing itself.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import mmap
+import random
+import re
+import struct
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Literal, Sequence
+
+from .board import EMPTY, Board
+from .gtp import format_vertex, normalize_color, parse_response
+
+MAGIC = b"FGTPBOOK"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sIIII")
+_MOVE = struct.Struct("<HHIf")
+_PASS = 0xFFFF
+_STONE_PATTERN = re.compile(b"[\x01\x02]")
+
+Weighting = Literal["count", "value"]
+
+
+@functools.lru_cache(maxsize=None)
+def symmetries(width: int, height: int) -> tuple[tuple[int, ...], ...]:
+    """Return the point permutations of the board's symmetries.
+
+    Square boards have eight symmetries, rectangular boards four. The first
+    permutation is the identity.
+    """
+    result: list[tuple[int, ...]] = []
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (r, width - 1 - c),
+        lambda r, c: (height - 1 - r, c),
+        lambda r, c: (height - 1 - r, width - 1 - c),
+    ]
+    if width == height:
+        transforms += [
+            lambda r, c: (c, r),
+            lambda r, c: (c, height - 1 - r),
+            lambda r, c: (width - 1 - c, r),
+            lambda r, c: (width - 1 - c, height - 1 - r),
+        ]
+    for transform in transforms:
+        permutation = []
+        for index in range(width * height):
+            row, column = transform(*divmod(index, width))
+            permutation.append(row * width + column)
+        result.append(tuple(permutation))
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=None)
+def _inverses(width: int, height: int) -> tuple[tuple[int, ...], ...]:
+    result = []
+    for permutation in symmetries(width, height):
+        inverse = [0] * len(permutation)
+        for index, image in enumerate(permutation):
+            inverse[image] = index
+        result.append(tuple(inverse))
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=None)
+def _zobrist(width: int, height: int) -> tuple[int, int, tuple[tuple[int, int, int], ...]]:
+    # Seeded by the board size so that builders and servers agree on keys.
+    rng = random.Random(f"fastgtp-book:{width}x{height}")
+    base = rng.getrandbits(64)
+    white_to_play = rng.getrandbits(64)
+    table = tuple(
+        (0, rng.getrandbits(64), rng.getrandbits(64)) for _ in range(width * height)
+    )
+    return base, white_to_play, table
+
+
+def canonical_key(board: Board, to_play: str) -> tuple[int, list[int]]:
+    """Return the normalized key of a position and the symmetries reaching it.
+
+    Every symmetry in the returned list maps the position onto the same
+    canonical orientation; there is more than one only for symmetric
+    positions.
+    """
+    base, white_to_play, table = _zobrist(board.width, board.height)
+    permutations = symmetries(board.width, board.height)
+    if normalize_color(to_play) == "W":
+        base ^= white_to_play
+    keys = [base] * len(permutations)
+    cells = board.cells
+    for match in _STONE_PATTERN.finditer(cells):
+        index = match.start()
+        color = cells[index]
+        for symmetry, permutation in enumerate(permutations):
+            keys[symmetry] ^= table[permutation[index]][color]
+    key = min(keys)
+    return key, [symmetry for symmetry, value in enumerate(keys) if value == key]
+
+
+def _vertex(index: int, width: int, height: int) -> str:
+    if index == _PASS:
+        return "pass"
+    row, column = divmod(index, width)
+    return format_vertex(column, height - 1 - row)
+
+
+@dataclass(frozen=True, slots=True)
+class BookMove:
+    """A candidate move of a book position.
+
+    ``weight`` counts how often the move was played and ``value`` is the mean
+    result for the player to move, from 0 (loss) to 1 (win), when known.
+    """
+
+    vertex: str
+    weight: int
+    value: float | None
+
+
+class OpeningBook:
+    """Read-only view of a book file, mapped into memory.
+
+    Parameters
+    ----------
+    path:
+        Book written by :class:`OpeningBookBuilder`.
+    max_moves:
+        Only positions before this move number are looked up; defaults to the
+        depth the book was built with.
+    temperature:
+        Randomness of :meth:`choose`; 0 always picks the best move, 1 samples
+        in proportion to the weights.
+    weighting:
+        Rank moves by how often they were played (``count``) or by their
+        results (``value``).
+    min_weight:
+        Moves played fewer times are ignored.
+    seed:
+        Seed of the random choices, for reproducible games.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_moves: int | None = None,
+        temperature: float = 1.0,
+        weighting: Weighting = "count",
+        min_weight: int = 1,
+        seed: int | None = None,
+    ):
+        if temperature < 0:
+            raise ValueError("temperature must not be negative")
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, positions, moves, depth = _HEADER.unpack_from(self._map)
+        except struct.error as exc:
+            self._map.close()
+            raise ValueError(f"{path} is not an opening book") from exc
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not an opening book of version {FORMAT_VERSION}")
+        keys_offset = _HEADER.size
+        index_offset = keys_offset + 8 * positions
+        self._moves_offset = index_offset + 8 * positions
+        if len(self._map) < self._moves_offset + _MOVE.size * moves:
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+
+        view = memoryview(self._map)
+        self._keys: Sequence[int]
+        self._index: Sequence[int]
+        if sys.byteorder == "little":
+            self._keys = view[keys_offset:index_offset].cast("Q")
+            self._index = view[index_offset : self._moves_offset].cast("I")
+        else:  # pragma: no cover - big-endian hosts
+            self._keys = _Unpacked(view, keys_offset, "<Q", positions)
+            self._index = _Unpacked(view, index_offset, "<I", 2 * positions)
+        self._view = view
+        self.positions = positions
+        self.moves = moves
+        self.max_moves = depth if max_moves is None else max_moves
+        self.temperature = temperature
+        self.weighting = weighting
+        self.min_weight = min_weight
+        self._random = random.Random(seed)
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return self.positions
+
+    def close(self) -> None:
+        """Unmap the book file."""
+        for view in (self._keys, self._index, self._view):
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
+
+    def __enter__(self) -> OpeningBook:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def lookup(self, board: Board, to_play: str) -> list[BookMove]:
+        """Return the book moves of a position, most played first."""
+        self.lookups += 1
+        key, reaching = canonical_key(board, to_play)
+        position = bisect.bisect_left(self._keys, key)
+        if position == self.positions or self._keys[position] != key:
+            return []
+        first, count = self._index[2 * position], self._index[2 * position + 1]
+        inverse = _inverses(board.width, board.height)[reaching[0]]
+        result: list[BookMove] = []
+        for offset in range(first, first + count):
+            point, _, weight, value = _MOVE.unpack_from(
+                self._map, self._moves_offset + _MOVE.size * offset
+            )
+            if point != _PASS:
+                point = inverse[point]
+                if board.cells[point] != EMPTY:
+                    continue
+            result.append(
+                BookMove(
+                    _vertex(point, board.width, board.height),
+                    weight,
+                    None if math.isnan(value) else value,
+                )
+            )
+        if result:
+            self.hits += 1
+        return result
+
+    def choose(self, board: Board, to_play: str) -> str | None:
+        """Pick a book move for the position, or ``None`` if it is not covered."""
+        candidates = [
+            move for move in self.lookup(board, to_play) if move.weight >= self.min_weight
+        ]
+        if not candidates:
+            return None
+        if self.weighting == "value":
+            scores = [0.5 if move.value is None else move.value for move in candidates]
+        else:
+            scores = [float(move.weight) for move in candidates]
+        if self.temperature == 0:
+            return candidates[max(range(len(scores)), key=scores.__getitem__)].vertex
+        top = max(scores)
+        if top <= 0:
+            return self._random.choice(candidates).vertex
+        weights = [(score / top) ** (1.0 / self.temperature) for score in scores]
+        return self._random.choices(candidates, weights)[0].vertex
+
+
+class _Unpacked(Sequence[int]):
+    """Little-endian integers of a buffer, for hosts where ``cast`` differs."""
+
+    def __init__(self, buffer: memoryview, offset: int, fmt: str, length: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._format = struct.Struct(fmt)
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._format.unpack_from(
+            self._buffer, self._offset + self._format.size * index
+        )[0]
+
+
+@dataclass(slots=True)
+class _Candidate:
+    weight: int = 0
+    value_sum: float = 0.0
+    values: int = 0
+
+
+@dataclass(slots=True)
+class SgfGame:
+    """Main line of an SGF game."""
+
+    board_size: tuple[int, int] = (19, 19)
+    komi: float | None = None
+    winner: str | None = None
+    setup: list[tuple[str, str]] = field(default_factory=list)
+    moves: list[tuple[str, str]] = field(default_factory=list)
+
+
+def _skip_value(text: str, index: int) -> int:
+    """Return the index after the ``[...]`` value starting at ``index``."""
+    index += 1
+    while index < len(text) and text[index] != "]":
+        index += 2 if text[index] == "\\" else 1
+    return index + 1
+
+
+def _sgf_nodes(text: str) -> list[dict[str, list[str]]]:
+    """Return the properties of the nodes on the first line of play."""
+    index = text.find("(")
+    if index < 0:
+        raise ValueError("No SGF game tree found")
+    nodes: list[dict[str, list[str]]] = []
+    name = ""
+    while index < len(text):
+        char = text[index]
+        if char == "[":
+            end = _skip_value(text, index)
+            if nodes and name:
+                nodes[-1].setdefault(name, []).append(text[index + 1 : end - 1])
+            index = end
+            continue
+        if char == ")":
+            # The first variation closes where the main line ends.
+            break
+        if char == ";":
+            nodes.append({})
+            name = ""
+        elif "A" <= char <= "Z":
+            name = name + char if text[index - 1].isupper() else char
+        index += 1
+    return nodes
+
+
+def _sgf_vertex(value: str, board_size: tuple[int, int]) -> str:
+    width, height = board_size
+    if not value or (value == "tt" and width <= 19 and height <= 19):
+        return "pass"
+    column = ord(value[0]) - ord("a")
+    row = ord(value[1]) - ord("a")
+    if not (0 <= column < width and 0 <= row < height):
+        raise ValueError(f"Invalid SGF point: {value!r}")
+    return format_vertex(column, height - 1 - row)
+
+
+def parse_sgf(text: str) -> SgfGame:
+    """Parse the board size, result, setup stones and main line of an SGF game.
+
+    Raises
+    ------
+    ValueError
+        If the text is not a readable SGF game.
+    """
+    nodes = _sgf_nodes(text)
+    if not nodes:
+        raise ValueError("SGF game has no nodes")
+    game = SgfGame()
+    root = nodes[0]
+    if "SZ" in root:
+        width, _, height = root["SZ"][0].partition(":")
+        game.board_size = (int(width), int(height or width))
+    if "KM" in root:
+        game.komi = float(root["KM"][0])
+    result = root.get("RE", [""])[0].strip().upper()
+    if result[:2] in ("B+", "W+"):
+        game.winner = result[0]
+    for node in nodes:
+        for color in ("B", "W"):
+            for value in node.get("A" + color, []):
+                game.setup.append((color, _sgf_vertex(value, game.board_size)))
+            for value in node.get(color, []):
+                game.moves.append((color, _sgf_vertex(value, game.board_size)))
+    return game
+
+
+class OpeningBookBuilder:
+    """Collect opening moves and write them as a book file.
+
+    Positions reached by different move orders or by symmetric openings are
+    merged. Only the first ``max_moves`` moves of each game are kept.
+    """
+
+    def __init__(self, max_moves: int = 20):
+        self.max_moves = max_moves
+        self._positions: defaultdict[int, defaultdict[int, _Candidate]] = defaultdict(
+            lambda: defaultdict(_Candidate)
+        )
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(
+        self,
+        board: Board,
+        to_play: str,
+        vertex: str,
+        *,
+        weight: int = 1,
+        value: float | None = None,
+    ) -> None:
+        """Record ``vertex`` as played by ``to_play`` in the given position."""
+        key, reaching = canonical_key(board, to_play)
+        point = board.index(vertex)
+        if point is None:
+            canonical = _PASS
+        else:
+            permutations = symmetries(board.width, board.height)
+            # Equivalent moves of a symmetric position share one entry.
+            canonical = min(permutations[symmetry][point] for symmetry in reaching)
+        candidate = self._positions[key][canonical]
+        candidate.weight += weight
+        if value is not None:
+            candidate.value_sum += value * weight
+            candidate.values += weight
+
+    def add_game(
+        self,
+        board_size: tuple[int, int],
+        moves: Iterable[tuple[str, str]],
+        *,
+        winner: str | None = None,
+        setup: Iterable[tuple[str, str]] = (),
+    ) -> int:
+        """Record the opening of a game and return the number of moves added."""
+        board = Board(*board_size)
+        for color, vertex in setup:
+            board.play(color, vertex)
+        added = 0
+        for color, vertex in moves:
+            if added >= self.max_moves:
+                break
+            value = None if winner is None else float(color == winner)
+            self.add(board, color, vertex, value=value)
+            board.play(color, vertex)
+            added += 1
+        return added
+
+    def add_sgf(self, text: str) -> int:
+        """Record the opening of an SGF game and return the moves added."""
+        game = parse_sgf(text)
+        return self.add_game(
+            game.board_size, game.moves, winner=game.winner, setup=game.setup
+        )
+
+    async def add_engine_games(
+        self,
+        transport,
+        games: int,
+        *,
+        board_size: tuple[int, int] = (19, 19),
+        komi: float | None = None,
+    ) -> int:
+        """Let the engine play ``games`` openings against itself.
+
+        Engines with randomized move selection explore different lines in
+        each game. Returns the number of moves added.
+
+        Raises
+        ------
+        RuntimeError
+            If the engine rejects a command.
+        """
+
+        async def ask(command: str) -> str:
+            structured = parse_response(await transport.send_command(command))
+            if not structured.success:
+                raise RuntimeError(structured.error or f"{command} failed")
+            return structured.payload
+
+        width, height = board_size
+        setup = [f"boardsize {width}" if width == height else f"boardsize {width} {height}"]
+        if komi is not None:
+            setup.append(f"komi {komi}")
+        added = 0
+        for _ in range(games):
+            for command in setup:
+                await ask(command)
+            await ask("clear_board")
+            board = Board(width, height)
+            color = "B"
+            for _ in range(self.max_moves):
+                vertex = (await ask(f"genmove {color}")).strip().upper()
+                if vertex == "RESIGN":
+                    break
+                self.add(board, color, vertex)
+                board.play(color, vertex)
+                added += 1
+                color = "W" if color == "B" else "B"
+        return added
+
+    def write(self, path: str) -> int:
+        """Write the book to ``path`` and return the number of positions."""
+        keys = sorted(self._positions)
+        index: list[int] = []
+        moves = bytearray()
+        count = 0
+        for key in keys:
+            candidates = sorted(
+                self._positions[key].items(), key=lambda item: (-item[1].weight, item[0])
+            )
+            index += (count, len(candidates))
+            for point, candidate in candidates:
+                value = (
+                    candidate.value_sum / candidate.values if candidate.values else math.nan
+                )
+                moves += _MOVE.pack(point, 0, min(candidate.weight, 0xFFFFFFFF), value)
+            count += len(candidates)
+        with open(path, "wb") as handle:
+            handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(keys), count, self.max_moves))
+            handle.write(struct.pack(f"<{len(keys)}Q", *keys))
+            handle.write(struct.pack(f"<{len(index)}I", *index))
+            handle.write(moves)
+        return len(keys)
+
+
+__all__ = [
+    "BookMove",
+    "OpeningBook",
+    "OpeningBookBuilder",
+    "SgfGame",
+    "canonical_key",
+    "parse_sgf",
+    "symmetries",
+]
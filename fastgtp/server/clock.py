@@ -0,0 +1,195 @@
+"""Server-side game clocks for absolute, byo-yomi and Canadian time controls.
+
+The clock of the side to move runs from the end of the previous move, so the
+time a human spends thinking between requests is charged as it would be on a
+real board. Before each ``genmove`` the engine is told its remaining time with
+``time_left`` and the response is bounded by :meth:`GameClock.budget`.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Literal
+
+ClockKind = Literal["absolute", "byoyomi", "canadian"]
+
+
+@dataclass(frozen=True, slots=True)
+class TimeControl:
+    """Time control of a game.
+
+    ``periods`` applies to byo-yomi and ``stones`` to Canadian overtime; each
+    period lasts ``period_time`` seconds.
+    """
+
+    kind: ClockKind
+    main_time: float
+    period_time: float = 0.0
+    periods: int = 0
+    stones: int = 0
+
+    def __post_init__(self) -> None:
+        if self.main_time < 0 or self.period_time < 0:
+            raise ValueError("times cannot be negative")
+        if self.kind == "byoyomi" and (self.periods < 1 or self.period_time <= 0):
+            raise ValueError("byo-yomi needs at least one period of positive length")
+        if self.kind == "canadian" and (self.stones < 1 or self.period_time <= 0):
+            raise ValueError("Canadian overtime needs stones and a positive period")
+
+    def settings_command(self, kgs: bool = False) -> str:
+        """Return the command announcing this control to an engine.
+
+        ``kgs-time_settings`` describes every kind exactly. Plain
+        ``time_settings`` has no periods, so byo-yomi is approximated by a
+        single-stone Canadian period.
+        """
+        main = f"{self.main_time:g}"
+        period = f"{self.period_time:g}"
+        if kgs:
+            if self.kind == "absolute":
+                return f"kgs-time_settings absolute {main}"
+            if self.kind == "byoyomi":
+                return f"kgs-time_settings byoyomi {main} {period} {self.periods}"
+            return f"kgs-time_settings canadian {main} {period} {self.stones}"
+        if self.kind == "absolute":
+            return f"time_settings {main} 0 0"
+        if self.kind == "byoyomi":
+            return f"time_settings {main} {period} 1"
+        return f"time_settings {main} {period} {self.stones}"
+
+
+@dataclass(slots=True)
+class PlayerClock:
+    """Time left for one player."""
+
+    main_time: float
+    period_time: float
+    periods: int
+    stones: int
+    flagged: bool = False
+
+    @property
+    def in_overtime(self) -> bool:
+        return self.main_time <= 0
+
+
+@dataclass(slots=True)
+class GameClock:
+    """Clocks of both players under one :class:`TimeControl`.
+
+    ``settings_command`` is the command that announced the control to the
+    engine, replayed whenever the engine has to be set up again.
+    """
+
+    control: TimeControl
+    settings_command: str
+    running: str | None = "B"
+    started: float = 0.0
+    players: dict[str, PlayerClock] = field(default_factory=dict)
+    now: Callable[[], float] = time.monotonic
+
+    def __post_init__(self) -> None:
+        if not self.players:
+            self.reset()
+
+    def reset(self) -> None:
+        """Restore full time for both players with black to move."""
+        control = self.control
+        self.players = {
+            color: PlayerClock(
+                control.main_time, control.period_time, control.periods, control.stones
+            )
+            for color in ("B", "W")
+        }
+        self.running = "B"
+        self.started = self.now()
+
+    def elapsed(self, color: str) -> float:
+        """Seconds spent on the current move if ``color``'s clock is running."""
+        return max(0.0, self.now() - self.started) if self.running == color else 0.0
+
+    def press(self, color: str) -> bool:
+        """End ``color``'s move and start the opponent's clock.
+
+        Returns ``False`` if the move overstepped the time left.
+        """
+        player = self.players[color]
+        self._charge(player, self.elapsed(color))
+        self.running = "W" if color == "B" else "B"
+        self.started = self.now()
+        return not player.flagged
+
+    def flag(self, color: str) -> None:
+        """Mark ``color`` as having lost on time."""
+        self.players[color].flagged = True
+
+    def _charge(self, player: PlayerClock, elapsed: float) -> None:
+        control = self.control
+        overflow = elapsed - max(player.main_time, 0.0)
+        player.main_time = max(0.0, player.main_time - elapsed)
+        if overflow <= 0:
+            return
+        if control.kind == "absolute":
+            player.flagged = True
+        elif control.kind == "byoyomi":
+            # Each full period used up is lost; a move inside one keeps it.
+            while overflow > control.period_time and player.periods > 0:
+                overflow -= control.period_time
+                player.periods -= 1
+            if player.periods == 0:
+                player.flagged = True
+        else:
+            player.period_time -= overflow
+            player.stones -= 1
+            if player.period_time < 0:
+                player.flagged = True
+            elif player.stones == 0:
+                player.period_time = control.period_time
+                player.stones = control.stones
+
+    def time_left(self, color: str) -> tuple[float, int]:
+        """Return the ``time_left`` arguments for ``color``: seconds and stones.
+
+        In main time the stone count is 0. In byo-yomi the seconds are those
+        left in the current period and the count is the periods left, as KGS
+        reports them, counting periods this move already used up. An engine
+        set up with plain ``time_settings`` plays byo-yomi as one-stone
+        Canadian periods, so it is sent a count of 1 instead.
+        """
+        player = self.players[color]
+        elapsed = self.elapsed(color)
+        if player.main_time > elapsed or self.control.kind == "absolute":
+            return max(0.0, player.main_time - elapsed), 0
+        overflow = elapsed - player.main_time
+        if self.control.kind == "byoyomi":
+            period_time = self.control.period_time
+            periods = player.periods
+            # Mirrors :meth:`_charge`: a move inside a period keeps it.
+            while overflow > period_time and periods > 0:
+                overflow -= period_time
+                periods -= 1
+            if periods == 0:
+                return 0.0, 0
+            if not self.settings_command.startswith("kgs-"):
+                periods = min(periods, 1)
+            return max(0.0, period_time - overflow), periods
+        return max(0.0, player.period_time - overflow), player.stones
+
+    def time_left_command(self, color: str) -> str:
+        seconds, stones = self.time_left(color)
+        return f"time_left {color} {int(seconds)} {stones}"
+
+    def budget(self, color: str) -> float:
+        """Seconds ``color`` may still spend on the current move."""
+        player = self.players[color]
+        if self.control.kind == "absolute":
+            total = player.main_time
+        elif self.control.kind == "byoyomi":
+            total = player.main_time + self.control.period_time * player.periods
+        else:
+            total = player.main_time + player.period_time
+        return max(0.0, total - self.elapsed(color))
+
+
+__all__ = ["ClockKind", "GameClock", "PlayerClock", "TimeControl"]
@@ -0,0 +1,139 @@
+"""Per-session event bus fanning state changes out to spectators.
+
+Every recorded state change is encoded once and appended to the buffer of
+each subscriber. A subscriber first receives a snapshot of the game built
+from server-side state, then the deltas that follow it, so watching a game
+never sends a command to its engine. A subscriber whose buffer fills up is
+dropped with a final ``dropped`` event and may rejoin for a fresh snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+DEFAULT_BUFFER = 256
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """An event encoded once for every subscriber and transport."""
+
+    type: str
+    version: int
+    data: str
+
+    @classmethod
+    def create(cls, type: str, version: int, **fields: Any) -> Event:
+        payload = {"type": type, "version": version, **fields}
+        return cls(type, version, json.dumps(payload, separators=(",", ":")))
+
+    def sse(self) -> bytes:
+        """Return the event as a server-sent events frame."""
+        return f"id: {self.version}\nevent: {self.type}\ndata: {self.data}\n\n".encode()
+
+
+class Subscription:
+    """Bounded buffer of events for one subscriber, iterated asynchronously."""
+
+    def __init__(self, bus: SessionEvents, max_buffer: int):
+        self._bus = bus
+        self._buffer: deque[Event] = deque()
+        self._max_buffer = max_buffer
+        self._wakeup = asyncio.Event()
+        self.closed = False
+        self.dropped = False
+
+    def _push(self, event: Event) -> bool:
+        """Queue ``event``; return ``False`` if the subscriber was dropped."""
+        if self.closed:
+            return False
+        if len(self._buffer) >= self._max_buffer:
+            # A slow consumer would have to skip events anyway; make it resync.
+            self._buffer.clear()
+            self._buffer.append(Event.create("dropped", event.version))
+            self.dropped = True
+            self.closed = True
+            self._wakeup.set()
+            return False
+        self._buffer.append(event)
+        self._wakeup.set()
+        return True
+
+    def _end(self, event: Event | None = None) -> None:
+        if event is not None and not self.closed:
+            self._buffer.append(event)
+        self.closed = True
+        self._wakeup.set()
+
+    async def next(self, timeout: float | None = None) -> Event | None:
+        """Return the next event, or ``None`` at the end or after ``timeout``."""
+        while not self._buffer:
+            if self.closed:
+                return None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._buffer.popleft()
+
+    @property
+    def finished(self) -> bool:
+        return self.closed and not self._buffer
+
+    def __aiter__(self) -> AsyncIterator[Event]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Event]:
+        while (event := await self.next()) is not None:
+            yield event
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self._bus.unsubscribe(self)
+        self._end()
+
+
+class SessionEvents:
+    """Subscribers of one session and the events published to them."""
+
+    def __init__(self) -> None:
+        self._subscribers: set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, snapshot: Event, max_buffer: int = DEFAULT_BUFFER) -> Subscription:
+        """Add a subscriber whose first event is ``snapshot``."""
+        if max_buffer < 1:
+            raise ValueError("max_buffer must be at least 1")
+        subscription = Subscription(self, max_buffer)
+        subscription._push(snapshot)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, event: Event) -> None:
+        """Fan ``event`` out to every subscriber, dropping the slow ones."""
+        self.published += 1
+        for subscription in list(self._subscribers):
+            if not subscription._push(event):
+                self._subscribers.discard(subscription)
+                self.dropped += 1
+
+    def close(self, event: Event | None = None) -> None:
+        """End every subscription, optionally after a final ``event``."""
+        for subscription in self._subscribers:
+            subscription._end(event)
+        self._subscribers.clear()
+
+
+__all__ = ["DEFAULT_BUFFER", "Event", "SessionEvents", "Subscription"]
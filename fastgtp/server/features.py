@@ -0,0 +1,121 @@
+"""Encode board positions as packed ``uint8`` feature planes.
+
+Planes are written straight into one preallocated buffer in ``(C, H, W)``
+order, or ``(N, C, H, W)`` for batches, and served either raw or behind a
+NumPy ``.npy`` header, so consumers can ``np.load`` or ``np.frombuffer`` the
+response without any parsing and the server needs no NumPy at all.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator, Literal, Sequence
+
+from .board import BLACK, EMPTY, WHITE, Board
+
+ArrayFormat = Literal["npy", "raw"]
+
+FEATURES = ("black", "white", "empty", "liberties", "to_play")
+
+_TABLES = {
+    "black": bytes(1 if value == BLACK else 0 for value in range(256)),
+    "white": bytes(1 if value == WHITE else 0 for value in range(256)),
+    "empty": bytes(1 if value == EMPTY else 0 for value in range(256)),
+}
+
+
+def npy_header(shape: Sequence[int], descr: str = "|u1") -> bytes:
+    """Return a version 1.0 ``.npy`` header for a C-ordered array.
+
+    ``descr`` is the NumPy type string, ``|u1`` for ``uint8`` by default.
+    """
+    dims = ", ".join(str(dim) for dim in shape)
+    if len(shape) == 1:
+        dims += ","
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({dims}), }}"
+    # Magic (6) + version (2) + length (2) + header + newline, padded to 64.
+    padding = -(10 + len(header) + 1) % 64
+    header += " " * padding + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode()
+
+
+class PlaneEncoder:
+    """Write a fixed selection of feature planes for positions of one size.
+
+    Parameters
+    ----------
+    features:
+        Plane names from :data:`FEATURES`, in output order.
+    last_n:
+        Number of extra planes marking the last ``n`` moves, most recent first.
+    """
+
+    def __init__(self, features: Sequence[str], last_n: int = 0):
+        unknown = [name for name in features if name not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown feature planes: {', '.join(unknown)}")
+        if last_n < 0:
+            raise ValueError("last_n cannot be negative")
+        self.features = tuple(features)
+        self.last_n = last_n
+
+    @property
+    def names(self) -> list[str]:
+        return [*self.features, *(f"last_{i}" for i in range(1, self.last_n + 1))]
+
+    def encode(
+        self,
+        board: Board,
+        recent: Sequence[int | None],
+        to_play: str,
+        out: memoryview,
+    ) -> None:
+        """Write all planes of one position into ``out``.
+
+        ``recent`` holds the cell indices of the latest moves, most recent
+        first, with ``None`` for passes. ``out`` must be zero-filled and
+        exactly ``len(names) * width * height`` bytes long.
+        """
+
+        size = len(board.cells)
+        offset = 0
+        for name in self.features:
+            plane = out[offset : offset + size]
+            if name in _TABLES:
+                plane[:] = board.cells.translate(_TABLES[name])
+            elif name == "liberties":
+                plane[:] = bytes(min(count, 255) for count in board.liberties())
+            elif name == "to_play" and to_play == "B":
+                plane[:] = b"\x01" * size
+            offset += size
+        for index in recent[: self.last_n]:
+            if index is not None:
+                out[offset + index] = 1
+            offset += size
+
+
+def iter_positions(
+    board_size: tuple[int, int], moves: Sequence[tuple[str, str]], last_n: int = 0
+) -> Iterator[tuple[Board, list[int | None], str]]:
+    """Yield ``(board, recent, to_play)`` before and after every move.
+
+    The yielded board is updated in place; copy it to keep a position.
+    """
+
+    board = Board(*board_size)
+    recent: list[int | None] = []
+    yield board, recent, "B"
+    for color, vertex in moves:
+        board.play(color, vertex)
+        if last_n:
+            recent.insert(0, board.index(vertex))
+            del recent[last_n:]
+        yield board, recent, "W" if color.upper().startswith("B") else "B"
+
+
+__all__ = [
+    "ArrayFormat",
+    "FEATURES",
+    "PlaneEncoder",
+    "iter_positions",
+    "npy_header",
+]
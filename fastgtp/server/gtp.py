@@ -10,7 +10,38 @@ from dataclasses import dataclass
 import re
 from typing import Iterable, Sequence, TypedDict
 
-_COMMAND_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+_COMMAND_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_-]*$")
+_VERTEX_PATTERN = re.compile(r"^([A-HJ-Za-hj-z])(\d+)$")
+
+# GTP board columns skip the letter I.
+COLUMNS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
+
+# Commands known to leave the engine's position untouched. Anything else is
+# conservatively treated as state changing, including unknown raw commands.
+READ_ONLY_COMMANDS = frozenset(
+    {
+        "protocol_version",
+        "name",
+        "version",
+        "known_command",
+        "list_commands",
+        "get_komi",
+        "printsgf",
+        "showboard",
+        "final_score",
+        "final_status_list",
+        "estimate_score",
+        "reg_genmove",
+        "time_settings",
+        "time_left",
+        "kgs-time_settings",
+        "kata-get-rules",
+        "kata-get-param",
+        "kata-analyze",
+        "kata-raw-nn",
+        "lz-analyze",
+    }
+)
 
 
 class GTPResponsePayload(TypedDict):
@@ -65,6 +96,86 @@ def _is_command_name(token: str) -> bool:
     return bool(_COMMAND_NAME_PATTERN.fullmatch(token))
 
 
+def parse_vertex(vertex: str) -> tuple[int, int] | None:
+    """Convert a vertex such as ``D4`` to zero-based ``(column, row)``.
+
+    Rows count upwards from the bottom edge as in GTP. Returns ``None`` for
+    ``pass``.
+
+    Raises
+    ------
+    ValueError
+        If the vertex is malformed.
+    """
+
+    if vertex.lower() == "pass":
+        return None
+    match = _VERTEX_PATTERN.fullmatch(vertex.strip())
+    if match is None:
+        raise ValueError(f"Invalid vertex: {vertex!r}")
+    column = COLUMNS.index(match.group(1).upper())
+    row = int(match.group(2)) - 1
+    if row < 0:
+        raise ValueError(f"Invalid vertex: {vertex!r}")
+    return column, row
+
+
+def format_vertex(column: int, row: int) -> str:
+    """Convert a zero-based ``(column, row)`` to a vertex such as ``D4``."""
+    return f"{COLUMNS[column]}{row + 1}"
+
+
+def normalize_color(color: str) -> str:
+    """Convert ``b``/``black``/``w``/``white`` to ``B`` or ``W``."""
+    lowered = color.lower()
+    if lowered in ("b", "black"):
+        return "B"
+    if lowered in ("w", "white"):
+        return "W"
+    raise ValueError(f"Invalid color: {color!r}")
+
+
+def parse_raw_nn_plane(
+    payload: str, name: str, board_size: tuple[int, int]
+) -> list[float] | None:
+    """Extract one board-shaped block, such as ``policy``, from ``kata-raw-nn``.
+
+    The block starts with a line holding just ``name`` followed by one line of
+    values per board row from the top edge down. Values are returned in that
+    row-major order; ``NAN`` entries are kept as ``float("nan")``. Returns
+    ``None`` when the block is missing or truncated.
+    """
+
+    width, height = board_size
+    lines = payload.splitlines()
+    try:
+        start = next(i for i, line in enumerate(lines) if line.strip() == name)
+    except StopIteration:
+        return None
+
+    values: list[float] = []
+    for line in lines[start + 1 : start + 1 + height]:
+        row = line.split()
+        if len(row) < width:
+            return None
+        try:
+            values.extend(float(value) for value in row[:width])
+        except ValueError:
+            return None
+    if len(values) != width * height:
+        return None
+    return values
+
+
+def is_state_changing(command: str) -> bool:
+    """Return whether a command line may change the engine's position."""
+    try:
+        parsed = parse_command_line(command)
+    except ValueError:
+        return False
+    return parsed.name not in READ_ONLY_COMMANDS
+
+
 def parse_command_line(line: str) -> ParsedCommand:
     """Parse a raw GTP command line into its structured components.
 
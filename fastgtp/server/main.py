@@ -7,23 +7,293 @@ Usage example:
 Set the `FASTGTP_ENGINE` environment variable to the engine command (string or
 JSON array).
 
+Admission limits are optional and read from the environment as well:
+
+- `FASTGTP_MAX_ENGINES`: maximum number of live engine processes.
+- `FASTGTP_SPAWN_TIMEOUT`: seconds to wait for a free engine slot (default 0).
+- `FASTGTP_MAX_QUEUE_DEPTH`: maximum commands queued on one session.
+- `FASTGTP_QUEUE_TIMEOUT`: seconds a command may wait for its session's engine.
+- `FASTGTP_RETRY_AFTER`: `Retry-After` hint, in seconds, for rejected requests.
+
+Set `FASTGTP_PIPELINED=1` to keep several commands per session in flight.
+`FASTGTP_WARM_ENGINES` keeps that many idle engines ready for new or forked
+sessions.
+
+`FASTGTP_SPECULATION_SPARES` enables speculative pondering on that many spare
+engines, precomputing `FASTGTP_SPECULATION_TOP_K` (default 3) replies.
+
+Resource monitoring is enabled by setting `FASTGTP_MONITOR_INTERVAL` (seconds).
+`FASTGTP_MAX_ENGINE_RSS` and `FASTGTP_MEMORY_WATERMARK` (bytes) then bound the
+memory of a single engine and of all engines together.
+
+Setting `FASTGTP_CPUS_PER_ENGINE` pins every engine to that many CPUs, kept
+within one NUMA node when `FASTGTP_NUMA=1`. `FASTGTP_THREAD_ARGS` is appended
+to the engine command with `{threads}` replaced by the CPU count, e.g.
+`-override-config numSearchThreads={threads}` for KataGo.
+
+`FASTGTP_SCHEDULER_CAPACITY` limits how many commands run on engines at once
+and schedules the rest by priority class (interactive, analysis, batch) and
+fair share per client. `FASTGTP_SCHEDULER_AGING` (seconds, default 5) bounds
+how long lower classes can be starved, and `FASTGTP_CLIENT_WEIGHTS` gives
+clients unequal shares, e.g. `team-a=2,crawler=0.5`. Beyond
+`FASTGTP_SCHEDULER_MAX_QUEUED` waiting commands per class, requests get 429.
+
+`FASTGTP_RECORD` logs all engine traffic to that file (gzip-compressed for
+`.gz` names). `FASTGTP_REPLAY` serves a recording instead of running
+`FASTGTP_ENGINE`, reproducing the recorded latencies when
+`FASTGTP_REPLAY_REALTIME=1`.
+
+`FASTGTP_BOOK` names an opening book built with `fastgtp book` that answers
+`genmove` in covered positions. `FASTGTP_BOOK_TEMPERATURE` (default 1, 0 for
+always the most played move), `FASTGTP_BOOK_WEIGHTING` (`count` or `value`),
+`FASTGTP_BOOK_MIN_WEIGHT` and `FASTGTP_BOOK_MAX_MOVES` tune how it is used.
+
+At startup `FASTGTP_STARTUP_ENGINES` engines (default: the warm pool size, at
+least 1; 0 disables the warm-up) are spawned in parallel and must answer
+`protocol_version` and list every command in `FASTGTP_REQUIRED_COMMANDS`
+(comma-separated) within `FASTGTP_STARTUP_TIMEOUT` seconds. `/healthz` answers
+as soon as the server runs; `/readyz` only once the warm-up has succeeded.
+
+`FASTGTP_METERING=1` charges the wall-clock and CPU time of engine commands
+to sessions and tenants (API key, client id or address) and serves it under
+`/usage`. `FASTGTP_DEFAULT_QUOTA` and `FASTGTP_TENANT_QUOTAS` (e.g.
+`team-a=600,key:0123456789abcdef=60`) limit tenants to that many engine
+seconds per `FASTGTP_QUOTA_WINDOW` (default 3600) seconds, counted by
+`FASTGTP_QUOTA_METRIC` (`wall` or `cpu`). Tenants over budget are rejected
+with 429, or moved to the batch class with `FASTGTP_QUOTA_ACTION=deprioritize`.
+
+`FASTGTP_ENGINE_PROFILES` is a JSON object naming alternative engine commands,
+e.g. `{"b28": "katago gtp -model b28.bin.gz"}`. With `FASTGTP_ADMIN_TOKEN` set,
+`POST /engine` swaps to a profile without a restart: new sessions use it at
+once and live games are migrated in the background, `concurrency` at a time.
+
+`FASTGTP_EVALUATE_ENGINES` enables `POST /evaluate` on a pool of that many
+engines, shared by all callers and kept loaded with their last position.
+
+`FASTGTP_ARCHIVE` names a directory where the games of closed sessions are
+archived and indexed by position for `POST /archive/search`;
+`FASTGTP_ARCHIVE_INDEX_MOVES` indexes only that many opening moves per game.
+
 The module exposes a module-level `app` object so tooling such as
 `fastapi dev fastgtp/server/main.py` or `uvicorn fastgtp.server.main:app` can pick it up.
 """
 
 from __future__ import annotations
 
+import json
 import os
+import shlex
+
+from . import (
+    CommandScheduler,
+    EngineMeter,
+    EnginePool,
+    GameArchive,
+    OpeningBook,
+    GTPTransportManager,
+    GTPTransport,
+    PlacementScheduler,
+    RecordingGTPTransport,
+    ReplayGTPTransport,
+    ResourceMonitor,
+    Speculator,
+    Startup,
+    SubprocessGTPTransport,
+    create_app,
+)
+
+
+def _env_int(name: str) -> int | None:
+    value = os.environ.get(name)
+    return int(value) if value else None
 
-from . import GTPTransportManager, SubprocessGTPTransport, create_app
+
+def _env_float(name: str) -> float | None:
+    value = os.environ.get(name)
+    return float(value) if value else None
 
 
 command = os.environ.get("FASTGTP_ENGINE")
-if command is None:
+replay = os.environ.get("FASTGTP_REPLAY")
+if command is None and not replay:
     raise RuntimeError(
         "FASTGTP_ENGINE environment variable is required to launch the server."
     )
 
-manager = GTPTransportManager(SubprocessGTPTransport(command))
+retry_after = _env_float("FASTGTP_RETRY_AFTER") or 1.0
+
+cpus_per_engine = _env_int("FASTGTP_CPUS_PER_ENGINE")
+placement = (
+    PlacementScheduler(
+        cpus_per_engine,
+        numa=os.environ.get("FASTGTP_NUMA") == "1",
+        thread_args=shlex.split(os.environ.get("FASTGTP_THREAD_ARGS", "")),
+    )
+    if cpus_per_engine
+    else None
+)
+
+
+def _engine(command: str | list[str]) -> SubprocessGTPTransport:
+    return SubprocessGTPTransport(
+        command,
+        max_queue_depth=_env_int("FASTGTP_MAX_QUEUE_DEPTH"),
+        queue_timeout=_env_float("FASTGTP_QUEUE_TIMEOUT"),
+        retry_after=retry_after,
+        pipelined=os.environ.get("FASTGTP_PIPELINED") == "1",
+    )
+
+
+transport: GTPTransport
+if replay:
+    transport = ReplayGTPTransport(
+        replay, realtime=os.environ.get("FASTGTP_REPLAY_REALTIME") == "1"
+    )
+else:
+    assert command is not None
+    transport = _engine(command)
+
+engine_profiles: dict[str, GTPTransport] = {
+    name: _engine(profile_command)
+    for name, profile_command in json.loads(
+        os.environ.get("FASTGTP_ENGINE_PROFILES") or "{}"
+    ).items()
+}
+
+record = os.environ.get("FASTGTP_RECORD")
+if record:
+    transport = RecordingGTPTransport(transport, record)
+    engine_profiles = {
+        name: transport.wrap(profile) for name, profile in engine_profiles.items()
+    }
+
+manager = GTPTransportManager(
+    transport,
+    max_engines=_env_int("FASTGTP_MAX_ENGINES"),
+    spawn_timeout=_env_float("FASTGTP_SPAWN_TIMEOUT") or 0.0,
+    retry_after=retry_after,
+    placement=placement,
+    warm_engines=_env_int("FASTGTP_WARM_ENGINES") or 0,
+)
+
+startup_engines = _env_int("FASTGTP_STARTUP_ENGINES")
+if startup_engines is None:
+    startup_engines = max(_env_int("FASTGTP_WARM_ENGINES") or 0, 1)
+startup = (
+    Startup(
+        manager,
+        startup_engines,
+        required_commands=[
+            name.strip()
+            for name in os.environ.get("FASTGTP_REQUIRED_COMMANDS", "").split(",")
+            if name.strip()
+        ],
+        timeout=_env_float("FASTGTP_STARTUP_TIMEOUT"),
+    )
+    if startup_engines > 0
+    else None
+)
+
+monitor_interval = _env_float("FASTGTP_MONITOR_INTERVAL")
+monitor = (
+    ResourceMonitor(
+        manager,
+        interval=monitor_interval,
+        max_rss_bytes=_env_int("FASTGTP_MAX_ENGINE_RSS"),
+        memory_watermark=_env_int("FASTGTP_MEMORY_WATERMARK"),
+    )
+    if monitor_interval
+    else None
+)
+
+speculation_spares = _env_int("FASTGTP_SPECULATION_SPARES")
+speculator = (
+    Speculator(
+        transport,
+        top_k=_env_int("FASTGTP_SPECULATION_TOP_K") or 3,
+        spares=speculation_spares,
+    )
+    if speculation_spares
+    else None
+)
+
+scheduler_capacity = _env_int("FASTGTP_SCHEDULER_CAPACITY")
+scheduler = (
+    CommandScheduler(
+        scheduler_capacity,
+        weights={
+            client: float(weight)
+            for client, _, weight in (
+                item.strip().partition("=")
+                for item in os.environ.get("FASTGTP_CLIENT_WEIGHTS", "").split(",")
+                if item.strip()
+            )
+        },
+        aging=_env_float("FASTGTP_SCHEDULER_AGING") or 5.0,
+        max_queued=_env_int("FASTGTP_SCHEDULER_MAX_QUEUED"),
+        retry_after=retry_after,
+    )
+    if scheduler_capacity
+    else None
+)
+
+book_path = os.environ.get("FASTGTP_BOOK")
+book_temperature = _env_float("FASTGTP_BOOK_TEMPERATURE")
+book = (
+    OpeningBook(
+        book_path,
+        max_moves=_env_int("FASTGTP_BOOK_MAX_MOVES"),
+        temperature=1.0 if book_temperature is None else book_temperature,
+        weighting=os.environ.get("FASTGTP_BOOK_WEIGHTING", "count"),  # type: ignore[arg-type]
+        min_weight=_env_int("FASTGTP_BOOK_MIN_WEIGHT") or 1,
+    )
+    if book_path
+    else None
+)
+
+evaluate_engines = _env_int("FASTGTP_EVALUATE_ENGINES")
+pool = EnginePool(transport, size=evaluate_engines) if evaluate_engines else None
+
+archive_path = os.environ.get("FASTGTP_ARCHIVE")
+archive = (
+    GameArchive(archive_path, index_moves=_env_int("FASTGTP_ARCHIVE_INDEX_MOVES"))
+    if archive_path
+    else None
+)
+
+tenant_quotas = {
+    tenant.strip(): float(quota)
+    for tenant, _, quota in (
+        item.strip().rpartition("=")
+        for item in os.environ.get("FASTGTP_TENANT_QUOTAS", "").split(",")
+        if item.strip()
+    )
+}
+default_quota = _env_float("FASTGTP_DEFAULT_QUOTA")
+meter = (
+    EngineMeter(
+        quotas=tenant_quotas,
+        default_quota=default_quota,
+        window=_env_float("FASTGTP_QUOTA_WINDOW") or 3600.0,
+        metric=os.environ.get("FASTGTP_QUOTA_METRIC", "wall"),  # type: ignore[arg-type]
+        action=os.environ.get("FASTGTP_QUOTA_ACTION", "reject"),  # type: ignore[arg-type]
+    )
+    if os.environ.get("FASTGTP_METERING") == "1"
+    or tenant_quotas
+    or default_quota is not None
+    else None
+)
 
-app = create_app(manager)
+app = create_app(
+    manager,
+    monitor=monitor,
+    speculator=speculator,
+    scheduler=scheduler,
+    book=book,
+    startup=startup,
+    meter=meter,
+    pool=pool,
+    archive=archive,
+    engine_profiles=engine_profiles,
+    admin_token=os.environ.get("FASTGTP_ADMIN_TOKEN") or None,
+)
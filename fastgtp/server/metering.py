@@ -0,0 +1,275 @@
+"""Engine-time metering and per-tenant compute quotas.
+
+Every command sent for a request is timed on the wall clock from when the
+engine is free for it, and, when the engine's process is visible, charged the
+CPU time the process accumulated since its previous command (from
+``/proc/<pid>/stat``). Both are added to the
+session, to the tenant that sent the request and to per-command totals that
+can be exported for billing.
+
+Quotas limit each tenant's engine seconds over a rolling window. A tenant
+over budget is either rejected with :class:`QuotaExceededError` or has its
+commands demoted to the ``batch`` scheduling class.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Literal, Mapping
+
+from .monitor import read_cpu_seconds
+from .session import EngineUsage, GTPSession
+from .transport import AdmissionError
+
+QuotaMetric = Literal["wall", "cpu"]
+QuotaAction = Literal["reject", "deprioritize"]
+
+# Forget CPU baselines of this many engines at most; dead engines leave some.
+_MAX_CPU_MARKS = 4096
+
+
+class QuotaExceededError(AdmissionError):
+    """Raised when a tenant has used up its engine-time budget."""
+
+
+def tenant_id(
+    api_key: str | None, client_id: str | None, address: str | None
+) -> str:
+    """Return the identity engine time is charged to.
+
+    API keys take precedence and are reported as ``key:`` plus the first 16
+    hex digits of their SHA-256, so usage exports never contain secrets.
+    """
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return client_id or address or "anonymous"
+
+
+@dataclass(slots=True)
+class _Window:
+    """Sum of charges over a rolling window, kept in fixed time buckets."""
+
+    width: float
+    buckets: list[float]
+    starts: list[float]
+
+    @classmethod
+    def create(cls, window: float, buckets: int) -> _Window:
+        return cls(window / buckets, [0.0] * buckets, [-math.inf] * buckets)
+
+    def add(self, now: float, amount: float) -> None:
+        start = now - now % self.width
+        slot = int(start / self.width) % len(self.buckets)
+        if self.starts[slot] != start:
+            self.starts[slot] = start
+            self.buckets[slot] = 0.0
+        self.buckets[slot] += amount
+
+    def total(self, now: float) -> float:
+        horizon = now - self.width * len(self.buckets)
+        return sum(
+            amount
+            for amount, start in zip(self.buckets, self.starts)
+            if start > horizon
+        )
+
+
+@dataclass(slots=True)
+class _Tenant:
+    usage: EngineUsage = field(default_factory=EngineUsage)
+    commands: dict[str, EngineUsage] = field(default_factory=dict)
+    window: _Window | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class UsageRecord:
+    """Engine time of one tenant for one command, as exported for billing."""
+
+    tenant: str
+    command: str
+    commands: int
+    wall_seconds: float
+    cpu_seconds: float
+    max_wall_seconds: float
+
+
+class EngineMeter:
+    """Attribute engine time to sessions and tenants and enforce quotas.
+
+    Parameters
+    ----------
+    cpu:
+        Also charge process CPU time read from procfs.
+    quotas:
+        Engine seconds each tenant may use per ``window``.
+    default_quota:
+        Budget of tenants missing from ``quotas``; ``None`` means unlimited.
+    window:
+        Length of the rolling quota window in seconds.
+    metric:
+        Charge quotas by ``wall`` clock or by ``cpu`` time.
+    action:
+        ``reject`` refuses commands of tenants over budget, ``deprioritize``
+        moves them to the ``batch`` scheduling class.
+    """
+
+    def __init__(
+        self,
+        *,
+        cpu: bool = True,
+        quotas: Mapping[str, float] | None = None,
+        default_quota: float | None = None,
+        window: float = 3600.0,
+        metric: QuotaMetric = "wall",
+        action: QuotaAction = "reject",
+        buckets: int = 60,
+    ):
+        if window <= 0 or buckets < 1:
+            raise ValueError("window and buckets must be positive")
+        self._cpu = cpu
+        self._quotas = dict(quotas or {})
+        self._default_quota = default_quota
+        self._buckets = buckets
+        self.window = window
+        self.metric = metric
+        self.action = action
+        self._tenants: dict[str, _Tenant] = {}
+        self._cpu_marks: dict[int, float] = {}
+        self.rejected = 0
+        self.demoted = 0
+
+    def quota(self, tenant: str) -> float | None:
+        """Engine seconds ``tenant`` may use per window, if limited."""
+        return self._quotas.get(tenant, self._default_quota)
+
+    def used(self, tenant: str) -> float:
+        """Engine seconds charged to ``tenant`` within the current window."""
+        state = self._tenants.get(tenant)
+        if state is None or state.window is None:
+            return 0.0
+        return state.window.total(time.monotonic())
+
+    def admit(self, tenant: str) -> bool:
+        """Check ``tenant``'s budget before a command is sent.
+
+        Returns ``False`` when the tenant is over budget and should be
+        deprioritized.
+
+        Raises
+        ------
+        QuotaExceededError
+            If the tenant is over budget and the action is ``reject``.
+        """
+        quota = self.quota(tenant)
+        if quota is None or self.used(tenant) < quota:
+            return True
+        if self.action == "deprioritize":
+            self.demoted += 1
+            return False
+        self.rejected += 1
+        raise QuotaExceededError(
+            f"Engine time quota of {quota:g}s per {self.window:g}s exhausted",
+            retry_after=self.window / self._buckets,
+        )
+
+    def prime(self, pid: int | None) -> None:
+        """Take a CPU baseline for an engine not measured before."""
+        if self._cpu and pid is not None and pid not in self._cpu_marks:
+            cpu = read_cpu_seconds(pid)
+            if cpu is not None:
+                if len(self._cpu_marks) >= _MAX_CPU_MARKS:
+                    self._cpu_marks.clear()
+                self._cpu_marks[pid] = cpu
+
+    def record(
+        self,
+        session: GTPSession,
+        tenant: str,
+        command: str,
+        wall: float,
+        pid: int | None,
+        count: int = 1,
+    ) -> None:
+        """Charge ``wall`` seconds and the engine's new CPU time to ``tenant``.
+
+        ``pid`` should have been passed to :meth:`prime` before the command.
+        """
+        cpu = 0.0
+        if self._cpu and pid is not None:
+            now = read_cpu_seconds(pid)
+            if now is not None:
+                cpu = max(0.0, now - self._cpu_marks.get(pid, now))
+                self._cpu_marks[pid] = now
+
+        session.usage.add(count, wall, cpu)
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant()
+        state.usage.add(count, wall, cpu)
+        per_command = state.commands.get(command)
+        if per_command is None:
+            per_command = state.commands[command] = EngineUsage()
+        per_command.add(count, wall, cpu)
+        if self.quota(tenant) is not None:
+            if state.window is None:
+                state.window = _Window.create(self.window, self._buckets)
+            charge = cpu if self.metric == "cpu" else wall
+            state.window.add(time.monotonic(), charge)
+
+    def tenants(self) -> dict[str, EngineUsage]:
+        """Return the accumulated usage of every tenant."""
+        return {tenant: state.usage for tenant, state in self._tenants.items()}
+
+    def commands(self, tenant: str) -> dict[str, EngineUsage]:
+        """Return ``tenant``'s accumulated usage per command."""
+        state = self._tenants.get(tenant)
+        return {} if state is None else dict(state.commands)
+
+    def export(self) -> list[UsageRecord]:
+        """Return per-tenant, per-command totals since the meter started."""
+        return [
+            UsageRecord(
+                tenant,
+                command,
+                usage.commands,
+                usage.wall_seconds,
+                usage.cpu_seconds,
+                usage.max_wall_seconds,
+            )
+            for tenant, state in self._tenants.items()
+            for command, usage in state.commands.items()
+        ]
+
+    def export_csv(self) -> str:
+        """Return :meth:`export` as CSV with a header row."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(UsageRecord.__dataclass_fields__)
+        for record in self.export():
+            writer.writerow(
+                (
+                    record.tenant,
+                    record.command,
+                    record.commands,
+                    f"{record.wall_seconds:.6f}",
+                    f"{record.cpu_seconds:.6f}",
+                    f"{record.max_wall_seconds:.6f}",
+                )
+            )
+        return buffer.getvalue()
+
+
+__all__ = [
+    "EngineMeter",
+    "EngineUsage",
+    "QuotaAction",
+    "QuotaExceededError",
+    "QuotaMetric",
+    "UsageRecord",
+    "tenant_id",
+]
@@ -0,0 +1,253 @@
+"""Resource monitoring and memory-pressure eviction for engine processes.
+
+Statistics are sampled from ``/proc/<pid>`` so no extra dependencies are
+required. On platforms without procfs the monitor simply records nothing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Literal
+
+from .transport import GTPTransportManager
+
+EvictionAction = Literal["evict", "restart"]
+EvictionOrder = Literal["rss", "lru"]
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass(slots=True)
+class ProcessStats:
+    """Point-in-time resource usage of a single engine process."""
+
+    pid: int
+    rss_bytes: int
+    cpu_seconds: float
+    cpu_percent: float
+    sampled_at: float
+
+
+def read_process_stats(pid: int, *, proc_root: str = "/proc") -> ProcessStats | None:
+    """Read RSS and accumulated CPU time for ``pid`` from procfs.
+
+    Returns ``None`` when the process no longer exists or procfs is missing.
+    ``cpu_percent`` is left at zero; it is derived from consecutive samples.
+    """
+
+    try:
+        with open(f"{proc_root}/{pid}/stat", "rb") as fh:
+            stat = fh.read().decode("ascii", errors="replace")
+        with open(f"{proc_root}/{pid}/statm", "rb") as fh:
+            statm = fh.read().decode("ascii", errors="replace")
+    except OSError:
+        return None
+
+    # The command name is wrapped in parentheses and may contain spaces, so
+    # split after the closing parenthesis. utime/stime are fields 14 and 15.
+    fields = stat.rpartition(")")[2].split()
+    try:
+        utime = int(fields[11])
+        stime = int(fields[12])
+        resident_pages = int(statm.split()[1])
+    except (IndexError, ValueError):
+        return None
+
+    return ProcessStats(
+        pid=pid,
+        rss_bytes=resident_pages * _PAGE_SIZE,
+        cpu_seconds=(utime + stime) / _CLOCK_TICKS,
+        cpu_percent=0.0,
+        sampled_at=time.monotonic(),
+    )
+
+
+def read_cpu_seconds(pid: int, *, proc_root: str = "/proc") -> float | None:
+    """Read the accumulated CPU time of ``pid``, or ``None`` if unavailable.
+
+    A lighter :func:`read_process_stats` for callers sampling per command.
+    """
+
+    try:
+        with open(f"{proc_root}/{pid}/stat", "rb") as fh:
+            stat = fh.read()
+    except OSError:
+        return None
+    fields = stat.rpartition(b")")[2].split()
+    try:
+        return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    except (IndexError, ValueError):
+        return None
+
+
+class ResourceMonitor:
+    """Periodically sample engine processes and shed load under memory pressure.
+
+    Parameters
+    ----------
+    manager:
+        The transport manager whose sessions are monitored. Transports expose
+        their process id through a ``pid`` attribute.
+    interval:
+        Seconds between samples.
+    max_rss_bytes:
+        Per-engine resident memory limit. Engines above it get ``action``.
+    max_cpu_percent:
+        Per-engine CPU limit, averaged over one sampling interval.
+    memory_watermark:
+        Global resident memory limit across all engines. When exceeded,
+        sessions are evicted in ``eviction_order`` until usage drops below it.
+    action:
+        ``"evict"`` closes offending sessions, ``"restart"`` respawns their
+        engine in place. Watermark pressure always evicts, since a restarted
+        engine would soon grow back.
+    eviction_order:
+        ``"rss"`` evicts the largest engines first, ``"lru"`` the least
+        recently used sessions first.
+    """
+
+    def __init__(
+        self,
+        manager: GTPTransportManager,
+        *,
+        interval: float = 5.0,
+        max_rss_bytes: int | None = None,
+        max_cpu_percent: float | None = None,
+        memory_watermark: int | None = None,
+        action: EvictionAction = "evict",
+        eviction_order: EvictionOrder = "lru",
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self._manager = manager
+        self._interval = interval
+        self._max_rss_bytes = max_rss_bytes
+        self._max_cpu_percent = max_cpu_percent
+        self._memory_watermark = memory_watermark
+        self._action = action
+        self._eviction_order = eviction_order
+        self._stats: dict[str, ProcessStats] = {}
+        self._evictions = 0
+        self._restarts = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the background sampling loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background sampling loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception:  # pragma: no cover - keep sampling on errors
+                pass
+            await asyncio.sleep(self._interval)
+
+    def session_stats(self, session_id: str) -> ProcessStats | None:
+        """Return the latest sample for a session, if any."""
+        return self._stats.get(session_id)
+
+    def all_stats(self) -> dict[str, ProcessStats]:
+        """Return the latest sample for every monitored session."""
+        return dict(self._stats)
+
+    def aggregate(self) -> dict[str, float | int]:
+        """Return totals across all monitored engines."""
+        stats = self._stats.values()
+        return {
+            "engines": len(self._stats),
+            "rss_bytes": sum(item.rss_bytes for item in stats),
+            "cpu_seconds": sum(item.cpu_seconds for item in stats),
+            "cpu_percent": sum(item.cpu_percent for item in stats),
+            "evictions": self._evictions,
+            "restarts": self._restarts,
+        }
+
+    async def sample(self) -> None:
+        """Take one sample of every engine and enforce the configured limits."""
+        fresh: dict[str, ProcessStats] = {}
+        for session_id, transport in self._manager.sessions():
+            pid = getattr(transport, "pid", None)
+            if pid is None:
+                continue
+            stats = read_process_stats(pid)
+            if stats is None:
+                continue
+            previous = self._stats.get(session_id)
+            if previous is not None and previous.pid == pid:
+                elapsed = stats.sampled_at - previous.sampled_at
+                if elapsed > 0:
+                    used = stats.cpu_seconds - previous.cpu_seconds
+                    stats.cpu_percent = max(0.0, used / elapsed * 100.0)
+            fresh[session_id] = stats
+        self._stats = fresh
+        await self._enforce()
+
+    def _over_limit(self, stats: ProcessStats) -> bool:
+        if self._max_rss_bytes is not None and stats.rss_bytes > self._max_rss_bytes:
+            return True
+        if (
+            self._max_cpu_percent is not None
+            and stats.cpu_percent > self._max_cpu_percent
+        ):
+            return True
+        return False
+
+    async def _enforce(self) -> None:
+        for session_id, stats in list(self._stats.items()):
+            if not self._over_limit(stats):
+                continue
+            if self._action == "restart":
+                if await self._manager.restart_session(session_id):
+                    self._restarts += 1
+                self._stats.pop(session_id, None)
+            else:
+                await self._evict(session_id)
+
+        if self._memory_watermark is None:
+            return
+        total = sum(item.rss_bytes for item in self._stats.values())
+        for session_id in self._eviction_candidates():
+            if total <= self._memory_watermark:
+                break
+            total -= self._stats[session_id].rss_bytes
+            await self._evict(session_id)
+
+    def _eviction_candidates(self) -> list[str]:
+        if self._eviction_order == "rss":
+            return sorted(
+                self._stats, key=lambda sid: self._stats[sid].rss_bytes, reverse=True
+            )
+        return sorted(
+            self._stats, key=lambda sid: self._manager.last_used(sid) or 0.0
+        )
+
+    async def _evict(self, session_id: str) -> None:
+        if await self._manager.close_session(session_id):
+            self._evictions += 1
+        self._stats.pop(session_id, None)
+
+
+__all__ = [
+    "EvictionAction",
+    "EvictionOrder",
+    "ProcessStats",
+    "ResourceMonitor",
+    "read_cpu_seconds",
+    "read_process_stats",
+]
@@ -0,0 +1,143 @@
+"""CPU placement of engine processes.
+
+The scheduler hands each spawned engine a dedicated set of CPUs, balancing by
+the number of engines already pinned to every CPU and optionally keeping each
+engine inside a single NUMA node. Engines that start their own thread pools
+can be told how many threads to use through a command line override.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import re
+from typing import Hashable, Iterable, Sequence
+
+_NODE_PATTERN = re.compile(r"node(\d+)$")
+
+
+def parse_cpu_list(text: str) -> frozenset[int]:
+    """Parse a kernel CPU list such as ``"0-3,8,10-11"``."""
+    cpus: set[int] = set()
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        start, sep, end = part.partition("-")
+        if sep:
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(start))
+    return frozenset(cpus)
+
+
+def read_numa_nodes(sys_root: str = "/sys/devices/system/node") -> dict[int, frozenset[int]]:
+    """Return the CPUs of every NUMA node, or an empty mapping if unknown."""
+    nodes: dict[int, frozenset[int]] = {}
+    for path in glob.glob(os.path.join(sys_root, "node*")):
+        match = _NODE_PATTERN.search(path)
+        if match is None:
+            continue
+        try:
+            with open(os.path.join(path, "cpulist"), encoding="ascii") as fh:
+                nodes[int(match.group(1))] = parse_cpu_list(fh.read())
+        except (OSError, ValueError):
+            continue
+    return nodes
+
+
+def _available_cpus() -> frozenset[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return frozenset(os.sched_getaffinity(0))
+    return frozenset(range(os.cpu_count() or 1))
+
+
+class PlacementScheduler:
+    """Assign CPU sets to engine processes.
+
+    Parameters
+    ----------
+    cpus_per_engine:
+        Number of CPUs each engine is pinned to.
+    cpus:
+        CPUs available for engines. Defaults to the affinity of this process.
+    numa:
+        Keep every engine within one NUMA node when the topology is known.
+    thread_args:
+        Arguments appended to the engine command, formatted with
+        ``threads`` set to the size of the assigned CPU set. For KataGo use
+        ``("-override-config", "numSearchThreads={threads}")``.
+    """
+
+    def __init__(
+        self,
+        cpus_per_engine: int = 1,
+        *,
+        cpus: Iterable[int] | None = None,
+        numa: bool = False,
+        thread_args: Sequence[str] = (),
+    ):
+        available = frozenset(cpus) if cpus is not None else _available_cpus()
+        if cpus_per_engine < 1:
+            raise ValueError("cpus_per_engine must be at least 1")
+        if cpus_per_engine > len(available):
+            raise ValueError("cpus_per_engine exceeds the number of available CPUs")
+
+        self._cpus_per_engine = cpus_per_engine
+        self._load: dict[int, int] = {cpu: 0 for cpu in sorted(available)}
+        self._thread_args = tuple(thread_args)
+        self._assignments: dict[Hashable, frozenset[int]] = {}
+        self._nodes: list[frozenset[int]] = []
+        if numa:
+            for node_cpus in read_numa_nodes().values():
+                usable = node_cpus & available
+                if len(usable) >= cpus_per_engine:
+                    self._nodes.append(usable)
+
+    def load(self) -> dict[int, int]:
+        """Return the number of engines pinned to every CPU."""
+        return dict(self._load)
+
+    def assignment(self, key: Hashable) -> frozenset[int] | None:
+        """Return the CPU set assigned to ``key``, if any."""
+        return self._assignments.get(key)
+
+    def assign(self, key: Hashable) -> frozenset[int]:
+        """Reserve the least loaded CPUs for ``key`` and return them."""
+        existing = self._assignments.get(key)
+        if existing is not None:
+            return existing
+
+        candidates: Iterable[int] = self._load
+        if self._nodes:
+            candidates = min(
+                self._nodes,
+                key=lambda node: sum(self._load[cpu] for cpu in node) / len(node),
+            )
+        chosen = frozenset(
+            sorted(candidates, key=lambda cpu: (self._load[cpu], cpu))[
+                : self._cpus_per_engine
+            ]
+        )
+        for cpu in chosen:
+            self._load[cpu] += 1
+        self._assignments[key] = chosen
+        return chosen
+
+    def release(self, key: Hashable) -> None:
+        """Return the CPUs reserved for ``key`` to the pool."""
+        chosen = self._assignments.pop(key, None)
+        if chosen is None:
+            return
+        for cpu in chosen:
+            self._load[cpu] -= 1
+
+    def command_args(self, cpus: frozenset[int]) -> tuple[str, ...]:
+        """Return the thread override arguments for an engine on ``cpus``."""
+        return tuple(arg.format(threads=len(cpus)) for arg in self._thread_args)
+
+
+__all__ = [
+    "PlacementScheduler",
+    "parse_cpu_list",
+    "read_numa_nodes",
+]
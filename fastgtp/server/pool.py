@@ -0,0 +1,309 @@
+"""Pooled engines answering stateless position queries.
+
+Every pooled engine remembers the position it has loaded. A query is routed
+to the idle engine whose game shares the longest prefix with the requested
+one; that engine takes back the moves past the prefix with ``undo`` and plays
+the new ones, all sent as one burst. Engines without ``undo``, or positions
+that share too little, are replayed from an empty board instead. Only
+standard GTP commands are used, so any engine can back the pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from dataclasses import dataclass, field
+from typing import Literal, Sequence
+
+from .gtp import parse_response
+from .session import Move
+from .transport import GTPTransport, send_commands
+
+EvaluationKind = Literal["move", "score"]
+
+
+class PositionError(ValueError):
+    """Raised when the engine rejects a move of the requested game.
+
+    ``index`` is the position of the offending move in the move list.
+    """
+
+    def __init__(self, message: str, index: int):
+        super().__init__(message)
+        self.index = index
+
+
+class QueryError(RuntimeError):
+    """Raised when a pooled engine answers a command with a GTP failure.
+
+    The engine is still in step with the pool, so it keeps its position.
+    """
+
+
+@dataclass(slots=True)
+class PoolMetrics:
+    """Counters describing how much replaying the pool avoids."""
+
+    queries: int = 0
+    spawned: int = 0
+    reused_moves: int = 0
+    undone_moves: int = 0
+    played_moves: int = 0
+    resets: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class Evaluation:
+    """Answer to one query, with the work needed to load its position."""
+
+    move: str | None
+    score: str | None
+    reused_moves: int
+    sync_commands: int
+
+
+@dataclass(slots=True, eq=False)
+class _Engine:
+    transport: GTPTransport
+    undo: bool
+    reg_genmove: bool
+    generation: int
+    # ``None`` while the loaded position is unknown.
+    board_size: int | None = None
+    komi: float | None = None
+    moves: list[Move] = field(default_factory=list)
+
+    def common_prefix(self, moves: Sequence[Move], board_size: int) -> int:
+        if self.board_size != board_size:
+            return 0
+        prefix = 0
+        for loaded, wanted in zip(self.moves, moves):
+            if loaded != wanted:
+                break
+            prefix += 1
+        return prefix
+
+    def sync_cost(
+        self, moves: Sequence[Move], board_size: int
+    ) -> tuple[int, int | None]:
+        """Return the commands needed to load ``moves`` and the reused prefix.
+
+        The prefix is ``None`` when the board is cheaper to set up afresh.
+        """
+        reset = len(moves) + 3
+        prefix = self.common_prefix(moves, board_size)
+        undos = len(self.moves) - prefix
+        if self.board_size != board_size or (undos and not self.undo):
+            return reset, None
+        diff = undos + len(moves) - prefix
+        return (diff, prefix) if diff < reset else (reset, None)
+
+
+def _opponent(color: str) -> str:
+    return "W" if color == "B" else "B"
+
+
+async def _ask(transport: GTPTransport, command: str) -> str:
+    structured = parse_response(await transport.send_command(command))
+    if not structured.success:
+        raise QueryError(structured.error or f"{command} failed")
+    return structured.payload
+
+
+class EnginePool:
+    """Answer position queries on up to ``size`` engines copied from ``transport``.
+
+    Engines are spawned on demand and stay loaded with the last position
+    they evaluated until :meth:`aclose` or :meth:`swap_engine`.
+    """
+
+    def __init__(self, transport: GTPTransport, *, size: int = 2):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._prototype = transport
+        self._size = size
+        self._gate = asyncio.Semaphore(size)
+        self._idle: list[_Engine] = []
+        self._all: list[_Engine] = []
+        self._generation = 0
+        self.metrics = PoolMetrics()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def engines(self) -> int:
+        """Number of engines currently spawned."""
+        return len(self._all)
+
+    async def evaluate(
+        self,
+        moves: Sequence[Move],
+        *,
+        board_size: int = 19,
+        komi: float = 7.5,
+        color: str | None = None,
+        kind: EvaluationKind = "move",
+    ) -> Evaluation:
+        """Load the game ``moves`` on a pooled engine and query it.
+
+        ``kind`` ``move`` asks for the move of ``color`` (by default the
+        player after the last move), preferring ``reg_genmove`` so that the
+        position is left as it was. ``score`` asks for ``final_score``.
+
+        Raises
+        ------
+        PositionError
+            If the engine rejects one of the moves.
+        QueryError
+            If the engine fails to answer the query.
+        RuntimeError
+            If the engine cannot be reached; it is not used again.
+        """
+
+        moves = [(c.upper(), v.upper()) for c, v in moves]
+        if color is None:
+            color = _opponent(moves[-1][0]) if moves else "B"
+        self.metrics.queries += 1
+        async with self._gate:
+            engine = await self._checkout(moves, board_size)
+            try:
+                reused, commands = await self._sync(engine, moves, board_size, komi)
+                move: str | None = None
+                score: str | None = None
+                if kind == "score":
+                    score = await _ask(engine.transport, "final_score")
+                elif engine.reg_genmove:
+                    move = await _ask(engine.transport, f"reg_genmove {color}")
+                else:
+                    move = await _ask(engine.transport, f"genmove {color}")
+                    if move.upper() != "RESIGN":
+                        engine.moves.append((color, move.upper()))
+            except (PositionError, QueryError):
+                await self._release(engine)
+                raise
+            except BaseException:
+                # The engine may have crashed or be left mid-burst, and its
+                # loaded position is unknown; do not trust it again.
+                await self._discard(engine)
+                raise
+            await self._release(engine)
+        return Evaluation(move, score, reused, commands)
+
+    async def swap_engine(self, transport: GTPTransport) -> None:
+        """Answer queries on engines copied from ``transport`` from now on.
+
+        Idle engines are closed at once, busy ones when their query is done.
+        """
+        self._prototype = transport
+        self._generation += 1
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._discard(engine) for engine in idle))
+
+    async def aclose(self) -> None:
+        """Close every pooled engine."""
+        engines, self._all, self._idle = self._all, [], []
+        await asyncio.gather(
+            *(engine.transport.aclose() for engine in engines),
+            return_exceptions=True,
+        )
+
+    async def _release(self, engine: _Engine) -> None:
+        if engine.generation == self._generation:
+            self._idle.append(engine)
+        else:
+            await self._discard(engine)
+
+    async def _discard(self, engine: _Engine) -> None:
+        if engine in self._all:
+            self._all.remove(engine)
+        with contextlib.suppress(Exception):
+            await engine.transport.aclose()
+
+    async def _checkout(self, moves: Sequence[Move], board_size: int) -> _Engine:
+        """Take the idle engine that loads ``moves`` cheapest, or spawn one."""
+        if self._idle:
+            engine = min(
+                self._idle, key=lambda idle: idle.sync_cost(moves, board_size)[0]
+            )
+            self._idle.remove(engine)
+            return engine
+        generation = self._generation
+        transport = self._prototype.copy()
+        try:
+            await transport.open()
+            commands = set((await _ask(transport, "list_commands")).split())
+        except BaseException:
+            await transport.aclose()
+            raise
+        engine = _Engine(
+            transport, "undo" in commands, "reg_genmove" in commands, generation
+        )
+        self._all.append(engine)
+        self.metrics.spawned += 1
+        return engine
+
+    async def _sync(
+        self, engine: _Engine, moves: Sequence[Move], board_size: int, komi: float
+    ) -> tuple[int, int]:
+        """Load ``moves`` on ``engine``; return the reused moves and commands sent."""
+        _, diff_from = engine.sync_cost(moves, board_size)
+        reset = diff_from is None
+        prefix = diff_from or 0
+        undos = 0 if reset else len(engine.moves) - prefix
+        if reset:
+            setup = [f"boardsize {board_size}", "clear_board", f"komi {komi}"]
+        else:
+            setup = ["undo"] * undos
+            if engine.komi != komi:
+                setup.append(f"komi {komi}")
+        plays = [f"play {color} {vertex}" for color, vertex in moves[prefix:]]
+        responses = await send_commands(engine.transport, setup + plays)
+
+        if not all(parse_response(raw).success for raw in responses[: len(setup)]):
+            engine.board_size = None
+            if reset:
+                raise QueryError("Engine rejected the board setup")
+            if undos:
+                engine.undo = False
+            # Forget the diff and load the position from an empty board.
+            return await self._sync(engine, moves, board_size, komi)
+
+        if reset:
+            self.metrics.resets += 1
+            engine.moves.clear()
+        else:
+            del engine.moves[prefix:]
+        engine.board_size = board_size
+        engine.komi = komi
+        self.metrics.reused_moves += prefix
+        self.metrics.undone_moves += undos
+        self.metrics.played_moves += len(plays)
+
+        rejected: PositionError | None = None
+        for offset, raw in enumerate(responses[len(setup) :]):
+            structured = parse_response(raw)
+            if structured.success:
+                engine.moves.append(moves[prefix + offset])
+            elif rejected is None:
+                index = prefix + offset
+                color, vertex = moves[index]
+                rejected = PositionError(
+                    f"Illegal move {color} {vertex} at index {index}: "
+                    f"{structured.error or 'rejected'}",
+                    index,
+                )
+        if rejected is not None:
+            raise rejected
+        return prefix, len(setup) + len(plays)
+
+
+__all__ = [
+    "EnginePool",
+    "Evaluation",
+    "EvaluationKind",
+    "PoolMetrics",
+    "PositionError",
+    "QueryError",
+]
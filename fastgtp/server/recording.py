@@ -0,0 +1,328 @@
+"""Record engine traffic and replay it without the engine.
+
+A recording is a JSON-lines file, gzip-compressed when its name ends in
+``.gz``. After a header line, every command produces one entry::
+
+    {"s": 1, "at": 0.52, "t": 0.031, "c": "genmove B", "r": "= D4\\n\\n"}
+
+``s`` numbers the transport copy (one per engine, so one per session), ``at``
+is the offset from the start of the recording, ``t`` the engine latency, and
+``c``/``r`` the command and raw response with any GTP id removed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import IO, Any, Sequence
+
+from .gtp import parse_command_line
+from .transport import GTPTransport, _strip_identifier, _turn, send_commands
+
+FORMAT_VERSION = 1
+
+# Entries are written in batches of this many lines, or after this long.
+_BATCH_LINES = 256
+_BATCH_SECONDS = 1.0
+
+
+def _open(path: str | os.PathLike[str], mode: str) -> IO[str]:
+    if os.fspath(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+
+def _split_identifier(command: str) -> tuple[str | None, str]:
+    """Return the GTP id of ``command`` and the command without it."""
+    stripped = command.strip()
+    try:
+        identifier = parse_command_line(stripped).identifier
+    except ValueError:
+        return None, stripped
+    if identifier is None:
+        return None, stripped
+    return identifier, stripped[len(identifier) :].lstrip()
+
+
+def _add_identifier(raw: str, identifier: str) -> str:
+    """Tag the status line of a recorded response with ``identifier``."""
+    stripped = raw.lstrip()
+    if stripped[:1] not in ("=", "?"):
+        return raw
+    return stripped[0] + identifier + stripped[1:]
+
+
+class _RecordingLog:
+    """File shared by all copies of a recording transport.
+
+    Entries are buffered and written in batches by a single worker thread,
+    so the event loop never waits for the disk or for compression.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]):
+        self.path = path
+        self._file: IO[str] | None = None
+        self._streams = itertools.count()
+        self._started = time.monotonic()
+        self._lines: list[str] = []
+        self._writer: ThreadPoolExecutor | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    def next_stream(self) -> int:
+        return next(self._streams)
+
+    def write(self, stream: int, command: str, raw: str, latency: float) -> None:
+        entry = {
+            "s": stream,
+            "at": round(time.monotonic() - self._started, 6),
+            "t": round(latency, 6),
+            "c": command,
+            "r": raw,
+        }
+        self._lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+        if len(self._lines) >= _BATCH_LINES:
+            self.flush()
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+            else:
+                self._timer = loop.call_later(_BATCH_SECONDS, self.flush)
+
+    def flush(self) -> None:
+        """Hand the buffered entries to the writer thread."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._lines:
+            return
+        lines, self._lines = self._lines, []
+        if self._writer is None:
+            # One worker keeps the batches in order.
+            self._writer = ThreadPoolExecutor(1, thread_name_prefix="fastgtp-record")
+        self._writer.submit(self._write_lines, lines)
+
+    def _write_lines(self, lines: list[str]) -> None:
+        if self._file is None:
+            self._file = _open(self.path, "w")
+            self._file.write(json.dumps({"fastgtp_recording": FORMAT_VERSION}) + "\n")
+        self._file.writelines(lines)
+
+    def close(self) -> None:
+        """Write the buffered entries and close the file, e.g. its gzip trailer."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RecordingGTPTransport(GTPTransport):
+    """Wrap a transport and log every command, response and latency.
+
+    Copies share the recording file and get their own stream number, so a
+    manager built on a recording prototype captures all of its sessions.
+    Other attributes, such as ``pid`` or ``place``, are forwarded to the
+    wrapped transport.
+    """
+
+    def __init__(
+        self,
+        transport: GTPTransport,
+        path: str | os.PathLike[str] | None = None,
+        *,
+        _log: _RecordingLog | None = None,
+    ):
+        if _log is None:
+            if path is None:
+                raise ValueError("a recording path is required")
+            _log = _RecordingLog(path)
+        self._transport = transport
+        self._log = _log
+        self._stream = _log.next_stream()
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "_transport":
+            raise AttributeError(name)
+        return getattr(self._transport, name)
+
+    @property
+    def stream(self) -> int:
+        """Stream number of this copy within the recording."""
+        return self._stream
+
+    async def open(self) -> None:
+        await self._transport.open()
+
+    async def send_command(self, command: str) -> str:
+        started = time.perf_counter()
+        raw = await self._transport.send_command(command)
+        self._record(command, raw, time.perf_counter() - started)
+        return raw
+
+    async def send_commands(self, commands: Sequence[str]) -> list[str]:
+        """Forward a batch and record it with the latency spread evenly."""
+        started = time.perf_counter()
+        responses = await send_commands(self._transport, commands)
+        latency = (time.perf_counter() - started) / max(1, len(commands))
+        for command, raw in zip(commands, responses):
+            self._record(command, raw, latency)
+        return responses
+
+    def _record(self, command: str, raw: str, latency: float) -> None:
+        identifier, command = _split_identifier(command)
+        if identifier is not None:
+            raw = _strip_identifier(raw, identifier)
+        self._log.write(self._stream, command, raw, latency)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def close_recording(self) -> None:
+        """Flush and close the recording file shared by all copies."""
+        self._log.close()
+
+    def copy(self) -> RecordingGTPTransport:
+        return RecordingGTPTransport(self._transport.copy(), _log=self._log)
+
+    def wrap(self, transport: GTPTransport) -> RecordingGTPTransport:
+        """Record ``transport`` into the same file, e.g. for a swapped engine."""
+        return RecordingGTPTransport(transport, _log=self._log)
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    command: str
+    raw: str
+    latency: float
+
+
+class _Recording:
+    """Recorded entries indexed by stream and by command."""
+
+    def __init__(self, path: str | os.PathLike[str]):
+        streams: dict[int, list[_Entry]] = {}
+        with _open(path, "r") as handle:
+            for line in handle:
+                record = json.loads(line)
+                if "c" not in record:
+                    continue
+                entry = _Entry(record["c"], record["r"], float(record.get("t", 0.0)))
+                streams.setdefault(int(record.get("s", 0)), []).append(entry)
+        if not streams:
+            raise ValueError(f"Recording {os.fspath(path)!r} holds no commands")
+
+        self.streams = [streams[stream] for stream in sorted(streams)]
+        self.by_command: dict[str, list[_Entry]] = {}
+        for entries in self.streams:
+            for entry in entries:
+                self.by_command.setdefault(entry.command, []).append(entry)
+        self._next_stream = itertools.cycle(range(len(self.streams)))
+        self._fallback: dict[str, int] = {}
+
+    def assign(self) -> list[_Entry]:
+        return self.streams[next(self._next_stream)]
+
+    def lookup(self, command: str) -> _Entry | None:
+        """Return a recorded answer to ``command``, cycling through them."""
+        entries = self.by_command.get(command)
+        if not entries:
+            return None
+        position = self._fallback.get(command, 0)
+        self._fallback[command] = position + 1
+        return entries[position % len(entries)]
+
+
+class ReplayGTPTransport(GTPTransport):
+    """Serve responses from a recording instead of running an engine.
+
+    Each copy replays one recorded stream, cycling through the streams as
+    copies are made, so sessions reproduce the recorded games command by
+    command. A command that departs from its stream is answered with another
+    recorded response to the same command, or with a GTP failure if it was
+    never recorded; ``strict=True`` raises ``LookupError`` instead.
+
+    With ``realtime=True`` every response is delayed by its recorded latency
+    divided by ``speed``, and commands on one transport run one at a time as
+    they would on a real engine.
+    """
+
+    reports_turns = True
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        realtime: bool = False,
+        speed: float = 1.0,
+        strict: bool = False,
+        _recording: _Recording | None = None,
+    ):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self._path = path
+        self._recording = _recording if _recording is not None else _Recording(path)
+        self._realtime = realtime
+        self._speed = speed
+        self._strict = strict
+        self._entries: list[_Entry] | None = None
+        self._position = 0
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        return None
+
+    def _next(self, command: str) -> _Entry | None:
+        if self._entries is None:
+            # Assign streams on first use so unused prototypes take none.
+            self._entries = self._recording.assign()
+        if self._position < len(self._entries):
+            entry = self._entries[self._position]
+            if entry.command == command:
+                self._position += 1
+                return entry
+        return self._recording.lookup(command)
+
+    async def send_command(self, command: str) -> str:
+        identifier, stripped = _split_identifier(command)
+        if not stripped:
+            raise ValueError("GTP command cannot be empty")
+        async with self._lock, _turn(1):
+            entry = self._next(stripped)
+            if entry is None:
+                if self._strict:
+                    raise LookupError(f"Command was not recorded: {stripped}")
+                raw = f"? command not recorded: {stripped}\n\n"
+            else:
+                raw = entry.raw
+                if self._realtime:
+                    await asyncio.sleep(entry.latency / self._speed)
+            if not self._realtime:
+                await asyncio.sleep(0)
+        if identifier is not None:
+            raw = _add_identifier(raw, identifier)
+        return raw
+
+    async def aclose(self) -> None:
+        self._position = 0
+
+    def copy(self) -> ReplayGTPTransport:
+        return ReplayGTPTransport(
+            self._path,
+            realtime=self._realtime,
+            speed=self._speed,
+            strict=self._strict,
+            _recording=self._recording,
+        )
+
+
+__all__ = ["RecordingGTPTransport", "ReplayGTPTransport"]
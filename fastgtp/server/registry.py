@@ -0,0 +1,67 @@
+"""Sharded session registry."""
+
+from __future__ import annotations
+
+import zlib
+from typing import Generic, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class SessionRegistry(Generic[T]):
+    """Map session ids to values across hashed shards.
+
+    No operation awaits, so the event loop already makes every lookup,
+    insertion and removal atomic and no lock is needed. Iteration works on
+    a snapshot of each shard, so it tolerates sessions opened or closed
+    meanwhile.
+    """
+
+    def __init__(self, shards: int = 16):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self._shards: tuple[dict[str, T], ...] = tuple({} for _ in range(shards))
+
+    def _index(self, session_id: str) -> int:
+        return zlib.crc32(session_id.encode("utf-8")) % len(self._shards)
+
+    def get(self, session_id: str) -> T | None:
+        """Return the value for ``session_id``, if present."""
+        return self._shards[self._index(session_id)].get(session_id)
+
+    def __contains__(self, session_id: object) -> bool:
+        return isinstance(session_id, str) and self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def __iter__(self) -> Iterator[str]:
+        for shard in self._shards:
+            yield from list(shard)
+
+    def items(self) -> list[tuple[str, T]]:
+        """Return a snapshot of all ``(session_id, value)`` pairs."""
+        return [item for shard in self._shards for item in list(shard.items())]
+
+    def insert(self, session_id: str, value: T) -> bool:
+        """Store ``value`` unless ``session_id`` is taken; return success."""
+        shard = self._shards[self._index(session_id)]
+        if session_id in shard:
+            return False
+        shard[session_id] = value
+        return True
+
+    def pop(self, session_id: str) -> T | None:
+        """Remove and return the value for ``session_id``, if present."""
+        return self._shards[self._index(session_id)].pop(session_id, None)
+
+    def drain(self) -> list[T]:
+        """Remove and return every value."""
+        drained: list[T] = []
+        for shard in self._shards:
+            drained.extend(shard.values())
+            shard.clear()
+        return drained
+
+
+__all__ = ["SessionRegistry"]
@@ -0,0 +1,47 @@
+"""Streamed JSON responses for long lists.
+
+Command lists and batch results of :data:`STREAM_THRESHOLD` or more items are
+sent in chunks instead of being rendered in one piece. Chunks are encoded by
+orjson when it is installed (``pip install fastgtp[fast]``) and by the
+standard library otherwise.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+# Lists at least this long are streamed rather than rendered at once.
+STREAM_THRESHOLD = 512
+
+_CHUNK_ITEMS = 128
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def _list_chunks(key: str, items: Sequence[Any]) -> AsyncIterator[bytes]:
+    yield b'{"' + key.encode() + b'":['
+    for start in range(0, len(items), _CHUNK_ITEMS):
+        chunk = dumps(items[start : start + _CHUNK_ITEMS])[1:-1]
+        yield chunk if start == 0 else b"," + chunk
+    yield b"]}"
+
+
+def list_response(key: str, items: Sequence[Any]) -> StreamingResponse:
+    """Stream ``{key: items}`` in chunks of JSON."""
+    return StreamingResponse(_list_chunks(key, items), media_type="application/json")
+
+
+__all__ = ["STREAM_THRESHOLD", "dumps", "list_response"]
@@ -2,40 +2,287 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hmac
+import math
 import os
 import re
+import sys
 import tempfile
+import time
+from array import array
 from contextlib import asynccontextmanager
-from typing import Any, Literal, Sequence
-
-from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from contextvars import ContextVar
+from typing import Any, Literal, Mapping, Sequence
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.requests import HTTPConnection
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 
-from .gtp import build_command, parse_response
-from .transport import GTPTransport, GTPTransportManager
+from .archive import GameArchive
+from .board import Board
+from .book import OpeningBook
+from .clock import ClockKind, GameClock, PlayerClock, TimeControl
+from .events import DEFAULT_BUFFER
+from .features import ArrayFormat, PlaneEncoder, iter_positions, npy_header
+from .gtp import build_command, is_state_changing, parse_response
+from .metering import EngineMeter, QuotaExceededError, tenant_id
+from .monitor import ProcessStats, ResourceMonitor, read_process_stats
+from .pool import EnginePool, EvaluationKind, PositionError
+from .scoring import (
+    ScoreResult,
+    ownership_from_board,
+    parse_ownership,
+    score_positions,
+)
+from .recording import RecordingGTPTransport
+from .responses import STREAM_THRESHOLD, list_response
+from .scheduler import PRIORITIES, CommandScheduler, Priority, command_priority
+from .session import EngineUsage, GTPSession
+from .speculation import Speculator
+from .startup import Startup, StartupStatus
+from .transport import (
+    AdmissionError,
+    CommandTurn,
+    EngineStartupError,
+    EngineSwap,
+    GTPTransport,
+    GTPTransportManager,
+    QueueFullError,
+    command_turn,
+    send_commands,
+)
 
 ColorType = Literal["B", "W"]
 
+# Extra seconds an engine may take beyond its clock before it is stopped.
+_DEADLINE_GRACE = 1.0
+
+# Idle seconds after which spectator streams send a keep-alive.
+_HEARTBEAT = 15.0
+
+# Largest per-subscriber event buffer a spectator may ask for.
+_MAX_EVENT_BUFFER = 4096
 
-async def get_transport_manager() -> GTPTransportManager:
-    """Dependency placeholder overridden by the application."""
-    raise HTTPException(
-        status_code=500,
-        detail="GTP transport manager dependency is not configured",
+
+def _admission_http_error(exc: AdmissionError) -> HTTPException:
+    """Translate an admission failure into a fast 429/503 with ``Retry-After``."""
+    status_code = 429 if isinstance(exc, (QueueFullError, QuotaExceededError)) else 503
+    retry_after = max(1, math.ceil(exc.retry_after))
+    return HTTPException(
+        status_code=status_code,
+        detail=str(exc),
+        headers={"Retry-After": str(retry_after)},
     )
 
 
-async def get_session_transport(
+def _component(connection: HTTPConnection, name: str) -> Any:
+    """Return the component ``create_app`` stored on the application, if any."""
+    return getattr(connection.app.state, f"fastgtp_{name}", None)
+
+
+async def get_transport_manager(connection: HTTPConnection) -> GTPTransportManager:
+    """Dependency placeholder resolved from the application or overridden."""
+    manager = _component(connection, "transport_manager")
+    if manager is None:
+        raise HTTPException(
+            status_code=500,
+            detail="GTP transport manager dependency is not configured",
+        )
+    return manager
+
+
+async def get_resource_monitor(connection: HTTPConnection) -> ResourceMonitor | None:
+    """Dependency placeholder for the optional resource monitor."""
+    return _component(connection, "monitor")
+
+
+async def get_speculator(connection: HTTPConnection) -> Speculator | None:
+    """Dependency placeholder for the optional speculative ponderer."""
+    return _component(connection, "speculator")
+
+
+async def get_opening_book(connection: HTTPConnection) -> OpeningBook | None:
+    """Dependency placeholder for the optional opening book."""
+    return _component(connection, "book")
+
+
+async def get_engine_pool(connection: HTTPConnection) -> EnginePool | None:
+    """Dependency placeholder for the optional evaluation engine pool."""
+    return _component(connection, "pool")
+
+
+async def get_archive(connection: HTTPConnection) -> GameArchive | None:
+    """Dependency placeholder for the optional finished-game archive."""
+    return _component(connection, "archive")
+
+
+async def get_startup(connection: HTTPConnection) -> Startup | None:
+    """Dependency placeholder for the optional startup warm-up."""
+    return _component(connection, "startup")
+
+
+async def get_scheduler(connection: HTTPConnection) -> CommandScheduler | None:
+    """Dependency placeholder for the optional command scheduler."""
+    return _component(connection, "scheduler")
+
+
+async def get_meter(connection: HTTPConnection) -> EngineMeter | None:
+    """Dependency placeholder for the optional engine-time meter."""
+    return _component(connection, "meter")
+
+
+async def get_engine_profiles(
+    connection: HTTPConnection,
+) -> Mapping[str, GTPTransport]:
+    """Dependency placeholder for the engines an administrator may swap to."""
+    return _component(connection, "engine_profiles") or {}
+
+
+async def require_admin(
+    connection: HTTPConnection,
+    x_admin_token: str | None = Header(default=None),
+) -> None:
+    """Admit only requests carrying the configured ``X-Admin-Token``.
+
+    Administration is disabled, and its endpoints answer 404, without a token.
+    """
+    token = _component(connection, "admin_token")
+    if token is None:
+        raise HTTPException(
+            status_code=404, detail="Engine administration is not enabled"
+        )
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), token.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+# Scheduler, client and priority ceiling of the request being handled.
+_scheduling: ContextVar[tuple[CommandScheduler, str, Priority] | None] = ContextVar(
+    "fastgtp_scheduling", default=None
+)
+
+# Meter and tenant charged for the engine time of the request being handled.
+_metering: ContextVar[tuple[EngineMeter, str] | None] = ContextVar(
+    "fastgtp_metering", default=None
+)
+
+
+async def schedule_request(
+    connection: HTTPConnection,
+    scheduler: CommandScheduler | None = Depends(get_scheduler),
+    meter: EngineMeter | None = Depends(get_meter),
+    x_api_key: str | None = Header(default=None),
+    x_client_id: str | None = Header(default=None),
+    x_priority: Priority = Header(default="interactive"),
+) -> None:
+    """Identify the client and priority used to schedule engine commands.
+
+    Clients are keyed by ``X-API-Key``, then ``X-Client-Id``, then address.
+    ``X-Priority`` can only lower a request's class, e.g. to ``batch``.
+    The same identity is charged for engine time when metering is enabled.
+    """
+    if scheduler is None and meter is None:
+        return
+    address = connection.client.host if connection.client is not None else None
+    if scheduler is not None:
+        client = x_api_key or x_client_id or address or "anonymous"
+        _scheduling.set((scheduler, client, x_priority))
+    if meter is not None:
+        _metering.set((meter, tenant_id(x_api_key, x_client_id, address)))
+
+
+async def get_session(
     session_id: str,
     transport_manager: GTPTransportManager = Depends(get_transport_manager),
-) -> GTPTransport:
-    """Resolve the transport bound to the requested session."""
+) -> GTPSession:
+    """Resolve the session state bound to the requested session id."""
     try:
-        return await transport_manager.get_transport(session_id)
+        return await transport_manager.get_session(session_id)
     except KeyError as exc:
         raise HTTPException(status_code=404, detail="Unknown session") from exc
 
 
+async def get_session_transport(
+    session: GTPSession = Depends(get_session),
+) -> GTPTransport:
+    """Resolve the transport bound to the requested session."""
+    return session.transport
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Return whether an ``If-None-Match`` header matches ``etag``."""
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _plane_encoder(features: Sequence[str], last_n: int) -> PlaneEncoder:
+    try:
+        return PlaneEncoder([name for name in features if name], last_n)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _session_board(session: GTPSession) -> Board:
+    try:
+        return session.board()
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+def _book_move(book: OpeningBook, session: GTPSession, color: str) -> str | None:
+    """Return the book move for ``color``, if the game is still in the book."""
+    if not session.history_known or len(session.moves) >= book.max_moves:
+        return None
+    try:
+        board = session.board()
+    except ValueError:
+        return None
+    return book.choose(board, color)
+
+
+def _array_response(
+    buffer: bytearray | array,
+    shape: tuple[int, ...],
+    names: Sequence[str],
+    array_format: ArrayFormat,
+    descr: str = "|u1",
+) -> StreamingResponse:
+    """Stream ``buffer`` without copying it, optionally behind an npy header."""
+    chunks: list[bytes | memoryview] = [memoryview(buffer).cast("B")]
+    if array_format == "npy":
+        chunks.insert(0, npy_header(shape, descr))
+
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type="application/octet-stream",
+        headers={
+            "Content-Length": str(sum(len(chunk) for chunk in chunks)),
+            "X-Array-Shape": ",".join(str(dim) for dim in shape),
+            "X-Feature-Planes": ",".join(names),
+        },
+    )
+
+
 class OpenSessionResponse(BaseModel):
     """Response payload for session creation."""
 
@@ -48,6 +295,129 @@ class QuitResponse(BaseModel):
     closed: bool
 
 
+class HealthResponse(BaseModel):
+    """Liveness of the server process."""
+
+    status: Literal["ok"] = "ok"
+
+
+class ReadinessResponse(BaseModel):
+    """Whether the server can serve new sessions without engine cold starts."""
+
+    ready: bool
+    startup: StartupStatus
+    warm_engines: int
+    detail: str | None = None
+
+
+class EngineSwapRequest(BaseModel):
+    """Request payload for swapping the engine to a configured profile."""
+
+    profile: str
+    required_commands: list[str] | None = None
+    concurrency: int = Field(default=4, ge=1, le=64)
+
+
+class EngineResponse(BaseModel):
+    """Engine generation and progress of the latest swap."""
+
+    generation: int
+    profile: str | None = None
+    profiles: list[str]
+    sessions: int = 0
+    migrated: int = 0
+    failed: int = 0
+    skipped: int = 0
+    done: bool = True
+    error: str | None = None
+
+    @classmethod
+    def from_swap(
+        cls, generation: int, swap: EngineSwap | None, profiles: Sequence[str]
+    ) -> EngineResponse:
+        if swap is None:
+            return cls(generation=generation, profiles=list(profiles))
+        return cls(
+            generation=generation,
+            profile=swap.label,
+            profiles=list(profiles),
+            sessions=swap.sessions,
+            migrated=swap.migrated,
+            failed=swap.failed,
+            skipped=swap.skipped,
+            done=swap.done,
+            error=swap.error,
+        )
+
+
+class MovesRequest(BaseModel):
+    """A position given by the moves played from the empty board."""
+
+    moves: list[tuple[ColorType, str]] = Field(
+        default_factory=list,
+        description="Moves from the empty board as [color, vertex] pairs.",
+        examples=[[["B", "Q16"], ["W", "D4"]]],
+    )
+    board_size: int = Field(default=19, ge=2, le=25)
+
+    @field_validator("moves")
+    @classmethod
+    def validate_moves(cls, value: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        for _, vertex in value:
+            if vertex.upper() != "PASS" and not re.fullmatch(r"[A-Za-z]\d+", vertex):
+                raise ValueError("vertex must be letter+digits (e.g. E12) or pass")
+        return [(color, vertex.upper()) for color, vertex in value]
+
+
+class EvaluateRequest(MovesRequest):
+    """Request payload for evaluating a position given by its moves."""
+
+    komi: float = 7.5
+    color: ColorType | None = Field(
+        default=None, description="Player to move; by default the next in turn."
+    )
+    evaluate: EvaluationKind = "move"
+
+
+class ArchiveSearchRequest(MovesRequest):
+    """Request payload for finding archived games reaching a position."""
+
+    limit: int = Field(default=100, ge=1, le=10000)
+
+
+class ArchiveHitResponse(BaseModel):
+    """An archived game and the move after which it reached the position."""
+
+    game_id: int
+    move_number: int
+
+
+class ArchiveSearchResponse(BaseModel):
+    """Archived games reaching a position, most recent first."""
+
+    count: int
+    games: list[ArchiveHitResponse]
+
+
+class ArchivedGameResponse(BaseModel):
+    """A finished game read from the archive."""
+
+    game_id: int
+    board_size: tuple[int, int]
+    komi: float | None
+    moves: list[tuple[str, str]]
+    finished_at: float
+
+
+class EvaluateResponse(BaseModel):
+    """Engine answer for an evaluated position."""
+
+    move: str | None = None
+    score: str | None = None
+    reused_moves: int
+    sync_commands: int
+
+
 class NameResponse(BaseModel):
     """Engine name reported by the GTP backend."""
 
@@ -139,6 +509,16 @@ class GenMoveRequest(BaseModel):
     """Request payload for generating a move."""
 
     color: ColorType
+    ponder: bool = Field(
+        default=False,
+        description="Precompute answers to the opponent's likely replies "
+        "(requires speculation to be enabled on the server).",
+    )
+    book: bool = Field(
+        default=True,
+        description="Answer from the server's opening book when the position "
+        "is covered, without searching.",
+    )
 
 
 class GenMoveResponse(BaseModel):
@@ -147,6 +527,56 @@ class GenMoveResponse(BaseModel):
     move: str
 
 
+class ClockRequest(BaseModel):
+    """Request payload for starting a game clock."""
+
+    kind: ClockKind
+    main_time: float = Field(..., ge=0)
+    period_time: float = Field(default=0.0, ge=0)
+    periods: int = Field(default=0, ge=0)
+    stones: int = Field(default=0, ge=0)
+
+
+class PlayerClockResponse(BaseModel):
+    """Time left for one player."""
+
+    main_time: float
+    period_time: float
+    periods: int
+    stones: int
+    flagged: bool
+
+    @classmethod
+    def from_clock(cls, player: PlayerClock) -> PlayerClockResponse:
+        return cls(
+            main_time=player.main_time,
+            period_time=player.period_time,
+            periods=player.periods,
+            stones=player.stones,
+            flagged=player.flagged,
+        )
+
+
+class ClockResponse(BaseModel):
+    """State of a session's game clock."""
+
+    kind: ClockKind
+    running: ColorType | None
+    elapsed: float
+    black: PlayerClockResponse
+    white: PlayerClockResponse
+
+    @classmethod
+    def from_clock(cls, clock: GameClock) -> ClockResponse:
+        return cls(
+            kind=clock.control.kind,
+            running=clock.running,  # type: ignore[arg-type]
+            elapsed=clock.elapsed(clock.running) if clock.running else 0.0,
+            black=PlayerClockResponse.from_clock(clock.players["B"]),
+            white=PlayerClockResponse.from_clock(clock.players["W"]),
+        )
+
+
 class SgfResponse(BaseModel):
     """Response payload for SGF exports."""
 
@@ -185,82 +615,716 @@ class CommandResponse(BaseModel):
     detail: str
 
 
+class BatchRequest(BaseModel):
+    """Commands to send to the engine as one burst."""
+
+    commands: list[str] = Field(..., min_length=1)
+
+
+class CommandResult(BaseModel):
+    """Outcome of one command of a batch."""
+
+    success: bool
+    payload: str = ""
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    """Results in the order of the submitted commands."""
+
+    results: list[CommandResult]
+
+
+class ProcessStatsResponse(BaseModel):
+    """Resource usage of a single engine process."""
+
+    pid: int
+    rss_bytes: int
+    cpu_seconds: float
+    cpu_percent: float
+
+    @classmethod
+    def from_stats(cls, stats: ProcessStats) -> ProcessStatsResponse:
+        return cls(
+            pid=stats.pid,
+            rss_bytes=stats.rss_bytes,
+            cpu_seconds=stats.cpu_seconds,
+            cpu_percent=stats.cpu_percent,
+        )
+
+
+class AggregateStatsResponse(BaseModel):
+    """Resource usage summed across all engine processes."""
+
+    engines: int
+    rss_bytes: int
+    cpu_seconds: float
+    cpu_percent: float
+    evictions: int
+    restarts: int
+    sessions: dict[str, ProcessStatsResponse]
+
+
+class SpeculationResponse(BaseModel):
+    """Effectiveness of speculative pondering."""
+
+    jobs: int
+    skipped: int
+    failed: int
+    predictions: int
+    hits: int
+    misses: int
+    hit_rate: float
+    compute_seconds: float
+    saved_seconds: float
+    wasted_seconds: float
+
+
+class BoardsRequest(BaseModel):
+    """Request payload for exporting the positions of several sessions."""
+
+    session_ids: list[str] = Field(..., min_length=1)
+    features: list[str] = Field(default_factory=lambda: ["black", "white"])
+    last_n: int = Field(default=0, ge=0)
+    format: ArrayFormat = "npy"
+
+
+class OwnershipResponse(BaseModel):
+    """Ownership of every point, +1 for black and -1 for white."""
+
+    width: int
+    height: int
+    source: str
+    ownership: list[float]
+
+
+class ScoreValue(BaseModel):
+    """Score of a position under one counting method."""
+
+    black: float
+    white: float
+    margin: float
+    result: str
+
+    @classmethod
+    def from_result(cls, score: ScoreResult) -> ScoreValue:
+        return cls(
+            black=score.black,
+            white=score.white,
+            margin=score.margin,
+            result=score.result,
+        )
+
+
+class ScoreResponse(BaseModel):
+    """Area and territory score of a position."""
+
+    source: str
+    area: ScoreValue
+    territory: ScoreValue
+
+
+class PositionRequest(BaseModel):
+    """A position to score, given by its moves and optional ownership."""
+
+    board_size: tuple[int, int] = (19, 19)
+    moves: list[tuple[ColorType, str]] = Field(default_factory=list)
+    komi: float = 0.0
+    dead: list[str] = Field(default_factory=list)
+    ownership: list[float] | None = None
+
+
+class ScoreBatchRequest(BaseModel):
+    """Request payload for scoring many positions at once."""
+
+    positions: list[PositionRequest] = Field(..., min_length=1)
+    threshold: float = Field(default=0.5, ge=0.0, le=1.0)
+
+
+class ScoreBatchResponse(BaseModel):
+    """Scores in the order of the requested positions."""
+
+    scores: list[ScoreResponse]
+
+
+def _score(
+    boards: Sequence[Board],
+    ownership: Sequence[Sequence[float]],
+    komi: Sequence[float],
+    threshold: float,
+) -> tuple[list[ScoreResult], list[ScoreResult]]:
+    """Score positions of one board size, or fail with 501 without NumPy."""
+    try:
+        import numpy as np
+    except ImportError as exc:  # pragma: no cover - depends on environment
+        raise HTTPException(
+            status_code=501, detail="Scoring requires NumPy to be installed"
+        ) from exc
+    size = len(boards[0].cells)
+    stones = np.frombuffer(b"".join(board.cells for board in boards), dtype=np.uint8)
+    return score_positions(
+        stones.reshape(len(boards), size),
+        np.asarray(ownership, dtype=np.float32).reshape(len(boards), size),
+        komi,
+        [board.captures for board in boards],
+        threshold=threshold,
+    )
+
+
+class SchedulerClassResponse(BaseModel):
+    """Queueing statistics of one priority class."""
+
+    queued: int
+    running: int
+    dispatched: int
+    promoted: int
+    mean_wait: float
+    max_wait: float
+    oldest_wait: float
+
+
+class SchedulerResponse(BaseModel):
+    """State of the command scheduler."""
+
+    capacity: int
+    classes: dict[str, SchedulerClassResponse]
+
+
+class EngineUsageResponse(BaseModel):
+    """Engine time charged to a session, tenant or command."""
+
+    commands: int
+    wall_seconds: float
+    cpu_seconds: float
+    max_wall_seconds: float
+
+    @classmethod
+    def from_usage(cls, usage: EngineUsage) -> EngineUsageResponse:
+        return cls(
+            commands=usage.commands,
+            wall_seconds=usage.wall_seconds,
+            cpu_seconds=usage.cpu_seconds,
+            max_wall_seconds=usage.max_wall_seconds,
+        )
+
+
+class TenantUsageResponse(EngineUsageResponse):
+    """Engine time of one tenant with its quota state."""
+
+    quota: float | None
+    window_used: float
+    by_command: dict[str, EngineUsageResponse]
+
+
+class UsageResponse(BaseModel):
+    """Engine time of every tenant since the meter started."""
+
+    window: float
+    metric: str
+    action: str
+    rejected: int
+    demoted: int
+    tenants: dict[str, TenantUsageResponse]
+
+
 class FastGtp(APIRouter):
-    """Router encapsulating REST endpoints backed by session-based GTP transports."""
+    """Router encapsulating REST endpoints backed by session-based GTP transports.
+
+    Long lists, such as the results of large batches, are streamed in chunks.
+    """
 
     def __init__(self, **router_kwargs: Any) -> None:
-        super().__init__(**router_kwargs)
+        dependencies = router_kwargs.pop("dependencies", [])
+        super().__init__(
+            dependencies=[Depends(schedule_request), *dependencies], **router_kwargs
+        )
 
         @self.post("/open_session", status_code=201)
         async def open_session(  # type: ignore[unused-coroutine]
             transport_manager: GTPTransportManager = Depends(get_transport_manager),
         ) -> OpenSessionResponse:
             """Create a new session backed by a dedicated transport."""
-            session_id = await transport_manager.open_session()
+            try:
+                session_id = await transport_manager.open_session()
+            except AdmissionError as exc:
+                raise _admission_http_error(exc) from exc
             return OpenSessionResponse(session_id=session_id)
 
+        @self.post("/{session_id}/fork", status_code=201)
+        async def fork_session(  # type: ignore[unused-coroutine]
+            session_id: str,
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
+        ) -> OpenSessionResponse:
+            """Create a child session starting from this session's position."""
+            try:
+                child_id = await transport_manager.fork_session(session_id)
+            except KeyError as exc:
+                raise HTTPException(status_code=404, detail="Unknown session") from exc
+            except ValueError as exc:
+                raise HTTPException(status_code=409, detail=str(exc)) from exc
+            except AdmissionError as exc:
+                raise _admission_http_error(exc) from exc
+            except RuntimeError as exc:
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            return OpenSessionResponse(session_id=child_id)
+
+        @self.get("/{session_id}/board", response_class=StreamingResponse)
+        async def get_board(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+            format: ArrayFormat = "npy",
+            features: str = "black,white",
+            last_n: int = Query(default=0, ge=0),
+        ) -> Response:
+            """Return the position as packed uint8 planes shaped (C, H, W).
+
+            Planes are chosen by ``features`` (black, white, empty, liberties,
+            to_play) plus ``last_n`` planes marking the latest moves. The
+            position comes from the recorded game, not from the engine.
+            """
+            encoder = _plane_encoder(features.split(","), last_n)
+            board = _session_board(session)
+            recent = [board.index(vertex) for _, vertex in session.moves.recent(last_n)]
+            buffer = bytearray(len(encoder.names) * len(board.cells))
+            encoder.encode(board, recent, session.to_play, memoryview(buffer))
+            shape = (len(encoder.names), board.height, board.width)
+            return _array_response(buffer, shape, encoder.names, format)
+
+        @self.get("/{session_id}/positions", response_class=StreamingResponse)
+        async def get_positions(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+            format: ArrayFormat = "npy",
+            features: str = "black,white",
+            last_n: int = Query(default=0, ge=0),
+            start: int = Query(default=0, ge=0),
+            stop: int | None = Query(default=None, ge=0),
+        ) -> Response:
+            """Return every position of the game as planes shaped (N, C, H, W).
+
+            Position ``k`` is the board after ``k`` moves; ``start`` and
+            ``stop`` select a slice of them.
+            """
+            encoder = _plane_encoder(features.split(","), last_n)
+            _session_board(session)
+            moves = list(session.moves)
+            stop = len(moves) + 1 if stop is None else min(stop, len(moves) + 1)
+            count = max(0, stop - start)
+            width, height = session.board_size
+            size = len(encoder.names) * width * height
+            buffer = bytearray(count * size)
+            view = memoryview(buffer)
+            positions = iter_positions(session.board_size, moves[: stop - 1], last_n)
+            for k, (board, recent, to_play) in enumerate(positions if count else ()):
+                if k >= start:
+                    offset = (k - start) * size
+                    encoder.encode(board, recent, to_play, view[offset : offset + size])
+            shape = (count, len(encoder.names), height, width)
+            return _array_response(buffer, shape, encoder.names, format)
+
+        @self.post("/boards", response_class=StreamingResponse)
+        async def get_boards(  # type: ignore[unused-coroutine]
+            request: BoardsRequest,
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
+        ) -> Response:
+            """Return the current positions of several sessions as (N, C, H, W)."""
+            encoder = _plane_encoder(request.features, request.last_n)
+            sessions: list[GTPSession] = []
+            for session_id in request.session_ids:
+                try:
+                    sessions.append(await transport_manager.get_session(session_id))
+                except KeyError as exc:
+                    raise HTTPException(
+                        status_code=404, detail=f"Unknown session: {session_id}"
+                    ) from exc
+            sizes = {session.board_size for session in sessions}
+            if len(sizes) != 1:
+                raise HTTPException(
+                    status_code=422, detail="Sessions have different board sizes"
+                )
+            width, height = sizes.pop()
+            size = len(encoder.names) * width * height
+            buffer = bytearray(len(sessions) * size)
+            view = memoryview(buffer)
+            for position, session in enumerate(sessions):
+                board = _session_board(session)
+                recent = [
+                    board.index(vertex)
+                    for _, vertex in session.moves.recent(request.last_n)
+                ]
+                offset = position * size
+                encoder.encode(
+                    board, recent, session.to_play, view[offset : offset + size]
+                )
+            shape = (len(sessions), len(encoder.names), height, width)
+            return _array_response(buffer, shape, encoder.names, request.format)
+
+        @self.get("/{session_id}/ownership", response_model=None)
+        async def get_ownership(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+            format: Literal["json", "npy", "raw"] = "json",
+        ) -> OwnershipResponse | Response:
+            """Return the ownership of every point, row-major from the top edge.
+
+            Ownership comes from ``kata-raw-nn`` when the engine supports it,
+            otherwise from ``final_status_list dead`` combined with the recorded
+            board, and from the board alone as a last resort. The ``npy`` and
+            ``raw`` formats hold float32 values shaped (H, W).
+            """
+            source, ownership = await self._ownership(session)
+            width, height = session.board_size
+            if format == "json":
+                return OwnershipResponse(
+                    width=width, height=height, source=source, ownership=ownership
+                )
+            descr = "<f4" if sys.byteorder == "little" else ">f4"
+            return _array_response(
+                array("f", ownership), (height, width), ["ownership"], format, descr
+            )
+
+        @self.get("/{session_id}/score")
+        async def get_score(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+            threshold: float = Query(default=0.5, ge=0.0, le=1.0),
+        ) -> ScoreResponse:
+            """Return the area and territory score of the current position.
+
+            Points whose ownership exceeds ``threshold`` in absolute value count
+            for that player; stones owned by the opponent count as dead.
+            """
+            board = _session_board(session)
+            source, ownership = await self._ownership(session)
+            komi = session.komi
+            if komi is None:
+                try:
+                    komi = float(await self._query("get_komi", session))
+                except (HTTPException, ValueError):
+                    komi = 0.0
+            area, territory = _score([board], [ownership], [komi], threshold)
+            return ScoreResponse(
+                source=source,
+                area=ScoreValue.from_result(area[0]),
+                territory=ScoreValue.from_result(territory[0]),
+            )
+
+        @self.post("/score")
+        async def score_batch(  # type: ignore[unused-coroutine]
+            request: ScoreBatchRequest,
+        ) -> ScoreBatchResponse:
+            """Score many positions without touching any engine.
+
+            Each position uses its given ``ownership`` or, failing that, the
+            board with ``dead`` stones removed. Positions of the same board
+            size are scored together in one vectorized pass.
+            """
+            groups: dict[tuple[int, int], list[int]] = {}
+            boards: list[Board] = []
+            ownerships: list[list[float]] = []
+            for number, position in enumerate(request.positions):
+                try:
+                    board = Board.from_moves(position.board_size, position.moves)
+                    dead = [board.index(vertex) for vertex in position.dead]
+                except (KeyError, ValueError) as exc:
+                    raise HTTPException(
+                        status_code=422, detail=f"Position {number}: {exc}"
+                    ) from exc
+                ownership = position.ownership
+                if ownership is None:
+                    ownership = ownership_from_board(
+                        board, (index for index in dead if index is not None)
+                    )
+                elif len(ownership) != len(board.cells):
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"Position {number}: ownership has "
+                        f"{len(ownership)} values, expected {len(board.cells)}",
+                    )
+                boards.append(board)
+                ownerships.append(ownership)
+                groups.setdefault(position.board_size, []).append(number)
+
+            scores: list[ScoreResponse | None] = [None] * len(boards)
+            for numbers in groups.values():
+                area, territory = _score(
+                    [boards[number] for number in numbers],
+                    [ownerships[number] for number in numbers],
+                    [request.positions[number].komi for number in numbers],
+                    request.threshold,
+                )
+                for number, by_area, by_territory in zip(numbers, area, territory):
+                    scores[number] = ScoreResponse(
+                        source="ownership"
+                        if request.positions[number].ownership is not None
+                        else "board",
+                        area=ScoreValue.from_result(by_area),
+                        territory=ScoreValue.from_result(by_territory),
+                    )
+            return ScoreBatchResponse(scores=[score for score in scores if score])
+
+        @self.post("/evaluate")
+        async def evaluate(  # type: ignore[unused-coroutine]
+            request: EvaluateRequest,
+            pool: EnginePool | None = Depends(get_engine_pool),
+        ) -> EvaluateResponse:
+            """Return the engine's move or score for a position, without a session.
+
+            The position is loaded on the pooled engine that shares the most
+            moves with it, so follow-up queries on one game cost a few moves.
+            """
+            if pool is None:
+                raise HTTPException(
+                    status_code=404, detail="Position evaluation is not enabled"
+                )
+            try:
+                evaluation = await pool.evaluate(
+                    request.moves,
+                    board_size=request.board_size,
+                    komi=request.komi,
+                    color=request.color,
+                    kind=request.evaluate,
+                )
+            except PositionError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            except Exception as exc:  # pragma: no cover - transport specific
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            return EvaluateResponse(
+                move=evaluation.move,
+                score=evaluation.score,
+                reused_moves=evaluation.reused_moves,
+                sync_commands=evaluation.sync_commands,
+            )
+
+        @self.post("/archive/search")
+        async def search_archive(  # type: ignore[unused-coroutine]
+            request: ArchiveSearchRequest,
+            archive: GameArchive | None = Depends(get_archive),
+        ) -> ArchiveSearchResponse:
+            """Return the archived games that reached a position, newest first.
+
+            Positions match up to rotation and reflection, with the player
+            after the last move to play. ``count`` includes games beyond
+            ``limit``.
+            """
+            if archive is None:
+                raise HTTPException(
+                    status_code=404, detail="Game archive is not enabled"
+                )
+            size = (request.board_size, request.board_size)
+            try:
+                board = Board.from_moves(size, request.moves)
+            except ValueError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            to_play = "W" if request.moves and request.moves[-1][0] == "B" else "B"
+            count, hits = archive.find(board, to_play, limit=request.limit)
+            return ArchiveSearchResponse(
+                count=count,
+                games=[
+                    ArchiveHitResponse(game_id=hit.game_id, move_number=hit.move_number)
+                    for hit in hits
+                ],
+            )
+
+        @self.get("/archive/{game_id:int}")
+        async def get_archived_game(  # type: ignore[unused-coroutine]
+            game_id: int,
+            archive: GameArchive | None = Depends(get_archive),
+        ) -> ArchivedGameResponse:
+            """Return an archived game with its moves."""
+            if archive is None:
+                raise HTTPException(
+                    status_code=404, detail="Game archive is not enabled"
+                )
+            try:
+                game = archive.get(game_id)
+            except KeyError as exc:
+                raise HTTPException(
+                    status_code=404, detail="Unknown archived game"
+                ) from exc
+            return ArchivedGameResponse(
+                game_id=game.game_id,
+                board_size=game.board_size,
+                komi=game.komi,
+                moves=game.moves,
+                finished_at=game.finished_at,
+            )
+
+        @self.get("/engine", dependencies=[Depends(require_admin)])
+        async def get_engine(  # type: ignore[unused-coroutine]
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
+            profiles: Mapping[str, GTPTransport] = Depends(get_engine_profiles),
+        ) -> EngineResponse:
+            """Return the engine generation and the progress of its migration."""
+            return EngineResponse.from_swap(
+                transport_manager.generation, transport_manager.engine_swap, profiles
+            )
+
+        @self.post("/engine", status_code=202, dependencies=[Depends(require_admin)])
+        async def swap_engine(  # type: ignore[unused-coroutine]
+            request: EngineSwapRequest,
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
+            profiles: Mapping[str, GTPTransport] = Depends(get_engine_profiles),
+            speculator: Speculator | None = Depends(get_speculator),
+            pool: EnginePool | None = Depends(get_engine_pool),
+        ) -> EngineResponse:
+            """Swap to an engine profile and migrate live sessions onto it.
+
+            New sessions use the profile as soon as its first engine passed
+            the handshake; existing games move over in the background.
+            Pondering and ``/evaluate`` move to engines of the profile too.
+            """
+            transport = profiles.get(request.profile)
+            if transport is None:
+                raise HTTPException(status_code=404, detail="Unknown engine profile")
+            try:
+                swap = await transport_manager.swap_engine(
+                    transport,
+                    required_commands=request.required_commands,
+                    concurrency=request.concurrency,
+                    label=request.profile,
+                )
+            except EngineStartupError as exc:
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            if speculator is not None:
+                await speculator.swap_engine(transport_manager.prototype)
+            if pool is not None:
+                await pool.swap_engine(transport_manager.prototype)
+            return EngineResponse.from_swap(swap.generation, swap, profiles)
+
+        @self.get("/healthz")
+        async def healthz() -> HealthResponse:  # type: ignore[unused-coroutine]
+            """Liveness probe; never waits on engines."""
+            return HealthResponse()
+
+        @self.get("/readyz", responses={503: {"model": ReadinessResponse}})
+        async def readyz(  # type: ignore[unused-coroutine]
+            response: Response,
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
+            startup: Startup | None = Depends(get_startup),
+        ) -> ReadinessResponse:
+            """Readiness probe; 503 until warm engines exist and while saturated.
+
+            Only counters are read, so the probe never waits on engines.
+            """
+            detail: str | None = None
+            if startup is not None and not startup.ready:
+                detail = startup.error or "Engines are starting"
+            elif not transport_manager.has_capacity:
+                detail = "No engine capacity available"
+            if detail is not None:
+                response.status_code = 503
+            return ReadinessResponse(
+                ready=detail is None,
+                startup="ready" if startup is None else startup.status,
+                warm_engines=transport_manager.warm_engines,
+                detail=detail,
+            )
+
+        @self.get("/stats")
+        async def get_stats(  # type: ignore[unused-coroutine]
+            monitor: ResourceMonitor | None = Depends(get_resource_monitor),
+        ) -> AggregateStatsResponse:
+            """Return resource usage for every engine and in aggregate."""
+            if monitor is None:
+                raise HTTPException(
+                    status_code=404, detail="Resource monitoring is not enabled"
+                )
+            totals = monitor.aggregate()
+            return AggregateStatsResponse(
+                engines=int(totals["engines"]),
+                rss_bytes=int(totals["rss_bytes"]),
+                cpu_seconds=totals["cpu_seconds"],
+                cpu_percent=totals["cpu_percent"],
+                evictions=int(totals["evictions"]),
+                restarts=int(totals["restarts"]),
+                sessions={
+                    session_id: ProcessStatsResponse.from_stats(stats)
+                    for session_id, stats in monitor.all_stats().items()
+                },
+            )
+
+        @self.get("/{session_id}/stats")
+        async def get_session_stats(  # type: ignore[unused-coroutine]
+            session_id: str,
+            session: GTPSession = Depends(get_session),
+            monitor: ResourceMonitor | None = Depends(get_resource_monitor),
+        ) -> ProcessStatsResponse:
+            """Return resource usage of the engine behind a session."""
+            if monitor is None:
+                raise HTTPException(
+                    status_code=404, detail="Resource monitoring is not enabled"
+                )
+            stats = monitor.session_stats(session_id)
+            if stats is None:
+                pid = getattr(session.transport, "pid", None)
+                stats = read_process_stats(pid) if pid is not None else None
+            if stats is None:
+                raise HTTPException(
+                    status_code=404, detail="No statistics available for session"
+                )
+            return ProcessStatsResponse.from_stats(stats)
+
         @self.get("/{session_id}/name")
         async def get_name(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> NameResponse:
             """Return the engine name according to the GTP."""
-            payload = await self._query("name", transport)
+            payload = await self._query("name", session)
             return NameResponse(name=payload)
 
         @self.get("/{session_id}/version")
         async def get_version(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> VersionResponse:
             """Return the engine version according to the GTP."""
-            payload = await self._query("version", transport)
+            payload = await self._query("version", session)
             return VersionResponse(version=payload)
 
         @self.get("/{session_id}/protocol_version")
         async def get_protocol_version(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> ProtocolVersionResponse:
             """Return the protocol version supported by the engine."""
-            payload = await self._query("protocol_version", transport)
+            payload = await self._query("protocol_version", session)
             return ProtocolVersionResponse(protocol_version=payload)
 
-        @self.get("/{session_id}/commands")
+        @self.get("/{session_id}/commands", response_model=CommandsResponse)
         async def list_commands(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
-        ) -> CommandsResponse:
+            session: GTPSession = Depends(get_session),
+        ) -> CommandsResponse | Response:
             """Return the list of commands supported by the engine."""
-            payload = await self._query("list_commands", transport)
+            payload = await self._query("list_commands", session)
             commands = [line for line in payload.splitlines() if line]
+            if len(commands) >= STREAM_THRESHOLD:
+                return list_response("commands", commands)
             return CommandsResponse(commands=commands)
 
         @self.post("/{session_id}/boardsize")
         async def set_boardsize(  # type: ignore[unused-coroutine]
             request: BoardSizeRequest,
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> BoardSizeResponse:
             """Set the board size to NxN or NxM and clear the board."""
             args: list[str] = [str(request.x)]
             if request.y is not None:
                 args.append(str(request.y))
-            payload = await self._query("boardsize", transport, arguments=args)
+            payload = await self._query("boardsize", session, arguments=args)
             return BoardSizeResponse(detail=payload)
 
         @self.post("/{session_id}/komi")
         async def set_komi(  # type: ignore[unused-coroutine]
             request: KomiRequest,
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> KomiResponse:
             """Set the komi value on the board."""
             payload = await self._query(
-                "komi", transport, arguments=[str(request.value)]
+                "komi", session, arguments=[str(request.value)]
             )
             return KomiResponse(detail=payload)
 
         @self.get("/{session_id}/komi")
         async def get_komi(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> KomiValueResponse:
             """Return the current komi reported by the engine."""
-            payload = await self._query("get_komi", transport)
+            payload = await self._query("get_komi", session)
             try:
                 komi = float(payload)
             except ValueError as exc:
@@ -272,45 +1336,324 @@ class FastGtp(APIRouter):
         @self.post("/{session_id}/play")
         async def play_move(  # type: ignore[unused-coroutine]
             request: PlayRequest,
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> PlayResponse:
             """Play a move on the board for the given color."""
             payload = await self._query(
                 "play",
-                transport,
+                session,
                 arguments=[request.color, request.vertex],
             )
             return PlayResponse(detail=payload)
 
         @self.post("/{session_id}/clear_board")
         async def clear_board(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> ClearBoardResponse:
             """Clear the current board state."""
-            payload = await self._query("clear_board", transport)
+            payload = await self._query("clear_board", session)
             return ClearBoardResponse(detail=payload)
 
+        @self.post("/{session_id}/clock")
+        async def set_clock(  # type: ignore[unused-coroutine]
+            request: ClockRequest,
+            session: GTPSession = Depends(get_session),
+        ) -> ClockResponse:
+            """Start a game clock and announce its time control to the engine.
+
+            The clock of the side to move starts immediately. From then on
+            ``genmove`` tells the engine its remaining time and stops it once
+            that time has run out.
+            """
+            try:
+                control = TimeControl(
+                    request.kind,
+                    request.main_time,
+                    request.period_time,
+                    request.periods,
+                    request.stones,
+                )
+            except ValueError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            kgs = await self._supports(session, "kgs-time_settings")
+            command = control.settings_command(kgs=kgs)
+            await self._query(command, session)
+            clock = GameClock(control, command)
+            clock.running = session.to_play
+            session.clock = clock
+            return ClockResponse.from_clock(clock)
+
+        @self.get("/{session_id}/clock")
+        async def get_clock(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+        ) -> ClockResponse:
+            """Return the time left for both players."""
+            if session.clock is None:
+                raise HTTPException(status_code=404, detail="Session has no clock")
+            return ClockResponse.from_clock(session.clock)
+
         @self.post("/{session_id}/genmove")
         async def genmove(  # type: ignore[unused-coroutine]
             request: GenMoveRequest,
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
+            speculator: Speculator | None = Depends(get_speculator),
+            book: OpeningBook | None = Depends(get_opening_book),
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
         ) -> GenMoveResponse:
-            """Generate and play the next move for the given color."""
-            payload = await self._query("genmove", transport, arguments=[request.color])
+            """Generate and play the next move for the given color.
+
+            Positions covered by the opening book are answered from it, and
+            with speculation enabled a move precomputed while the opponent was
+            thinking is used; either is played directly instead of searching.
+
+            When the session has a clock, the engine is sent ``time_left``
+            first and is stopped with 504 if it overruns its remaining time;
+            the game is then replayed on a fresh engine.
+            """
+            clock = session.clock
+            if clock is not None and clock.players[request.color].flagged:
+                raise HTTPException(
+                    status_code=409, detail=f"{request.color} has lost on time"
+                )
+            payload: str | None = None
+            if book is not None and request.book:
+                payload = _book_move(book, session, request.color)
+            if payload is None and speculator is not None:
+                payload = speculator.take(session, request.color)
+            if payload is not None:
+                try:
+                    await self._query(
+                        "play", session, arguments=[request.color, payload]
+                    )
+                except HTTPException:
+                    payload = None
+            if payload is None:
+                timeout: float | None = None
+                if clock is not None:
+                    if await self._supports(session, "time_left"):
+                        command = clock.time_left_command(request.color)
+                        await self._query(command, session)
+                    timeout = clock.budget(request.color) + _DEADLINE_GRACE
+                try:
+                    payload = await self._query(
+                        "genmove", session, arguments=[request.color], timeout=timeout
+                    )
+                except asyncio.TimeoutError as exc:
+                    assert clock is not None
+                    clock.flag(request.color)
+                    try:
+                        await transport_manager.resync_session(session.session_id)
+                    except Exception as resync_exc:
+                        raise HTTPException(
+                            status_code=502, detail=str(resync_exc)
+                        ) from exc
+                    raise HTTPException(
+                        status_code=504,
+                        detail=f"{request.color} ran out of time; engine stopped",
+                    ) from exc
+            if (
+                request.ponder
+                and speculator is not None
+                and payload.upper() != "RESIGN"
+            ):
+                speculator.schedule(session, request.color)
             return GenMoveResponse(move=payload)
 
+        @self.get("/scheduler")
+        async def get_scheduler_stats(  # type: ignore[unused-coroutine]
+            scheduler: CommandScheduler | None = Depends(get_scheduler),
+        ) -> SchedulerResponse:
+            """Return queue depth and wait times per priority class."""
+            if scheduler is None:
+                raise HTTPException(
+                    status_code=404, detail="Command scheduling is not enabled"
+                )
+            return SchedulerResponse(
+                capacity=scheduler.capacity,
+                classes={
+                    priority: SchedulerClassResponse(
+                        queued=stats.queued,
+                        running=stats.running,
+                        dispatched=stats.dispatched,
+                        promoted=stats.promoted,
+                        mean_wait=stats.mean_wait,
+                        max_wait=stats.max_wait,
+                        oldest_wait=scheduler.oldest_wait(priority),
+                    )
+                    for priority, stats in scheduler.stats().items()
+                },
+            )
+
+        @self.get("/speculation")
+        async def get_speculation(  # type: ignore[unused-coroutine]
+            speculator: Speculator | None = Depends(get_speculator),
+        ) -> SpeculationResponse:
+            """Return hit rates and wasted compute of speculative pondering."""
+            if speculator is None:
+                raise HTTPException(
+                    status_code=404, detail="Speculation is not enabled"
+                )
+            metrics = speculator.metrics
+            return SpeculationResponse(
+                jobs=metrics.jobs,
+                skipped=metrics.skipped,
+                failed=metrics.failed,
+                predictions=metrics.predictions,
+                hits=metrics.hits,
+                misses=metrics.misses,
+                hit_rate=metrics.hit_rate,
+                compute_seconds=metrics.compute_seconds,
+                saved_seconds=metrics.saved_seconds,
+                wasted_seconds=metrics.wasted_seconds,
+            )
+
+        @self.get(
+            "/usage",
+            responses={200: {"content": {"text/csv": {}}}},
+        )
+        async def get_usage(  # type: ignore[unused-coroutine]
+            format: Literal["json", "csv"] = "json",
+            meter: EngineMeter | None = Depends(get_meter),
+        ) -> UsageResponse:
+            """Return engine time per tenant and command, as JSON or CSV."""
+            if meter is None:
+                raise HTTPException(status_code=404, detail="Metering is not enabled")
+            if format == "csv":
+                return Response(  # type: ignore[return-value]
+                    meter.export_csv(), media_type="text/csv"
+                )
+            tenants: dict[str, TenantUsageResponse] = {}
+            for tenant, usage in meter.tenants().items():
+                tenants[tenant] = TenantUsageResponse(
+                    **EngineUsageResponse.from_usage(usage).model_dump(),
+                    quota=meter.quota(tenant),
+                    window_used=meter.used(tenant),
+                    by_command={
+                        command: EngineUsageResponse.from_usage(command_usage)
+                        for command, command_usage in meter.commands(tenant).items()
+                    },
+                )
+            return UsageResponse(
+                window=meter.window,
+                metric=meter.metric,
+                action=meter.action,
+                rejected=meter.rejected,
+                demoted=meter.demoted,
+                tenants=tenants,
+            )
+
+        @self.get("/{session_id}/usage")
+        async def get_session_usage(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+            meter: EngineMeter | None = Depends(get_meter),
+        ) -> EngineUsageResponse:
+            """Return the engine time charged to a session."""
+            if meter is None:
+                raise HTTPException(status_code=404, detail="Metering is not enabled")
+            return EngineUsageResponse.from_usage(session.usage)
+
         @self.get("/{session_id}/sgf")
         async def get_sgf(  # type: ignore[unused-coroutine]
-            transport: GTPTransport = Depends(get_session_transport),
+            response: Response,
+            session: GTPSession = Depends(get_session),
+            if_none_match: str | None = Header(default=None),
         ) -> SgfResponse:
-            """Return the current position encoded as SGF."""
-            payload = await self._query("printsgf", transport)
+            """Return the current position encoded as SGF.
+
+            The export is cached per position version and tagged with an
+            ``ETag``; a matching ``If-None-Match`` yields 304 without touching
+            the engine.
+            """
+            if if_none_match is not None and _etag_matches(if_none_match, session.etag):
+                return Response(status_code=304, headers={"ETag": session.etag})  # type: ignore[return-value]
+
+            async with session.sgf_lock:
+                version = session.version
+                payload = session.cached_sgf()
+                if payload is None:
+                    payload = await self._query("printsgf", session)
+                    session.store_sgf(version, payload)
+            response.headers["ETag"] = session.etag_for(version)
             return SgfResponse(sgf=payload)
 
+        @self.get("/{session_id}/events", response_class=StreamingResponse)
+        async def stream_events(  # type: ignore[unused-coroutine]
+            session: GTPSession = Depends(get_session),
+            buffer: int = Query(default=DEFAULT_BUFFER, ge=1, le=_MAX_EVENT_BUFFER),
+        ) -> Response:
+            """Stream the game as server-sent events.
+
+            The first event is a ``snapshot`` of the recorded game, followed by
+            ``move``, ``undo``, ``komi``, ``reset``, ``resign`` and ``unknown``
+            deltas and a final ``closed``. A client that falls ``buffer``
+            events behind receives ``dropped`` and must reconnect. Spectators
+            never send commands to the engine.
+            """
+            subscription = session.events.subscribe(session.snapshot(), buffer)
+
+            async def body():
+                try:
+                    while True:
+                        event = await subscription.next(_HEARTBEAT)
+                        if event is not None:
+                            yield event.sse()
+                        elif subscription.finished:
+                            return
+                        else:
+                            yield b": keep-alive\n\n"
+                finally:
+                    subscription.close()
+
+            return StreamingResponse(
+                body(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @self.websocket("/{session_id}/ws")
+        async def watch_session(  # type: ignore[unused-coroutine]
+            websocket: WebSocket,
+            session_id: str,
+            buffer: int = Query(default=DEFAULT_BUFFER, ge=1, le=_MAX_EVENT_BUFFER),
+            transport_manager: GTPTransportManager = Depends(get_transport_manager),
+        ) -> None:
+            """Send the events of ``GET /{session_id}/events`` as JSON text frames.
+
+            The socket is closed with 1013 (try again later) when the client
+            falls behind and with 1000 when the session ends.
+            """
+            try:
+                session = await transport_manager.get_session(session_id)
+            except KeyError as exc:
+                raise WebSocketException(
+                    status.WS_1008_POLICY_VIOLATION, "Unknown session"
+                ) from exc
+            await websocket.accept()
+            subscription = session.events.subscribe(session.snapshot(), buffer)
+            try:
+                while True:
+                    event = await subscription.next(_HEARTBEAT)
+                    if event is not None:
+                        await websocket.send_text(event.data)
+                    elif subscription.finished:
+                        break
+                    else:
+                        await websocket.send_text('{"type":"ping"}')
+                code = (
+                    status.WS_1013_TRY_AGAIN_LATER
+                    if subscription.dropped
+                    else status.WS_1000_NORMAL_CLOSURE
+                )
+                await websocket.close(code)
+            except WebSocketDisconnect:
+                pass
+            finally:
+                subscription.close()
+
         @self.post("/{session_id}/sgf")
         async def load_sgf(  # type: ignore[unused-coroutine]
             request: LoadSgfRequest,
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> LoadSgfResponse:
             """loadsgf: Load an SGF file, possibly up to a move number or the first occurrence of a move.
 
@@ -332,7 +1675,7 @@ class FastGtp(APIRouter):
             if request.move is not None:
                 args.append(str(request.move))
             try:
-                payload = await self._query("loadsgf", transport, arguments=args)
+                payload = await self._query("loadsgf", session, arguments=args)
                 return LoadSgfResponse(detail=payload)
             finally:
                 try:
@@ -343,56 +1686,345 @@ class FastGtp(APIRouter):
         @self.post("/{session_id}/command")
         async def send_command(  # type: ignore[unused-coroutine]
             request: CommandRequest,
-            transport: GTPTransport = Depends(get_session_transport),
+            session: GTPSession = Depends(get_session),
         ) -> CommandResponse:
             """Forward arbitrary commands to the underlying GTP engine."""
-            payload = await self._query(request.command, transport)
+            payload = await self._query(request.command, session)
             return CommandResponse(detail=payload)
 
+        @self.post("/{session_id}/batch", response_model=BatchResponse)
+        async def send_batch(  # type: ignore[unused-coroutine]
+            request: BatchRequest,
+            session: GTPSession = Depends(get_session),
+        ) -> BatchResponse | Response:
+            """Send several commands back to back in one round trip.
+
+            Commands are written to the engine without waiting for earlier
+            responses. A failed command does not stop later ones; each result
+            reports its own success.
+            """
+            if not all(command.strip() for command in request.commands):
+                raise HTTPException(status_code=422, detail="Commands cannot be empty")
+            results = await self._query_batch(request.commands, session)
+            if len(results) >= STREAM_THRESHOLD:
+                return list_response(
+                    "results",
+                    [
+                        {"success": r.success, "payload": r.payload, "error": r.error}
+                        for r in results
+                    ],
+                )
+            return BatchResponse(results=results)
+
         @self.post("/{session_id}/quit")
         async def quit_session(  # type: ignore[unused-coroutine]
             session_id: str,
             transport_manager: GTPTransportManager = Depends(get_transport_manager),
+            speculator: Speculator | None = Depends(get_speculator),
+            archive: GameArchive | None = Depends(get_archive),
         ) -> QuitResponse:
-            """Terminate the session and release its transport."""
+            """Terminate the session and release its transport.
+
+            With an archive, the session's game is stored for later searches.
+            """
+            if speculator is not None:
+                speculator.discard(session_id)
+            session: GTPSession | None = None
+            if archive is not None:
+                with contextlib.suppress(KeyError):
+                    session = await transport_manager.get_session(session_id)
             closed = await transport_manager.close_session(session_id)
             if not closed:
                 raise HTTPException(status_code=404, detail="Unknown session")
+            if session is not None and session.history_known and session.moves:
+                # Games the archive cannot encode are not worth failing quit.
+                with contextlib.suppress(ValueError):
+                    archive.append(  # type: ignore[union-attr]
+                        session.board_size, list(session.moves), komi=session.komi
+                    )
             return QuitResponse(closed=True)
 
+    async def _supports(self, session: GTPSession, command: str) -> bool:
+        """Return whether the engine knows ``command``, asking only once."""
+        known = session.known_commands.get(command)
+        if known is None:
+            payload = await self._query("known_command", session, arguments=[command])
+            known = session.known_commands[command] = payload.strip() == "true"
+        return known
+
+    async def _ownership(self, session: GTPSession) -> tuple[str, list[float]]:
+        """Return the best available ownership map and where it came from."""
+        if await self._supports(session, "kata-raw-nn"):
+            payload = await self._query("kata-raw-nn", session, arguments=["0"])
+            ownership = parse_ownership(payload, session.board_size)
+            if ownership is not None:
+                return "kata-raw-nn", ownership
+
+        board = _session_board(session)
+        if await self._supports(session, "final_status_list"):
+            payload = await self._query(
+                "final_status_list", session, arguments=["dead"]
+            )
+            try:
+                dead = [board.index(vertex) for vertex in payload.split()]
+            except ValueError as exc:
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            return "final_status_list", ownership_from_board(
+                board, (index for index in dead if index is not None)
+            )
+        return "board", ownership_from_board(board)
+
     async def _query(
         self,
         command: str,
-        transport: GTPTransport,
+        session: GTPSession,
         *,
         arguments: Sequence[str] | None = None,
+        timeout: float | None = None,
     ) -> str:
+        """Send a command to the session's engine and return its payload.
+
+        With ``timeout`` the command is abandoned after that many seconds and
+        ``asyncio.TimeoutError`` propagates; the engine must then be resynced.
+        The session counts as busy until the result has been recorded, so its
+        engine is never swapped between sending a move and recording it.
+        """
+        session.in_flight += 1
         try:
             command_text = build_command(command, arguments)
-            raw = await transport.send_command(command_text)
-        except Exception as exc:  # pragma: no cover - transport specific
-            raise HTTPException(status_code=502, detail=str(exc)) from exc
+            changes_state = is_state_changing(command_text)
+            metering = _metering.get()
+            try:
+                async with self._slot(session, [command_text], metering):
+                    send = session.transport.send_command(command_text)
+                    raw = await (
+                        send if timeout is None else asyncio.wait_for(send, timeout)
+                    )
+            except AdmissionError as exc:
+                raise _admission_http_error(exc) from exc
+            except asyncio.TimeoutError:
+                raise
+            except Exception as exc:  # pragma: no cover - transport specific
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            finally:
+                if changes_state:
+                    session.bump()
 
+            try:
+                structured = parse_response(raw)
+            except ValueError as exc:
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+            if not structured.success:
+                raise HTTPException(
+                    status_code=502, detail=structured.error or "Unknown GTP error"
+                )
+
+            if changes_state:
+                session.record(command_text, structured.payload)
+            return structured.payload
+        finally:
+            session.in_flight -= 1
+
+    def _slot(
+        self,
+        session: GTPSession,
+        commands: Sequence[str],
+        metering: tuple[EngineMeter, str] | None = None,
+        *,
+        name: str | None = None,
+    ) -> contextlib.AbstractAsyncContextManager[None]:
+        """Return the context to send ``commands`` in.
+
+        It holds a scheduler slot while the commands run and charges their
+        engine time to the metered tenant, under ``name`` or the command's
+        own name. Transports that report turns take the slot and start the
+        clock only once the engine is free for the commands, so commands
+        queued behind a busy engine neither hold capacity nor get billed for
+        the wait; for others both cover the whole send.
+
+        Raises ``QuotaExceededError`` when the metered tenant is over budget;
+        with a deprioritizing meter its commands are moved to ``batch``.
+        """
+        admitted = metering is None or metering[0].admit(metering[1])
+        scheduling = _scheduling.get()
+        if scheduling is None and metering is None:
+            return contextlib.nullcontext()
+        turn = _EngineTurn(session, len(commands))
+        if scheduling is not None:
+            scheduler, client, ceiling = scheduling
+            if not admitted:
+                ceiling = "batch"
+            priority = min(
+                (command_priority(command, ceiling) for command in commands),
+                key=PRIORITIES.index,
+            )
+            turn.schedule(scheduler, priority, client)
+        if metering is not None:
+            turn.charge(*metering, name or _command_name(commands[0]))
+        if getattr(session.transport, "reports_turns", False):
+            return _taking_turn(turn)
+        return _holding_turn(turn)
+
+    async def _query_batch(
+        self, commands: Sequence[str], session: GTPSession
+    ) -> list[CommandResult]:
+        """Send ``commands`` as one burst and record each successful result."""
+        session.in_flight += 1
         try:
-            structured = parse_response(raw)
-        except ValueError as exc:
-            raise HTTPException(status_code=502, detail=str(exc)) from exc
+            texts = [command.strip() for command in commands]
+            changes_state = any(is_state_changing(text) for text in texts)
+            metering = _metering.get()
+            try:
+                async with self._slot(session, texts, metering, name="batch"):
+                    raws = await send_commands(session.transport, texts)
+            except AdmissionError as exc:
+                raise _admission_http_error(exc) from exc
+            except Exception as exc:  # pragma: no cover - transport specific
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            finally:
+                if changes_state:
+                    session.bump()
+
+            results: list[CommandResult] = []
+            for text, raw in zip(texts, raws):
+                try:
+                    structured = parse_response(raw)
+                except ValueError as exc:
+                    raise HTTPException(status_code=502, detail=str(exc)) from exc
+                if not structured.success:
+                    results.append(
+                        CommandResult(
+                            success=False,
+                            error=structured.error or "Unknown GTP error",
+                        )
+                    )
+                    continue
+                if is_state_changing(text):
+                    session.record(text, structured.payload)
+                results.append(
+                    CommandResult(success=True, payload=structured.payload)
+                )
+            return results
+        finally:
+            session.in_flight -= 1
+
+
+class _EngineTurn:
+    """Scheduler slot and metering of a request's commands on the engine."""
+
+    __slots__ = (
+        "session",
+        "count",
+        "scheduler",
+        "priority",
+        "client",
+        "meter",
+        "tenant",
+        "command",
+        "pid",
+    )
 
-        if not structured.success:
-            raise HTTPException(
-                status_code=502, detail=structured.error or "Unknown GTP error"
+    def __init__(self, session: GTPSession, count: int):
+        self.session = session
+        self.count = count
+        self.scheduler: CommandScheduler | None = None
+        self.priority: Priority = "interactive"
+        self.client = ""
+        self.meter: EngineMeter | None = None
+        self.tenant = ""
+        self.command = ""
+        self.pid: int | None = None
+
+    def schedule(
+        self, scheduler: CommandScheduler, priority: Priority, client: str
+    ) -> None:
+        self.scheduler = scheduler
+        self.priority = priority
+        self.client = client
+
+    def charge(self, meter: EngineMeter, tenant: str, command: str) -> None:
+        self.meter = meter
+        self.tenant = tenant
+        self.command = command
+
+    async def acquire(self, commands: int) -> None:
+        if self.scheduler is not None:
+            await self.scheduler.acquire(self.priority, self.client)
+        if self.meter is not None:
+            self.pid = getattr(self.session.transport, "pid", None)
+            self.meter.prime(self.pid)
+
+    def release(self, seconds: float) -> None:
+        """Give back the slot and charge ``seconds``, even if the send failed."""
+        if self.scheduler is not None:
+            self.scheduler.release(self.priority)
+        if self.meter is not None:
+            self.meter.record(
+                self.session, self.tenant, self.command, seconds, self.pid, self.count
             )
 
-        return structured.payload
+
+@asynccontextmanager
+async def _taking_turn(turn: CommandTurn):
+    """Make ``turn`` the :data:`command_turn` of the commands sent in the block."""
+    token = command_turn.set(turn)
+    try:
+        yield
+    finally:
+        command_turn.reset(token)
+
+
+@asynccontextmanager
+async def _holding_turn(turn: _EngineTurn):
+    """Hold ``turn`` for the whole block, for transports without turns."""
+    await turn.acquire(turn.count)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        turn.release(time.perf_counter() - started)
+
+
+def _command_name(command: str) -> str:
+    """Return the name of ``command``, ignoring a GTP id."""
+    tokens = command.split(maxsplit=2)
+    if len(tokens) > 1 and tokens[0].isdigit():
+        del tokens[0]
+    return tokens[0] if tokens else ""
 
 
 def create_app(
     transport_manager: GTPTransportManager,
     *,
+    monitor: ResourceMonitor | None = None,
+    speculator: Speculator | None = None,
+    scheduler: CommandScheduler | None = None,
+    book: OpeningBook | None = None,
+    startup: Startup | None = None,
+    meter: EngineMeter | None = None,
+    pool: EnginePool | None = None,
+    archive: GameArchive | None = None,
+    engine_profiles: Mapping[str, GTPTransport] | None = None,
+    admin_token: str | None = None,
     app_kwargs: dict[str, Any] | None = None,
     router_kwargs: dict[str, Any] | None = None,
 ) -> FastAPI:
-    """Create a FastAPI application that exposes the GTP router."""
+    """Create a FastAPI application that exposes the GTP router.
+
+    When ``monitor`` is given it is started and stopped with the application
+    and its samples are exposed under ``/stats`` and ``/{session_id}/stats``.
+    ``speculator`` enables pondering for ``genmove`` requests that opt in.
+    ``scheduler`` bounds and orders the commands running on engines.
+    ``book`` answers ``genmove`` in known openings without the engine.
+    ``startup`` warms engines in the background once the application starts;
+    ``/readyz`` reports ready only after it succeeded. ``meter`` charges
+    engine time to sessions and tenants, enforces its quotas and exposes
+    usage under ``/usage``. With ``admin_token``, ``POST /engine`` swaps the
+    engine to one of ``engine_profiles`` and migrates live sessions onto it.
+    ``pool`` serves ``POST /evaluate`` from engines outside any session.
+    ``archive`` keeps the games of closed sessions and serves ``/archive``.
+    """
 
     if app_kwargs is None:
         app_kwargs = {}
@@ -401,18 +2033,50 @@ def create_app(
 
     @asynccontextmanager
     async def lifespan(_: FastAPI):
+        if monitor is not None:
+            monitor.start()
+        if startup is not None:
+            startup.start()
+        if archive is not None:
+            archive.start()
         try:
             yield
         finally:
+            if startup is not None:
+                await startup.stop()
+            if monitor is not None:
+                await monitor.stop()
+            if speculator is not None:
+                await speculator.aclose()
+            if pool is not None:
+                await pool.aclose()
             await transport_manager.close_all()
+            if isinstance(transport_manager.prototype, RecordingGTPTransport):
+                # Swapped engines record into the same file.
+                transport_manager.prototype.close_recording()
+            if archive is not None:
+                await archive.stop()
+                archive.close()
+            if book is not None:
+                book.close()
 
     app = FastAPI(title="fastgtp", lifespan=lifespan, **app_kwargs)
     fastgtp_router = FastGtp(**router_kwargs)
     app.include_router(fastgtp_router)
 
-    async def override_get_manager() -> GTPTransportManager:
-        return transport_manager
-
-    app.dependency_overrides[get_transport_manager] = override_get_manager
+    # Components live on the application state rather than in
+    # ``dependency_overrides``: FastAPI re-inspects every override on every
+    # request, which costs more than most engine commands.
+    app.state.fastgtp_transport_manager = transport_manager
+    app.state.fastgtp_monitor = monitor
+    app.state.fastgtp_speculator = speculator
+    app.state.fastgtp_scheduler = scheduler
+    app.state.fastgtp_book = book
+    app.state.fastgtp_startup = startup
+    app.state.fastgtp_meter = meter
+    app.state.fastgtp_pool = pool
+    app.state.fastgtp_archive = archive
+    app.state.fastgtp_engine_profiles = engine_profiles
+    app.state.fastgtp_admin_token = admin_token
 
     return app
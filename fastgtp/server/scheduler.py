@@ -0,0 +1,265 @@
+"""Fair, priority-aware admission of engine commands across sessions.
+
+Commands are granted one of ``capacity`` slots in strict class order
+(interactive, then analysis, then batch). Within a class, clients share the
+slots by weighted fair queuing: each request is stamped with a virtual finish
+time advanced by ``1 / weight`` of its client, and the smallest stamp goes
+first. A request waiting longer than ``aging`` seconds is served ahead of any
+class, so batch work is delayed but never starved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Literal, Mapping
+
+from .gtp import parse_command_line
+from .transport import QueueFullError
+
+Priority = Literal["interactive", "analysis", "batch"]
+
+PRIORITIES: tuple[Priority, ...] = ("interactive", "analysis", "batch")
+
+ANALYSIS_COMMANDS = frozenset(
+    {
+        "final_score",
+        "final_status_list",
+        "estimate_score",
+        "kata-analyze",
+        "kata-raw-nn",
+        "lz-analyze",
+        "printsgf",
+        "showboard",
+    }
+)
+
+
+def command_priority(command: str, ceiling: Priority = "interactive") -> Priority:
+    """Return the class of ``command``, never above ``ceiling``.
+
+    Analysis commands rank below moves and setup; a client may lower its
+    requests further, e.g. to ``batch``, but never raise them.
+    """
+    try:
+        name = parse_command_line(command).name
+    except ValueError:
+        name = ""
+    priority: Priority = "analysis" if name in ANALYSIS_COMMANDS else "interactive"
+    return max(priority, ceiling, key=PRIORITIES.index)
+
+
+@dataclass(slots=True)
+class ClassStats:
+    """Queueing statistics of one priority class."""
+
+    queued: int = 0
+    running: int = 0
+    dispatched: int = 0
+    promoted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.dispatched if self.dispatched else 0.0
+
+
+@dataclass(slots=True, eq=False)
+class _Waiter:
+    priority: Priority
+    client: str
+    tag: float
+    enqueued: float
+    future: asyncio.Future[None]
+    done: bool = False
+
+
+@dataclass(slots=True)
+class _Class:
+    heap: list[tuple[float, int, _Waiter]] = field(default_factory=list)
+    arrivals: deque[_Waiter] = field(default_factory=deque)
+    finish: dict[str, float] = field(default_factory=dict)
+    virtual: float = 0.0
+    stats: ClassStats = field(default_factory=ClassStats)
+
+
+class CommandScheduler:
+    """Grant engine slots by priority class and weighted fair share.
+
+    Parameters
+    ----------
+    capacity:
+        Number of commands that may run on engines at the same time.
+    weights:
+        Relative share per client; unlisted clients get ``default_weight``.
+    aging:
+        Seconds after which a waiting request is served before all classes.
+    max_queued:
+        Maximum waiting requests per class; more raise ``QueueFullError``.
+    retry_after:
+        Hint attached to ``QueueFullError``.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        weights: Mapping[str, float] | None = None,
+        default_weight: float = 1.0,
+        aging: float = 5.0,
+        max_queued: int | None = None,
+        retry_after: float = 1.0,
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if default_weight <= 0 or any(w <= 0 for w in (weights or {}).values()):
+            raise ValueError("weights must be positive")
+        self._capacity = capacity
+        self._free = capacity
+        self._weights = dict(weights or {})
+        self._default_weight = default_weight
+        self._aging = aging
+        self._max_queued = max_queued
+        self._retry_after = retry_after
+        self._classes = {priority: _Class() for priority in PRIORITIES}
+        self._sequence = itertools.count()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def stats(self) -> dict[Priority, ClassStats]:
+        """Return live statistics per priority class."""
+        return {priority: queue.stats for priority, queue in self._classes.items()}
+
+    def oldest_wait(self, priority: Priority) -> float:
+        """Seconds the longest waiting request of ``priority`` has waited."""
+        waiter = self._oldest(self._classes[priority])
+        return time.monotonic() - waiter.enqueued if waiter is not None else 0.0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: Priority, client: str) -> AsyncIterator[None]:
+        """Wait for an engine slot and hold it for the duration of the block."""
+        await self.acquire(priority, client)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    async def acquire(self, priority: Priority, client: str) -> None:
+        """Wait for an engine slot; it must be given back with :meth:`release`."""
+        queue = self._classes[priority]
+        stats = queue.stats
+        if self._free > 0 and not any(q.stats.queued for q in self._classes.values()):
+            self._free -= 1
+            stats.dispatched += 1
+            stats.running += 1
+            return
+        if self._max_queued is not None and stats.queued >= self._max_queued:
+            raise QueueFullError(
+                f"Too many {priority} commands are waiting for an engine",
+                retry_after=self._retry_after,
+            )
+
+        weight = self._weights.get(client, self._default_weight)
+        tag = max(queue.virtual, queue.finish.get(client, 0.0)) + 1.0 / weight
+        queue.finish[client] = tag
+        waiter = _Waiter(
+            priority,
+            client,
+            tag,
+            time.monotonic(),
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(queue.heap, (tag, next(self._sequence), waiter))
+        queue.arrivals.append(waiter)
+        stats.queued += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.done:
+                # Granted just before the cancellation arrived; hand it on.
+                self.release(priority)
+            else:
+                waiter.done = True
+                stats.queued -= 1
+                self._forget(queue)
+            raise
+
+    def release(self, priority: Priority) -> None:
+        """Give back a slot taken with :meth:`acquire`."""
+        self._classes[priority].stats.running -= 1
+        self._free += 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._free > 0:
+            waiter = self._next()
+            if waiter is None:
+                return
+            queue = self._classes[waiter.priority]
+            waited = time.monotonic() - waiter.enqueued
+            waiter.done = True
+            queue.virtual = max(queue.virtual, waiter.tag)
+            queue.stats.queued -= 1
+            queue.stats.running += 1
+            queue.stats.dispatched += 1
+            queue.stats.total_wait += waited
+            queue.stats.max_wait = max(queue.stats.max_wait, waited)
+            self._forget(queue)
+            self._free -= 1
+            waiter.future.set_result(None)
+
+    def _next(self) -> _Waiter | None:
+        # Starvation protection: anything waiting past ``aging`` goes first.
+        now = time.monotonic()
+        starved: _Waiter | None = None
+        for priority in PRIORITIES[1:]:
+            oldest = self._oldest(self._classes[priority])
+            if oldest is not None and now - oldest.enqueued >= self._aging:
+                if starved is None or oldest.enqueued < starved.enqueued:
+                    starved = oldest
+        if starved is not None:
+            self._classes[starved.priority].stats.promoted += 1
+            return starved
+
+        for priority in PRIORITIES:
+            heap = self._classes[priority].heap
+            while heap:
+                waiter = heapq.heappop(heap)[2]
+                if not waiter.done:
+                    return waiter
+        return None
+
+    @staticmethod
+    def _oldest(queue: _Class) -> _Waiter | None:
+        while queue.arrivals and queue.arrivals[0].done:
+            queue.arrivals.popleft()
+        return queue.arrivals[0] if queue.arrivals else None
+
+    @staticmethod
+    def _forget(queue: _Class) -> None:
+        """Drop finished waiters and, once idle, the per-client finish tags."""
+        while queue.heap and queue.heap[0][2].done:
+            heapq.heappop(queue.heap)
+        if not queue.stats.queued:
+            queue.heap.clear()
+            queue.arrivals.clear()
+            queue.finish.clear()
+
+
+__all__ = [
+    "ANALYSIS_COMMANDS",
+    "ClassStats",
+    "CommandScheduler",
+    "PRIORITIES",
+    "Priority",
+    "command_priority",
+]
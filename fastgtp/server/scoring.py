@@ -0,0 +1,164 @@
+"""Ownership maps and vectorized area/territory scoring.
+
+Ownership values range from -1 (white) to +1 (black) per point, in the
+row-major, top-edge-first layout of :class:`~fastgtp.server.board.Board`.
+Scoring many positions at once needs NumPy, which is an optional dependency
+(``pip install fastgtp[numpy]``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterable, Sequence
+
+from .board import BLACK, EMPTY, WHITE, Board
+from .gtp import parse_raw_nn_plane
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - depends on environment
+        raise RuntimeError("NumPy is required for scoring") from exc
+    return numpy
+
+
+@dataclass(slots=True)
+class ScoreResult:
+    """Score of one position under one counting method."""
+
+    black: float
+    white: float
+    margin: float
+
+    @property
+    def result(self) -> str:
+        """Result in SGF notation such as ``B+3.5``; ``0`` for a draw."""
+        if self.margin > 0:
+            return f"B+{self.margin:g}"
+        if self.margin < 0:
+            return f"W+{-self.margin:g}"
+        return "0"
+
+
+def parse_ownership(payload: str, board_size: tuple[int, int]) -> list[float] | None:
+    """Read ``whiteOwnership`` from ``kata-raw-nn`` output as black-positive."""
+    white = parse_raw_nn_plane(payload, "whiteOwnership", board_size)
+    if white is None:
+        return None
+    return [-value for value in white]
+
+
+def ownership_from_board(board: Board, dead: Iterable[int] = ()) -> list[float]:
+    """Derive ownership from the stones on ``board``.
+
+    Stones at ``dead`` belong to the opponent. Empty regions, with dead stones
+    treated as empty, belong to the only color bordering them and are neutral
+    otherwise, as in Tromp-Taylor scoring.
+    """
+
+    cells = bytearray(board.cells)
+    for index in dead:
+        cells[index] = EMPTY
+    ownership = [0.0] * len(cells)
+    for index, value in enumerate(cells):
+        if value == BLACK:
+            ownership[index] = 1.0
+        elif value == WHITE:
+            ownership[index] = -1.0
+
+    seen: set[int] = set()
+    for index, value in enumerate(cells):
+        if value != EMPTY or index in seen:
+            continue
+        region = [index]
+        seen.add(index)
+        borders: set[int] = set()
+        for point in region:
+            for neighbor in board.neighbors(point):
+                if cells[neighbor] == EMPTY:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        region.append(neighbor)
+                else:
+                    borders.add(cells[neighbor])
+        if len(borders) == 1:
+            owner = 1.0 if BLACK in borders else -1.0
+            for point in region:
+                ownership[point] = owner
+    return ownership
+
+
+def score_positions(
+    stones: np.ndarray,
+    ownership: np.ndarray,
+    komi: Sequence[float] | np.ndarray,
+    captures: Sequence[Sequence[int]] | np.ndarray,
+    *,
+    threshold: float = 0.5,
+) -> tuple[list[ScoreResult], list[ScoreResult]]:
+    """Score a batch of positions by area and by territory.
+
+    Parameters
+    ----------
+    stones:
+        ``(N, P)`` array of board cells (empty, black, white).
+    ownership:
+        ``(N, P)`` black-positive ownership values.
+    komi:
+        ``(N,)`` komi per position.
+    captures:
+        ``(N, 2)`` stones captured during the game by black and by white.
+    threshold:
+        Minimum absolute ownership for a point to count for a player.
+
+    Returns
+    -------
+    tuple[list[ScoreResult], list[ScoreResult]]
+        Area scores and territory scores, one per position. Margins are from
+        black's point of view with komi applied.
+    """
+
+    np = _numpy()
+    stones = np.asarray(stones, dtype=np.uint8)
+    ownership = np.asarray(ownership, dtype=np.float32)
+    komi = np.asarray(komi, dtype=np.float64)
+    captures = np.asarray(captures, dtype=np.int64).reshape(-1, 2)
+
+    black_owned = ownership > threshold
+    white_owned = ownership < -threshold
+    black_stones = stones == BLACK
+    white_stones = stones == WHITE
+    dead_white = (white_stones & black_owned).sum(axis=1)
+    dead_black = (black_stones & white_owned).sum(axis=1)
+
+    black_area = black_owned.sum(axis=1).astype(np.float64)
+    white_area = white_owned.sum(axis=1).astype(np.float64) + komi
+
+    black_territory = (
+        (black_owned & ~black_stones).sum(axis=1) + dead_white + captures[:, 0]
+    ).astype(np.float64)
+    white_territory = (
+        (white_owned & ~white_stones).sum(axis=1) + dead_black + captures[:, 1]
+    ).astype(np.float64) + komi
+
+    area = [
+        ScoreResult(float(b), float(w), float(b - w))
+        for b, w in zip(black_area, white_area)
+    ]
+    territory = [
+        ScoreResult(float(b), float(w), float(b - w))
+        for b, w in zip(black_territory, white_territory)
+    ]
+    return area, territory
+
+
+__all__ = [
+    "ScoreResult",
+    "ownership_from_board",
+    "parse_ownership",
+    "score_positions",
+]
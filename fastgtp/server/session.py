@@ -0,0 +1,356 @@
+"""Per-session state tracked alongside each transport."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from .board import Board
+from .clock import GameClock
+from .events import Event, SessionEvents
+from .gtp import READ_ONLY_COMMANDS, normalize_color, parse_command_line
+
+if TYPE_CHECKING:
+    from .transport import GTPTransport
+
+
+Move = tuple[str, str]
+
+
+@dataclass(frozen=True, slots=True)
+class _MoveNode:
+    move: Move
+    parent: _MoveNode | None
+    length: int
+
+
+class MoveHistory:
+    """Append-only move list whose copies share their common prefix.
+
+    The history is a chain of immutable nodes pointing at their parent, so
+    :meth:`copy` is O(1) and forked games only store the moves they add.
+    """
+
+    __slots__ = ("_tip",)
+
+    def __init__(self, moves: Iterable[Move] = ()):
+        self._tip: _MoveNode | None = None
+        for move in moves:
+            self.append(move)
+
+    @classmethod
+    def _from_tip(cls, tip: _MoveNode | None) -> MoveHistory:
+        history = cls()
+        history._tip = tip
+        return history
+
+    def append(self, move: Move) -> None:
+        length = self._tip.length + 1 if self._tip is not None else 1
+        self._tip = _MoveNode(move, self._tip, length)
+
+    def pop(self) -> Move:
+        if self._tip is None:
+            raise IndexError("pop from empty history")
+        move = self._tip.move
+        self._tip = self._tip.parent
+        return move
+
+    def clear(self) -> None:
+        self._tip = None
+
+    def copy(self) -> MoveHistory:
+        """Return an independent history sharing all current moves."""
+        return MoveHistory._from_tip(self._tip)
+
+    def parent(self) -> MoveHistory:
+        """Return the history without its last move."""
+        return MoveHistory._from_tip(self._tip.parent if self._tip else None)
+
+    @property
+    def last(self) -> Move | None:
+        return self._tip.move if self._tip is not None else None
+
+    def recent(self, count: int) -> list[Move]:
+        """Return up to ``count`` latest moves, most recent first."""
+        moves: list[Move] = []
+        node = self._tip
+        while node is not None and len(moves) < count:
+            moves.append(node.move)
+            node = node.parent
+        return moves
+
+    def __len__(self) -> int:
+        return self._tip.length if self._tip is not None else 0
+
+    def __iter__(self) -> Iterator[Move]:
+        moves: list[Move] = []
+        node = self._tip
+        while node is not None:
+            moves.append(node.move)
+            node = node.parent
+        return reversed(moves)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MoveHistory):
+            return NotImplemented
+        left, right = self._tip, other._tip
+        while left is not right:
+            if left is None or right is None or left.length != right.length:
+                return False
+            if left.move != right.move:
+                return False
+            left, right = left.parent, right.parent
+        return True
+
+    def __repr__(self) -> str:
+        return f"MoveHistory({list(self)!r})"
+
+
+@dataclass(slots=True)
+class EngineUsage:
+    """Accumulated engine time of a session, tenant or command."""
+
+    commands: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    max_wall_seconds: float = 0.0
+
+    def add(self, count: int, wall: float, cpu: float) -> None:
+        self.commands += count
+        self.wall_seconds += wall
+        self.cpu_seconds += cpu
+        if wall > self.max_wall_seconds:
+            self.max_wall_seconds = wall
+
+
+@dataclass(slots=True, eq=False)
+class GTPSession:
+    """A transport together with the server-side state of its game.
+
+    ``version`` increases whenever a command that may change the engine's
+    position is sent, so anything derived from the position can be cached
+    against it.
+
+    ``moves`` records the game as ``(color, vertex)`` pairs together with
+    ``board_size`` and ``komi``. Commands whose effect cannot be followed,
+    such as ``loadsgf``, clear ``history_known`` until the next
+    ``clear_board`` or ``boardsize``.
+
+    ``known_commands`` caches the engine's ``known_command`` answers.
+    ``clock``, when set, is pressed by every recorded move and restarted with
+    each new game. ``events`` receives a delta for every recorded change, so
+    spectators can follow the game without querying the engine. ``usage``
+    accumulates the engine time metered for the session's commands.
+
+    ``generation`` is the engine prototype generation the transport was
+    spawned from, and ``in_flight`` counts the commands currently sent to it,
+    so that the manager can exchange the engine between two commands once
+    :meth:`wait_idle` returns.
+    """
+
+    session_id: str
+    transport: GTPTransport
+    version: int = 0
+    board_size: tuple[int, int] = (19, 19)
+    komi: float | None = None
+    moves: MoveHistory = field(default_factory=MoveHistory)
+    history_known: bool = True
+    known_commands: dict[str, bool] = field(default_factory=dict)
+    clock: GameClock | None = None
+    events: SessionEvents = field(default_factory=SessionEvents)
+    usage: EngineUsage = field(default_factory=EngineUsage)
+    generation: int = 0
+    _in_flight: int = 0
+    _idle_waiters: list[asyncio.Future[None]] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+    sgf_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _sgf: tuple[int, str] | None = None
+    _board: tuple[int, Board] | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @in_flight.setter
+    def in_flight(self, value: int) -> None:
+        self._in_flight = value
+        if not value:
+            waiters, self._idle_waiters = self._idle_waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def wait_idle(self) -> None:
+        """Wait until no command is in flight on the session's engine."""
+        if not self._in_flight:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._idle_waiters.append(waiter)
+        await waiter
+
+    def touch(self) -> None:
+        """Record that the session was just used."""
+        self.last_used = time.monotonic()
+
+    def bump(self) -> int:
+        """Mark the position as changed and return the new version."""
+        self.version += 1
+        return self.version
+
+    def reset(self) -> None:
+        """Forget the game after the engine was restarted from scratch."""
+        self.bump()
+        self.board_size = (19, 19)
+        self.komi = None
+        self.moves.clear()
+        self.history_known = True
+        self.clock = None
+        self._emit_reset()
+
+    @property
+    def to_play(self) -> str:
+        """Color expected to move next, assuming alternating play."""
+        last = self.moves.last
+        return "W" if last is not None and last[0] == "B" else "B"
+
+    def board(self) -> Board:
+        """Return the current position rebuilt from the recorded moves.
+
+        The board is cached per version and must not be modified.
+
+        Raises
+        ------
+        ValueError
+            If the history is unknown or contains moves off the board.
+        """
+
+        if not self.history_known:
+            raise ValueError("Session history is unknown")
+        if self._board is None or self._board[0] != self.version:
+            self._board = (self.version, Board.from_moves(self.board_size, self.moves))
+        return self._board[1]
+
+    def record(self, command: str, payload: str) -> None:
+        """Update the game record after ``command`` succeeded with ``payload``."""
+        try:
+            parsed = parse_command_line(command)
+        except ValueError:
+            return
+        name, args = parsed.name, parsed.arguments
+        if name in READ_ONLY_COMMANDS:
+            return
+        try:
+            if name == "boardsize":
+                x = int(args[0])
+                self.board_size = (x, int(args[1]) if len(args) > 1 else x)
+                self._new_game()
+            elif name == "clear_board":
+                self._new_game()
+            elif name == "komi":
+                self.komi = float(args[0])
+                self._emit("komi", komi=self.komi)
+            elif name == "play":
+                self._move(normalize_color(args[0]), args[1].upper())
+            elif name == "genmove":
+                color = normalize_color(args[0])
+                move = payload.strip().upper()
+                if move == "RESIGN":
+                    self._emit("resign", color=color)
+                else:
+                    self._move(color, move)
+            elif name == "undo" and self.moves:
+                self.moves.pop()
+                self._emit("undo", number=len(self.moves))
+            else:
+                self._lose_history()
+        except (IndexError, ValueError):
+            self._lose_history()
+
+    def _new_game(self) -> None:
+        self.moves.clear()
+        self.history_known = True
+        if self.clock is not None:
+            self.clock.reset()
+        self._emit_reset()
+
+    def _move(self, color: str, vertex: str) -> None:
+        self.moves.append((color, vertex))
+        if self.clock is not None:
+            self.clock.press(color)
+        self._emit("move", color=color, vertex=vertex, number=len(self.moves))
+
+    def _lose_history(self) -> None:
+        self.history_known = False
+        self._emit("unknown")
+
+    def _emit(self, type: str, **fields: object) -> None:
+        # Events are only encoded when somebody is watching.
+        if self.events:
+            self.events.publish(Event.create(type, self.version, **fields))
+
+    def _emit_reset(self) -> None:
+        self._emit("reset", board_size=list(self.board_size), komi=self.komi)
+
+    def snapshot(self) -> Event:
+        """Return the event a new spectator starts from."""
+        return Event.create(
+            "snapshot",
+            self.version,
+            board_size=list(self.board_size),
+            komi=self.komi,
+            history_known=self.history_known,
+            to_play=self.to_play,
+            moves=[list(move) for move in self.moves],
+        )
+
+    def fork(self, session_id: str, transport: GTPTransport) -> GTPSession:
+        """Return a child session starting from this session's position."""
+        return GTPSession(
+            session_id,
+            transport,
+            board_size=self.board_size,
+            komi=self.komi,
+            moves=self.moves.copy(),
+            history_known=self.history_known,
+        )
+
+    def replay_commands(self) -> list[str]:
+        """Return the commands that recreate the current position."""
+        commands = self.setup_commands()
+        commands.extend(f"play {color} {vertex}" for color, vertex in self.moves)
+        return commands
+
+    def setup_commands(self) -> list[str]:
+        """Return the commands that recreate the empty board of this game."""
+        x, y = self.board_size
+        commands = [f"boardsize {x}" if x == y else f"boardsize {x} {y}", "clear_board"]
+        if self.komi is not None:
+            commands.append(f"komi {self.komi}")
+        if self.clock is not None:
+            commands.append(self.clock.settings_command)
+        return commands
+
+    @property
+    def etag(self) -> str:
+        """Entity tag identifying the current position version."""
+        return self.etag_for(self.version)
+
+    def etag_for(self, version: int) -> str:
+        """Entity tag identifying the position at ``version``."""
+        return f'"{self.session_id}-{version}"'
+
+    def cached_sgf(self) -> str | None:
+        """Return the SGF export if it was taken at the current version."""
+        if self._sgf is not None and self._sgf[0] == self.version:
+            return self._sgf[1]
+        return None
+
+    def store_sgf(self, version: int, sgf: str) -> None:
+        """Cache ``sgf`` as the export taken at ``version``."""
+        if version == self.version:
+            self._sgf = (version, sgf)
+
+
+__all__ = ["EngineUsage", "GTPSession", "Move", "MoveHistory"]
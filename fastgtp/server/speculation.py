@@ -0,0 +1,274 @@
+"""Speculative pondering for human-vs-bot games.
+
+After the bot moves, a spare engine replays the game, predicts the opponent's
+most likely replies and generates the bot's answer to each of them. When the
+opponent then plays one of the predicted moves, the next ``genmove`` is served
+from the precomputed answer and only a ``play`` reaches the session's engine.
+
+Replies are predicted from the policy reported by ``kata-raw-nn`` on KataGo.
+Other engines fall back to ``reg_genmove``, which yields a single prediction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass, field
+
+from .gtp import format_vertex, parse_raw_nn_plane, parse_response
+from .session import GTPSession, MoveHistory
+from .transport import GTPTransport
+
+
+@dataclass(slots=True)
+class SpeculationMetrics:
+    """Counters describing how well speculation pays off."""
+
+    jobs: int = 0
+    skipped: int = 0
+    failed: int = 0
+    predictions: int = 0
+    hits: int = 0
+    misses: int = 0
+    compute_seconds: float = 0.0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def wasted_seconds(self) -> float:
+        """Engine time spent on predictions that were never used."""
+        return max(0.0, self.compute_seconds - self.saved_seconds)
+
+
+@dataclass(slots=True)
+class _Speculation:
+    base: MoveHistory
+    board_size: tuple[int, int]
+    bot: str
+    replies: dict[str, tuple[str, float]] = field(default_factory=dict)
+
+
+def _opponent(color: str) -> str:
+    return "W" if color == "B" else "B"
+
+
+async def _ask(transport: GTPTransport, command: str) -> str:
+    structured = parse_response(await transport.send_command(command))
+    if not structured.success:
+        raise RuntimeError(structured.error or f"{command} failed")
+    return structured.payload
+
+
+def parse_policy(payload: str, board_size: tuple[int, int]) -> list[tuple[float, str]]:
+    """Extract ``(probability, vertex)`` pairs from ``kata-raw-nn`` output.
+
+    Occupied points are reported as ``NAN`` and skipped.
+    """
+
+    width, height = board_size
+    policy = parse_raw_nn_plane(payload, "policy", board_size) or []
+    moves: list[tuple[float, str]] = []
+    for index, probability in enumerate(policy):
+        if probability == probability:  # skip NAN
+            row, column = divmod(index, width)
+            moves.append((probability, format_vertex(column, height - 1 - row)))
+    return moves
+
+
+class Speculator:
+    """Precompute ``genmove`` answers to the opponent's likely replies.
+
+    Parameters
+    ----------
+    transport:
+        Prototype copied to create the spare engines.
+    top_k:
+        Number of opponent replies to precompute per bot move.
+    spares:
+        Maximum number of spare engines. A speculation is skipped when all of
+        them are busy, so pondering never queues behind itself.
+    """
+
+    def __init__(self, transport: GTPTransport, *, top_k: int = 3, spares: int = 1):
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        if spares < 1:
+            raise ValueError("spares must be at least 1")
+        self._prototype = transport
+        self._top_k = top_k
+        self._spares = spares
+        self._opened = 0
+        self._idle: list[GTPTransport] = []
+        self._all: list[GTPTransport] = []
+        self._policy_command: dict[int, str | None] = {}
+        self._speculations: dict[str, _Speculation] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.metrics = SpeculationMetrics()
+
+    def schedule(self, session: GTPSession, bot: str) -> None:
+        """Start pondering on the opponent's reply to the bot's last move."""
+        if not session.history_known:
+            return
+        if not self._idle and self._opened >= self._spares:
+            self.metrics.skipped += 1
+            return
+        speculation = _Speculation(
+            base=session.moves.copy(), board_size=session.board_size, bot=bot
+        )
+        self._speculations[session.session_id] = speculation
+        self.metrics.jobs += 1
+        task = asyncio.create_task(self._run(speculation, session.setup_commands()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def take(self, session: GTPSession, color: str) -> str | None:
+        """Return a precomputed move if the game followed a prediction."""
+        speculation = self._speculations.pop(session.session_id, None)
+        if speculation is None:
+            return None
+        moves = session.moves
+        last = moves.last
+        hit: tuple[str, float] | None = None
+        if (
+            color == speculation.bot
+            and session.history_known
+            and last is not None
+            and last[0] == _opponent(speculation.bot)
+            and moves.parent() == speculation.base
+        ):
+            hit = speculation.replies.get(last[1])
+        if hit is None:
+            self.metrics.misses += 1
+            return None
+        self.metrics.hits += 1
+        self.metrics.saved_seconds += hit[1]
+        return hit[0]
+
+    def discard(self, session_id: str) -> None:
+        """Drop any pending speculation for a closed session."""
+        self._speculations.pop(session_id, None)
+
+    async def swap_engine(self, transport: GTPTransport) -> None:
+        """Ponder on engines copied from ``transport`` from now on.
+
+        Running speculations are cancelled, moves precomputed by the old
+        engine are dropped and its spares closed.
+        """
+        self._prototype = transport
+        await self.aclose()
+        self._policy_command.clear()
+
+    async def aclose(self) -> None:
+        """Cancel pondering and close the spare engines."""
+        for task in list(self._tasks):
+            task.cancel()
+        for task in list(self._tasks):
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await asyncio.gather(
+            *(transport.aclose() for transport in self._all), return_exceptions=True
+        )
+        self._idle.clear()
+        self._all.clear()
+        self._opened = 0
+        self._speculations.clear()
+
+    async def _acquire(self) -> GTPTransport | None:
+        if self._idle:
+            return self._idle.pop()
+        if self._opened >= self._spares:
+            return None
+        self._opened += 1
+        transport = self._prototype.copy()
+        try:
+            await transport.open()
+        except BaseException:
+            self._opened -= 1
+            raise
+        self._all.append(transport)
+        return transport
+
+    async def _policy(self, transport: GTPTransport) -> str | None:
+        key = id(transport)
+        if key not in self._policy_command:
+            commands = (await _ask(transport, "list_commands")).split()
+            if "kata-raw-nn" in commands:
+                self._policy_command[key] = "kata-raw-nn"
+            elif "reg_genmove" in commands:
+                self._policy_command[key] = "reg_genmove"
+            else:
+                self._policy_command[key] = None
+        return self._policy_command[key]
+
+    async def _predict(
+        self, transport: GTPTransport, opponent: str, board_size: tuple[int, int]
+    ) -> list[str]:
+        command = await self._policy(transport)
+        if command == "kata-raw-nn":
+            payload = await _ask(transport, "kata-raw-nn 0")
+            ranked = sorted(parse_policy(payload, board_size), reverse=True)
+            return [vertex for _, vertex in ranked[: self._top_k]]
+        if command == "reg_genmove":
+            move = (await _ask(transport, f"reg_genmove {opponent}")).upper()
+            return [move] if move not in ("PASS", "RESIGN") else []
+        return []
+
+    async def _run(self, speculation: _Speculation, setup: list[str]) -> None:
+        try:
+            transport = await self._acquire()
+        except Exception:
+            self.metrics.failed += 1
+            return
+        if transport is None:
+            self.metrics.skipped += 1
+            return
+        healthy = False
+        try:
+            for command in setup:
+                await _ask(transport, command)
+            for color, vertex in speculation.base:
+                await _ask(transport, f"play {color} {vertex}")
+
+            opponent = _opponent(speculation.bot)
+            replies = await self._predict(transport, opponent, speculation.board_size)
+            for reply in replies:
+                await _ask(transport, f"play {opponent} {reply}")
+                started = time.perf_counter()
+                move = await _ask(transport, f"genmove {speculation.bot}")
+                elapsed = time.perf_counter() - started
+                self.metrics.compute_seconds += elapsed
+                self.metrics.predictions += 1
+                if move.upper() != "RESIGN":
+                    # A resignation is left to the session's own engine, so
+                    # that it is recorded and announced like any other.
+                    speculation.replies[reply] = (move, elapsed)
+                    await _ask(transport, "undo")
+                await _ask(transport, "undo")
+            healthy = True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.metrics.failed += 1
+        finally:
+            if healthy:
+                self._idle.append(transport)
+            else:
+                # The engine may be mid-command or out of sync; start afresh.
+                if transport in self._all:
+                    self._all.remove(transport)
+                    self._opened -= 1
+                self._policy_command.pop(id(transport), None)
+                with contextlib.suppress(Exception):
+                    await transport.aclose()
+
+
+__all__ = [
+    "SpeculationMetrics",
+    "Speculator",
+    "parse_policy",
+]
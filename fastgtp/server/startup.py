@@ -0,0 +1,103 @@
+"""Engine warm-up run when the application starts.
+
+The warm-up runs in the background so that the server answers liveness
+probes at once, while readiness is withheld until engines have been spawned
+and have passed their handshake. A misconfigured engine command therefore
+fails the deployment's readiness check instead of its first users.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from typing import Literal, Sequence
+
+from .transport import GTPTransportManager
+
+StartupStatus = Literal["pending", "starting", "ready", "failed"]
+
+
+class Startup:
+    """Spawn and validate warm engines before the server reports ready.
+
+    Parameters
+    ----------
+    manager:
+        Manager whose warm pool is filled.
+    engines:
+        Engines spawned and handshaken in parallel.
+    required_commands:
+        GTP commands every engine must list, e.g. ``kata-raw-nn``.
+    timeout:
+        Seconds the whole warm-up may take before it is considered failed.
+    """
+
+    def __init__(
+        self,
+        manager: GTPTransportManager,
+        engines: int = 1,
+        *,
+        required_commands: Sequence[str] = (),
+        timeout: float | None = None,
+    ):
+        if engines < 1:
+            raise ValueError("engines must be at least 1")
+        self._manager = manager
+        self._engines = engines
+        self._required_commands = tuple(required_commands)
+        self._timeout = timeout
+        self._task: asyncio.Task[None] | None = None
+        self.status: StartupStatus = "pending"
+        self.error: str | None = None
+        self.commands: list[str] = []
+        self.duration: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self) -> None:
+        """Start the warm-up in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def wait(self) -> bool:
+        """Wait for a started warm-up to finish and return whether it succeeded."""
+        if self._task is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await asyncio.shield(self._task)
+        return self.ready
+
+    async def stop(self) -> None:
+        """Cancel the warm-up if it is still running."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def run(self) -> None:
+        """Spawn the engines, recording the outcome instead of raising it."""
+        self.status = "starting"
+        started = time.monotonic()
+        try:
+            self.commands = await asyncio.wait_for(
+                self._manager.start(
+                    self._engines, required_commands=self._required_commands
+                ),
+                self._timeout,
+            )
+        except asyncio.TimeoutError:
+            self.status = "failed"
+            self.error = f"Engines did not start within {self._timeout}s"
+        except Exception as exc:
+            self.status = "failed"
+            self.error = str(exc) or type(exc).__name__
+        else:
+            self.status = "ready"
+        finally:
+            self.duration = time.monotonic() - started
+
+
+__all__ = ["Startup", "StartupStatus"]
@@ -4,10 +4,99 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import os
 import shlex
+import time
 import uuid
 from asyncio.subprocess import PIPE, Process
-from typing import Protocol, Sequence
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Protocol, Sequence
+
+from .events import Event
+from .gtp import parse_command_line, parse_response
+from .registry import SessionRegistry
+from .session import GTPSession
+
+if TYPE_CHECKING:
+    from .placement import PlacementScheduler
+
+# Times a migration replays a session that keeps changing before requeuing it.
+_MIGRATION_ATTEMPTS = 5
+
+
+class AdmissionError(RuntimeError):
+    """Raised when a request cannot be admitted because capacity is exhausted.
+
+    ``retry_after`` is a hint, in seconds, for when the caller may try again.
+    """
+
+    def __init__(self, message: str, *, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EngineCapacityError(AdmissionError):
+    """Raised when no more engine processes may be spawned."""
+
+
+class QueueFullError(AdmissionError):
+    """Raised when too many commands are already queued on one transport."""
+
+
+class QueueTimeoutError(AdmissionError):
+    """Raised when a queued command waited too long for the transport."""
+
+
+class EngineStartupError(RuntimeError):
+    """Raised when a freshly spawned engine fails its handshake."""
+
+
+class CommandTurn(Protocol):
+    """Callbacks around the time commands occupy an engine.
+
+    Set through :data:`command_turn` by callers that ration engine time.
+    """
+
+    async def acquire(self, commands: int) -> None:
+        """Wait until ``commands`` may be sent; the engine is free for them."""
+
+    def release(self, seconds: float) -> None:
+        """Report that the commands were answered after ``seconds`` of work."""
+
+
+# Turn of the commands being sent in this context. Transports whose
+# ``reports_turns`` is true acquire it only once they could write the
+# commands, so time spent queueing for the transport is not counted.
+command_turn: ContextVar[CommandTurn | None] = ContextVar(
+    "fastgtp_command_turn", default=None
+)
+
+
+@contextlib.asynccontextmanager
+async def _turn(commands: int) -> AsyncIterator[None]:
+    """Hold the current :data:`command_turn` while the block talks to the engine."""
+    turn = command_turn.get()
+    if turn is None:
+        yield
+        return
+    await turn.acquire(commands)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        turn.release(time.perf_counter() - started)
+
+
+@dataclass(slots=True, eq=False)
+class _Sent:
+    """A pipelined command waiting for its response."""
+
+    identifier: str | None
+    future: asyncio.Future[str]
+    written: float
+    seconds: float = 0.0
 
 
 class GTPTransport(Protocol):
@@ -27,19 +116,99 @@ class GTPTransport(Protocol):
 
 
 class SubprocessGTPTransport(GTPTransport):
-    """Execute GTP commands by interacting with an external engine process."""
+    """Execute GTP commands by interacting with an external engine process.
 
-    def __init__(self, command: Sequence[str] | str):
+    By default one command is on the wire at a time. With ``pipelined=True``
+    commands are written as soon as they arrive, tagged with increasing GTP
+    ids, while a single reader task matches responses to waiting callers in
+    FIFO order. ``max_queue_depth`` then bounds the commands in flight.
+    """
+
+    reports_turns = True
+
+    def __init__(
+        self,
+        command: Sequence[str] | str,
+        *,
+        max_queue_depth: int | None = None,
+        queue_timeout: float | None = None,
+        retry_after: float = 1.0,
+        pipelined: bool = False,
+    ):
         if isinstance(command, str):
             parsed = tuple(shlex.split(command))
         else:
             parsed = tuple(command)
         if not parsed:
             raise ValueError("GTP executable command cannot be empty")
+        if max_queue_depth is not None and max_queue_depth < 1:
+            raise ValueError("max_queue_depth must be at least 1")
 
         self._command: tuple[str, ...] = parsed
         self._process: Process | None = None
         self._lock = asyncio.Lock()
+        self._max_queue_depth = max_queue_depth
+        self._queue_timeout = queue_timeout
+        self._retry_after = retry_after
+        self._queued = 0
+        self._cpus: frozenset[int] | None = None
+        self._extra_args: tuple[str, ...] = ()
+        self._pipelined = pipelined
+        self._next_id = 0
+        self._pending: deque[_Sent] = deque()
+        self._answered = 0.0
+        self._reader: asyncio.Task[None] | None = None
+
+    def place(self, cpus: frozenset[int] | None, extra_args: Sequence[str] = ()) -> None:
+        """Pin the engine to ``cpus`` and append ``extra_args`` on next spawn."""
+        self._cpus = cpus
+        self._extra_args = tuple(extra_args)
+
+    @property
+    def cpus(self) -> frozenset[int] | None:
+        """CPU set the engine is pinned to, if any."""
+        return self._cpus
+
+    @property
+    def pid(self) -> int | None:
+        """Process id of the running engine, if any."""
+        if self._process is None or self._process.returncode is not None:
+            return None
+        return self._process.pid
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of commands currently waiting for or holding the transport."""
+        return self._queued
+
+    @contextlib.asynccontextmanager
+    async def _enqueue(self) -> AsyncIterator[None]:
+        """Count a command against the queue depth limit while it is pending."""
+        if self._max_queue_depth is not None and self._queued >= self._max_queue_depth:
+            raise QueueFullError(
+                f"Too many queued commands (limit {self._max_queue_depth})",
+                retry_after=self._retry_after,
+            )
+        self._queued += 1
+        try:
+            yield
+        finally:
+            self._queued -= 1
+
+    @contextlib.asynccontextmanager
+    async def _locked(self) -> AsyncIterator[None]:
+        """Hold the transport lock, waiting at most ``queue_timeout`` for it."""
+        try:
+            await asyncio.wait_for(self._lock.acquire(), self._queue_timeout)
+        except asyncio.TimeoutError as exc:
+            raise QueueTimeoutError(
+                f"Timed out after {self._queue_timeout}s waiting for the engine",
+                retry_after=self._retry_after,
+            ) from exc
+        try:
+            yield
+        finally:
+            self._lock.release()
 
     async def open(self) -> None:
         """Spawn the subprocess if needed."""
@@ -58,102 +227,834 @@ class SubprocessGTPTransport(GTPTransport):
                 with contextlib.suppress(ProcessLookupError):
                     await self._process.wait()
             self._process = None
+            await self._stop_reader()
+
+    async def _stop_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader
+            self._reader = None
+        self._fail_pending(RuntimeError("GTP engine was closed"))
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        while self._pending:
+            future = self._pending.popleft().future
+            if not future.done():
+                future.set_exception(exc)
 
     async def _ensure_process(self) -> Process:
+        if self._pipelined and self._reader is not None and self._reader.done():
+            # The reader only stops when the engine's output ended.
+            if self._process is not None and self._process.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    self._process.kill()
+                await self._process.wait()
+            self._reader = None
         if self._process is None or self._process.returncode is not None:
             self._process = await asyncio.create_subprocess_exec(
                 *self._command,
+                *self._extra_args,
                 stdin=PIPE,
                 stdout=PIPE,
                 stderr=PIPE,
             )
+            if self._cpus and hasattr(os, "sched_setaffinity"):
+                # Pinned before the handshake, so the search threads the
+                # engine starts later inherit the CPU set. No pre-exec hook:
+                # it is unsafe with threads and disables the vfork fast path.
+                with contextlib.suppress(ProcessLookupError):
+                    os.sched_setaffinity(self._process.pid, self._cpus)
+            if self._pipelined:
+                self._reader = asyncio.create_task(self._read_responses(self._process))
         return self._process
 
+    async def _read_response(self, process: Process) -> str:
+        """Read one blank-line terminated response from the engine."""
+        assert process.stdout is not None
+        lines: list[str] = []
+        while True:
+            line_bytes = await process.stdout.readline()
+            if not line_bytes:
+                stderr_output = ""
+                if process.stderr is not None:
+                    remaining = await process.stderr.read()
+                    stderr_output = remaining.decode("utf-8", errors="replace")
+                raise RuntimeError(
+                    "GTP engine terminated unexpectedly"
+                    + (f": {stderr_output.strip()}" if stderr_output else "")
+                )
+
+            decoded = line_bytes.decode("utf-8", errors="replace")
+            lines.append(decoded)
+            if decoded.strip() == "":
+                return "".join(lines)
+
+    async def _read_responses(self, process: Process) -> None:
+        """Resolve pending pipelined commands in the order they were written."""
+        try:
+            while True:
+                raw = await self._read_response(process)
+                if not self._pending:
+                    continue
+                sent = self._pending.popleft()
+                # The engine answers in order, so it started on this command
+                # once it was written and the previous one was answered.
+                now = time.perf_counter()
+                sent.seconds = now - max(sent.written, self._answered)
+                self._answered = now
+                if not sent.future.done():
+                    if sent.identifier is not None:
+                        raw = _strip_identifier(raw, sent.identifier)
+                    sent.future.set_result(raw)
+        except Exception as exc:
+            self._fail_pending(exc)
+
     async def send_command(self, command: str) -> str:
-        async with self._lock:
+        stripped = command.strip()
+        if not stripped:
+            raise ValueError("GTP command cannot be empty")
+        if self._pipelined:
+            return await self._send_pipelined(stripped)
+
+        async with self._enqueue(), self._locked(), _turn(1):
             process = await self._ensure_process()
             if process.stdin is None or process.stdout is None:
                 raise RuntimeError("GTP engine streams are not available")
 
-            stripped = command.strip()
-            if not stripped:
-                raise ValueError("GTP command cannot be empty")
-
             process.stdin.write((stripped + "\n").encode("utf-8"))
             await process.stdin.drain()
+            return await self._read_response(process)
 
-            lines: list[str] = []
-            while True:
-                line_bytes = await process.stdout.readline()
-                if not line_bytes:
-                    stderr_output = ""
-                    if process.stderr is not None:
-                        remaining = await process.stderr.read()
-                        stderr_output = remaining.decode("utf-8", errors="replace")
-                    raise RuntimeError(
-                        "GTP engine terminated unexpectedly"
-                        + (f": {stderr_output.strip()}" if stderr_output else "")
-                    )
-
-                decoded = line_bytes.decode("utf-8", errors="replace")
-                lines.append(decoded)
-                if decoded.strip() == "":
-                    break
+    async def send_commands(self, commands: Sequence[str]) -> list[str]:
+        """Send several commands back to back and return their raw responses.
+
+        All commands are written without waiting for earlier responses, so
+        the engine works through them in one burst even when the transport is
+        not pipelined. Responses are returned in the order of ``commands``.
+        """
+        stripped = [command.strip() for command in commands]
+        if not all(stripped):
+            raise ValueError("GTP command cannot be empty")
+        if not stripped:
+            return []
+
+        if self._pipelined:
+            async with self._enqueue():
+                async with self._pipelined_turn(len(stripped)) as sent:
+                    async with self._locked():
+                        process = await self._ensure_process()
+                        sent.extend(
+                            self._write_tagged(process, command)
+                            for command in stripped
+                        )
+                        await self._drain(process)
+                    return list(await asyncio.gather(*(s.future for s in sent)))
+
+        async with self._enqueue(), self._locked(), _turn(len(stripped)):
+            process = await self._ensure_process()
+            stdin = process.stdin
+            if stdin is None or process.stdout is None:
+                raise RuntimeError("GTP engine streams are not available")
+
+            # Read while writing so a long burst cannot fill the engine's
+            # stdout pipe and stall it before all commands are written.
+            async def write() -> None:
+                for command in stripped:
+                    stdin.write((command + "\n").encode("utf-8"))
+                    await stdin.drain()
+
+            async def read() -> list[str]:
+                return [await self._read_response(process) for _ in stripped]
+
+            _, responses = await asyncio.gather(write(), read())
+            return responses
+
+    async def _send_pipelined(self, command: str) -> str:
+        async with self._enqueue():
+            async with self._pipelined_turn(1) as sent:
+                async with self._locked():
+                    process = await self._ensure_process()
+                    sent.append(self._write_tagged(process, command))
+                    await self._drain(process)
+                return await sent[0].future
+
+    @contextlib.asynccontextmanager
+    async def _pipelined_turn(self, commands: int) -> AsyncIterator[list[_Sent]]:
+        """Hold the current turn from before writing until the answers arrive.
+
+        The turn is acquired before the transport lock, which is only held
+        while writing; it is released with the engine time of the commands
+        written into the yielded list.
+        """
+        sent: list[_Sent] = []
+        turn = command_turn.get()
+        if turn is not None:
+            await turn.acquire(commands)
+        try:
+            yield sent
+        finally:
+            if turn is not None:
+                turn.release(sum(entry.seconds for entry in sent))
+
+    def _write_tagged(self, process: Process, command: str) -> _Sent:
+        """Write ``command`` tagged with the next GTP id and track its response."""
+        if process.stdin is None or process.stdout is None:
+            raise RuntimeError("GTP engine streams are not available")
+
+        identifier: str | None = None
+        if parse_command_line(command).identifier is None:
+            self._next_id += 1
+            identifier = str(self._next_id)
+            command = f"{identifier} {command}"
 
-            return "".join(lines)
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        sent = _Sent(identifier, future, time.perf_counter())
+        self._pending.append(sent)
+        process.stdin.write((command + "\n").encode("utf-8"))
+        return sent
+
+    async def _drain(self, process: Process) -> None:
+        if process.stdin is not None:
+            await process.stdin.drain()
 
     def copy(self) -> SubprocessGTPTransport:
-        """Create a fresh transport with the same command."""
-        return SubprocessGTPTransport(self._command)
+        """Create a fresh transport with the same command and limits."""
+        return SubprocessGTPTransport(
+            self._command,
+            max_queue_depth=self._max_queue_depth,
+            queue_timeout=self._queue_timeout,
+            retry_after=self._retry_after,
+            pipelined=self._pipelined,
+        )
+
+
+async def send_commands(transport: GTPTransport, commands: Sequence[str]) -> list[str]:
+    """Send ``commands`` in order through ``transport`` as one burst if possible.
+
+    Transports providing ``send_commands`` receive the whole batch; others get
+    the commands one at a time.
+    """
+    batch = getattr(transport, "send_commands", None)
+    if batch is not None:
+        return await batch(commands)
+    return [await transport.send_command(command) for command in commands]
+
+
+async def handshake(
+    transport: GTPTransport, required_commands: Sequence[str] = ()
+) -> list[str]:
+    """Check that ``transport`` speaks GTP version 2 and return its commands.
+
+    Raises
+    ------
+    EngineStartupError
+        If the engine does not answer, reports another protocol version or
+        lacks one of ``required_commands``.
+    """
+    try:
+        version, listed = await send_commands(
+            transport, ["protocol_version", "list_commands"]
+        )
+        version_response = parse_response(version)
+        commands_response = parse_response(listed)
+    except (OSError, RuntimeError, ValueError) as exc:
+        raise EngineStartupError(f"Engine did not answer the handshake: {exc}") from exc
+    if not version_response.success or version_response.payload.strip() != "2":
+        raise EngineStartupError(
+            f"Engine does not speak GTP version 2: {version_response.payload!r}"
+        )
+    if not commands_response.success:
+        raise EngineStartupError(
+            commands_response.error or "Engine failed to list its commands"
+        )
+    commands = [line.strip() for line in commands_response.payload.splitlines()]
+    commands = [command for command in commands if command]
+    missing = sorted(set(required_commands) - set(commands))
+    if missing:
+        raise EngineStartupError(f"Engine lacks required commands: {', '.join(missing)}")
+    return commands
+
+
+def _strip_identifier(raw: str, identifier: str) -> str:
+    """Remove the GTP id added by the transport from a response status line."""
+    lines = raw.split("\n")
+    for index, line in enumerate(lines):
+        status = line.lstrip()
+        if status[:1] not in ("=", "?"):
+            continue
+        rest = status[1:]
+        following = rest[len(identifier) : len(identifier) + 1]
+        if rest.startswith(identifier) and following in ("", " ", "\t", "\r"):
+            lines[index] = status[0] + rest[len(identifier) :]
+        break
+    return "\n".join(lines)
+
+
+@dataclass(slots=True)
+class EngineSwap:
+    """Progress of migrating sessions onto a new engine prototype.
+
+    ``sessions`` counts the sessions found on older engines, of which
+    ``migrated`` were moved, ``failed`` could not be and ``skipped`` stay on
+    their engine because their history is unknown or they were closed.
+    """
+
+    generation: int
+    label: str | None = None
+    sessions: int = 0
+    migrated: int = 0
+    failed: int = 0
+    skipped: int = 0
+    done: bool = False
+    error: str | None = None
 
 
 class GTPTransportManager:
-    """Manage transport instances keyed by session identifiers."""
+    """Manage transport instances keyed by session identifiers.
+
+    ``max_engines`` caps the number of live transports. When the cap is
+    reached, ``open_session`` waits up to ``spawn_timeout`` seconds for a slot
+    and then raises :class:`EngineCapacityError` carrying ``retry_after``.
+
+    ``placement`` assigns every spawned engine a CPU set. It applies to
+    transports providing a ``place(cpus, extra_args)`` method.
 
-    def __init__(self, transport: GTPTransport):
+    Sessions live in a :class:`SessionRegistry` split into ``shards``.
+    ``close_all`` closes at most ``close_concurrency`` transports at a time.
+
+    ``warm_engines`` keeps that many spawned engines idle so new and forked
+    sessions skip the engine start-up. Warm engines count towards
+    ``max_engines`` and are only replenished while capacity is free.
+
+    :meth:`swap_engine` replaces the prototype at runtime and migrates live
+    sessions onto engines of the new one without dropping their games.
+    """
+
+    def __init__(
+        self,
+        transport: GTPTransport,
+        *,
+        max_engines: int | None = None,
+        spawn_timeout: float = 0.0,
+        retry_after: float = 1.0,
+        placement: PlacementScheduler | None = None,
+        shards: int = 16,
+        close_concurrency: int = 32,
+        warm_engines: int = 0,
+    ):
+        if max_engines is not None and max_engines < 1:
+            raise ValueError("max_engines must be at least 1")
+        if close_concurrency < 1:
+            raise ValueError("close_concurrency must be at least 1")
         self._transport = transport
-        self._sessions: dict[str, GTPTransport] = {}
-        self._lock = asyncio.Lock()
+        self._sessions: SessionRegistry[GTPSession] = SessionRegistry(shards)
+        self._close_concurrency = close_concurrency
+        self._max_engines = max_engines
+        self._spawn_timeout = spawn_timeout
+        self._retry_after = retry_after
+        self._slots = (
+            asyncio.Semaphore(max_engines) if max_engines is not None else None
+        )
+        self._placement = placement
+        self._warm_target = warm_engines
+        self._warm: list[GTPTransport] = []
+        self._warming = 0
+        self._background: set[asyncio.Task[None]] = set()
+        self._required_commands: tuple[str, ...] = ()
+        self._generation = 0
+        self._swap: EngineSwap | None = None
+        self._migration: asyncio.Task[None] | None = None
+        self._migration_concurrency = 1
+        self._attempted: set[str] = set()
+
+    async def _acquire_slot(self) -> None:
+        if self._slots is None:
+            return
+        if self._slots.locked() and self._spawn_timeout <= 0:
+            raise EngineCapacityError(
+                f"Engine capacity exhausted (limit {self._max_engines})",
+                retry_after=self._retry_after,
+            )
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._spawn_timeout or None)
+        except asyncio.TimeoutError as exc:
+            raise EngineCapacityError(
+                f"Engine capacity exhausted (limit {self._max_engines})",
+                retry_after=self._retry_after,
+            ) from exc
+
+    def _release_slot(self) -> None:
+        if self._slots is not None:
+            self._slots.release()
+
+    def _place(self, transport: GTPTransport) -> None:
+        place = getattr(transport, "place", None)
+        if self._placement is None or place is None:
+            return
+        cpus = self._placement.assign(transport)
+        place(cpus, self._placement.command_args(cpus))
+
+    def _release(self, transport: GTPTransport) -> None:
+        self._release_slot()
+        if self._placement is not None:
+            self._placement.release(transport)
+
+    async def _spawn(
+        self, prototype: GTPTransport | None = None, *, slot: bool = True
+    ) -> GTPTransport:
+        """Open a new transport copied from ``prototype`` or the current one.
+
+        With ``slot`` the caller has acquired a slot for the transport, which
+        is released again if it fails to open.
+        """
+        transport: GTPTransport | None = None
+        try:
+            transport = (prototype or self._transport).copy()
+            if asyncio.iscoroutine(transport):  # pragma: no cover - defensive
+                transport = await transport  # type: ignore[assignment]
+            self._place(transport)
+            await transport.open()
+        except BaseException:
+            if transport is not None and self._placement is not None:
+                self._placement.release(transport)
+            if slot:
+                self._release_slot()
+            raise
+        return transport
+
+    async def _checkout(self) -> tuple[GTPTransport, int]:
+        """Take a warm transport or spawn a new one, with its generation."""
+        generation = self._generation
+        if self._warm:
+            transport = self._warm.pop()
+        else:
+            await self._acquire_slot()
+            generation = self._generation
+            transport = await self._spawn()
+        self._replenish()
+        return transport, generation
+
+    @property
+    def warm_engines(self) -> int:
+        """Number of idle engines ready to back new sessions."""
+        return len(self._warm)
+
+    def _replenish(self) -> None:
+        while len(self._warm) + self._warming < self._warm_target:
+            if self._slots is not None and self._slots.locked():
+                return
+            self._warming += 1
+            task = asyncio.create_task(self._warm_one())
+            self._background.add(task)
+            task.add_done_callback(self._warmed)
+
+    def _warmed(self, task: asyncio.Task[None]) -> None:
+        self._warming -= 1
+        self._background.discard(task)
+
+    async def _warm_one(self) -> None:
+        try:
+            if self._slots is not None:
+                if self._slots.locked():
+                    return
+                await self._slots.acquire()
+            generation = self._generation
+            transport = await self._spawn()
+            if generation != self._generation:
+                await self._discard(transport)
+            else:
+                self._warm.append(transport)
+        except Exception:
+            # Warming is opportunistic; the next checkout spawns on demand.
+            pass
+
+    async def warm_up(self) -> None:
+        """Spawn engines in parallel until the warm pool is full."""
+        self._replenish()
+        await asyncio.gather(*list(self._background), return_exceptions=True)
+
+    @property
+    def has_capacity(self) -> bool:
+        """Whether a new session would get an engine without waiting."""
+        return bool(self._warm) or self._slots is None or not self._slots.locked()
+
+    async def start(
+        self, engines: int = 1, *, required_commands: Sequence[str] = ()
+    ) -> list[str]:
+        """Spawn and handshake ``engines`` warm engines in parallel.
+
+        Unlike :meth:`warm_up`, failures are not ignored: if any engine fails
+        to start or to pass :func:`handshake`, every engine spawned here is
+        closed and the error is raised. The count is capped at
+        ``max_engines``. Returns the commands the engines listed.
+
+        Raises
+        ------
+        EngineStartupError
+            If an engine could not be spawned or failed its handshake.
+        """
+
+        self._required_commands = tuple(required_commands)
+        if self._max_engines is not None:
+            engines = min(engines, self._max_engines)
+
+        spawned: list[GTPTransport] = []
+
+        async def spawn() -> list[str]:
+            await self._acquire_slot()
+            try:
+                transport = await self._spawn()
+            except (OSError, ValueError) as exc:
+                raise EngineStartupError(f"Engine failed to start: {exc}") from exc
+            spawned.append(transport)
+            return await handshake(transport, required_commands)
+
+        commands: list[str] = []
+        try:
+            for result in await asyncio.gather(
+                *(spawn() for _ in range(engines)), return_exceptions=True
+            ):
+                if isinstance(result, BaseException):
+                    raise result
+                commands = commands or result
+        except BaseException:
+            # Also on cancellation, e.g. by a start-up timeout: engines that
+            # passed their handshake would otherwise hold slots forever.
+            await asyncio.shield(
+                asyncio.gather(
+                    *(self._discard(transport) for transport in spawned),
+                    return_exceptions=True,
+                )
+            )
+            raise
+        self._warm.extend(spawned)
+        return commands
+
+    def _register(self, session: GTPSession) -> str:
+        while not self._sessions.insert(session.session_id, session):
+            session.session_id = uuid.uuid4().hex
+        if session.generation != self._generation:
+            # Spawned from the prototype a swap has just replaced.
+            self._schedule_migration()
+        return session.session_id
 
     async def open_session(self) -> str:
         """Create and store a new transport, returning its session id."""
-        transport = self._transport.copy()
-        if asyncio.iscoroutine(transport):  # pragma: no cover - defensive
-            transport = await transport  # type: ignore[assignment]
-        await transport.open()
+        transport, generation = await self._checkout()
+        return self._register(
+            GTPSession(uuid.uuid4().hex, transport, generation=generation)
+        )
 
-        session_id = uuid.uuid4().hex
-        async with self._lock:
-            while session_id in self._sessions:
-                session_id = uuid.uuid4().hex
-            self._sessions[session_id] = transport
-        return session_id
+    async def fork_session(self, session_id: str) -> str:
+        """Open a session that starts from the position of ``session_id``.
+
+        The child runs on its own engine, which replays the parent's recorded
+        game as a single burst of commands; the parent's engine is untouched.
+        The move history is shared copy-on-write with the parent.
+
+        Raises
+        ------
+        KeyError
+            If the parent session does not exist.
+        ValueError
+            If the parent's history is unknown, e.g. after ``loadsgf``.
+        RuntimeError
+            If the engine rejects the replayed position.
+        """
+
+        parent = self._sessions.get(session_id)
+        if parent is None:
+            raise KeyError(session_id)
+        if not parent.history_known:
+            raise ValueError("Session history is unknown and cannot be forked")
+
+        transport, generation = await self._checkout()
+        child = parent.fork(uuid.uuid4().hex, transport)
+        child.generation = generation
+        try:
+            responses = await send_commands(child.transport, child.replay_commands())
+            for raw in responses:
+                structured = parse_response(raw)
+                if not structured.success:
+                    raise RuntimeError(structured.error or "Failed to replay game")
+        except BaseException:
+            await self._discard(child.transport)
+            raise
+        return self._register(child)
+
+    async def _discard(self, transport: GTPTransport) -> None:
+        try:
+            await transport.aclose()
+        finally:
+            self._release(transport)
+
+    async def _retire(self, transport: GTPTransport) -> None:
+        """Close a transport whose slot has passed to its replacement."""
+        try:
+            await transport.aclose()
+        finally:
+            if self._placement is not None:
+                self._placement.release(transport)
+
+    @property
+    def prototype(self) -> GTPTransport:
+        """Transport new engines are copied from; replaced by :meth:`swap_engine`."""
+        return self._transport
+
+    @property
+    def generation(self) -> int:
+        """Number of times the engine prototype has been swapped."""
+        return self._generation
+
+    @property
+    def engine_swap(self) -> EngineSwap | None:
+        """Progress of the most recent :meth:`swap_engine`, if any."""
+        return self._swap
+
+    async def swap_engine(
+        self,
+        transport: GTPTransport,
+        *,
+        required_commands: Sequence[str] | None = None,
+        concurrency: int = 4,
+        label: str | None = None,
+    ) -> EngineSwap:
+        """Make ``transport`` the prototype of every engine, live ones included.
+
+        An engine is first started from ``transport`` and must pass
+        :func:`handshake` with ``required_commands`` (by default those given
+        to :meth:`start`); if it fails, nothing changes. New sessions then get
+        the new engine at once and idle warm engines are replaced.
+
+        Existing sessions are migrated in the background, ``concurrency`` at
+        a time: each gets a new engine, its recorded game is replayed as one
+        burst, and the engines are exchanged between two of its commands. A
+        migrating session briefly holds two engines under one slot of
+        ``max_engines``. Sessions whose history is unknown keep their engine.
+
+        Raises
+        ------
+        EngineStartupError
+            If the new engine fails to start or to pass its handshake.
+        """
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if required_commands is None:
+            required_commands = self._required_commands
+        try:
+            probe = await self._spawn(transport, slot=False)
+        except (OSError, ValueError) as exc:
+            raise EngineStartupError(f"Engine failed to start: {exc}") from exc
+        try:
+            await handshake(probe, required_commands)
+        finally:
+            await self._retire(probe)
+
+        self._transport = transport
+        self._required_commands = tuple(required_commands)
+        self._generation += 1
+        self._swap = EngineSwap(self._generation, label)
+        self._migration_concurrency = concurrency
+        self._attempted = set()
+        if self._migration is not None:
+            self._migration.cancel()
+            self._migration = None
+        stale, self._warm = self._warm, []
+        await asyncio.gather(
+            *(self._discard(engine) for engine in stale), return_exceptions=True
+        )
+        self._replenish()
+        self._schedule_migration()
+        return self._swap
+
+    def _schedule_migration(self) -> None:
+        if self._migration is None or self._migration.done():
+            self._migration = asyncio.create_task(self._migrate_all())
+            self._background.add(self._migration)
+            self._migration.add_done_callback(self._background.discard)
+
+    async def _migrate_all(self) -> None:
+        swap = self._swap
+        if swap is None:
+            return
+        gate = asyncio.Semaphore(self._migration_concurrency)
+        attempted = self._attempted
+        counted: set[str] = set()
+
+        async def migrate(session: GTPSession) -> None:
+            async with gate:
+                try:
+                    migrated = await self._migrate(session)
+                except Exception as exc:
+                    swap.failed += 1
+                    swap.error = str(exc) or type(exc).__name__
+                    attempted.add(session.session_id)
+                    return
+            if migrated is None:
+                # Still busy; retried in the next round.
+                return
+            attempted.add(session.session_id)
+            if migrated:
+                swap.migrated += 1
+            else:
+                swap.skipped += 1
+
+        swap.done = False
+        while True:
+            stale = [
+                session
+                for session_id, session in self._sessions.items()
+                if session.generation != self._generation
+                and session_id not in attempted
+            ]
+            if not stale:
+                break
+            swap.sessions += sum(session.session_id not in counted for session in stale)
+            counted.update(session.session_id for session in stale)
+            await asyncio.gather(*(migrate(session) for session in stale))
+        swap.done = True
+
+    async def _migrate(self, session: GTPSession) -> bool | None:
+        """Move ``session`` onto an engine of the current prototype.
+
+        Once the session is idle, its game is replayed on the new engine,
+        which replaces the old one only if no command of the session ran
+        meanwhile; otherwise the replay is repeated. Returns ``False`` if the
+        session cannot be migrated and ``None`` if it kept changing, so that
+        it is retried after the other sessions.
+        """
+
+        if not session.history_known:
+            return False
+        generation = self._generation
+        transport = await self._spawn(slot=False)
+        try:
+            for _ in range(_MIGRATION_ATTEMPTS):
+                await session.wait_idle()
+                if (
+                    not session.history_known
+                    or self._sessions.get(session.session_id) is not session
+                ):
+                    await self._retire(transport)
+                    return False
+                version = session.version
+                responses = await send_commands(
+                    transport, session.replay_commands()
+                )
+                for raw in responses:
+                    structured = parse_response(raw)
+                    if not structured.success:
+                        raise RuntimeError(structured.error or "Failed to replay game")
+                if (
+                    session.version == version
+                    and not session.in_flight
+                    and self._sessions.get(session.session_id) is session
+                ):
+                    old, session.transport = session.transport, transport
+                    session.generation = generation
+                    session.known_commands.clear()
+                    session.bump()
+                    break
+            else:
+                await self._retire(transport)
+                return None
+        except BaseException:
+            await self._retire(transport)
+            raise
+        await self._retire(old)
+        return True
+
+    async def get_session(self, session_id: str) -> GTPSession:
+        """Retrieve the session state for the given session id."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        session.touch()
+        return session
 
     async def get_transport(self, session_id: str) -> GTPTransport:
         """Retrieve a transport for the given session id."""
-        async with self._lock:
-            transport = self._sessions.get(session_id)
-        if transport is None:
-            raise KeyError(session_id)
-        return transport
+        return (await self.get_session(session_id)).transport
+
+    def sessions(self) -> list[tuple[str, GTPTransport]]:
+        """Return a snapshot of the managed ``(session_id, transport)`` pairs."""
+        return [
+            (session_id, session.transport)
+            for session_id, session in self._sessions.items()
+        ]
+
+    def last_used(self, session_id: str) -> float | None:
+        """Monotonic timestamp of the session's most recent lookup."""
+        session = self._sessions.get(session_id)
+        return session.last_used if session is not None else None
+
+    async def restart_session(self, session_id: str) -> bool:
+        """Restart the engine behind a session, discarding its game state."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        await session.transport.aclose()
+        session.reset()
+        await session.transport.open()
+        return True
+
+    async def resync_session(self, session_id: str) -> bool:
+        """Restart the engine behind a session and replay its recorded game.
+
+        Used when the engine can no longer be trusted to answer in order, for
+        example after a command was abandoned mid-flight. Sessions whose
+        history is unknown are reset as by :meth:`restart_session`.
+
+        Raises
+        ------
+        RuntimeError
+            If the restarted engine rejects the replayed position.
+        """
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        if not session.history_known:
+            return await self.restart_session(session_id)
+        await session.transport.aclose()
+        session.bump()
+        responses = await send_commands(session.transport, session.replay_commands())
+        for raw in responses:
+            structured = parse_response(raw)
+            if not structured.success:
+                raise RuntimeError(structured.error or "Failed to replay game")
+        return True
 
     async def close_session(self, session_id: str) -> bool:
         """Close and remove the transport for the given session."""
-        transport: GTPTransport | None
-        async with self._lock:
-            transport = self._sessions.pop(session_id, None)
-        if transport is None:
+        session = self._sessions.pop(session_id)
+        if session is None:
             return False
-        await transport.aclose()
+        session.events.close(Event.create("closed", session.version))
+        await self._discard(session.transport)
         return True
 
     async def close_all(self) -> None:
         """Close and clear all managed transports."""
-        async with self._lock:
-            transports = list(self._sessions.values())
-            self._sessions.clear()
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*list(self._background), return_exceptions=True)
+        transports = []
+        for session in self._sessions.drain():
+            session.events.close(Event.create("closed", session.version))
+            transports.append(session.transport)
+        transports.extend(self._warm)
+        self._warm.clear()
+        gate = asyncio.Semaphore(self._close_concurrency)
+
+        async def close(transport: GTPTransport) -> None:
+            async with gate:
+                await self._discard(transport)
+
         results = await asyncio.gather(
-            *(transport.aclose() for transport in transports),
+            *(close(transport) for transport in transports),
             return_exceptions=True,
         )
         for result in results:
@@ -164,7 +1065,14 @@ class GTPTransportManager:
 
 
 __all__ = [
+    "AdmissionError",
+    "EngineCapacityError",
+    "EngineStartupError",
+    "EngineSwap",
+    "QueueFullError",
+    "QueueTimeoutError",
     "GTPTransport",
     "GTPTransportManager",
     "SubprocessGTPTransport",
+    "handshake",
 ]
@@ -0,0 +1,26 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, create_app
+
+
+@pytest.fixture
+def limited_client(gtp_transport):
+    manager = GTPTransportManager(gtp_transport, max_engines=1, retry_after=2.5)
+    with TestClient(create_app(manager)) as c:
+        yield c
+
+
+def test_open_session_over_capacity(limited_client):
+    first = limited_client.post("/open_session")
+    assert first.status_code == 201
+
+    res = limited_client.post("/open_session")
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "3"
+
+    session_id = first.json()["session_id"]
+    assert limited_client.post(f"/{session_id}/quit").status_code == 200
+
+    again = limited_client.post("/open_session")
+    assert again.status_code == 201
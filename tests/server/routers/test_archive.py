@@ -0,0 +1,48 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from fastgtp import GameArchive, GTPTransportManager, create_app
+
+
+def test_quit_archives_game(gtp_transport, tmp_path):
+    app = create_app(
+        GTPTransportManager(gtp_transport.copy()),
+        archive=GameArchive(str(tmp_path), flush_interval=0.01),
+    )
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        client.post(f"/{session_id}/boardsize", json={"x": 9})
+        for color, vertex in (("B", "C3"), ("W", "G7"), ("B", "E5")):
+            body = {"color": color, "vertex": vertex}
+            res = client.post(f"/{session_id}/play", json=body)
+            assert res.status_code == 200
+        assert client.post(f"/{session_id}/quit").status_code == 200
+        # Quit only buffers the game; the background flush writes it.
+        time.sleep(0.2)
+
+        # The same position, reflected.
+        moves = [["B", "G3"], ["W", "C7"]]
+        res = client.post("/archive/search", json={"moves": moves, "board_size": 9})
+        assert res.status_code == 200
+        assert res.json() == {
+            "count": 1,
+            "games": [{"game_id": 0, "move_number": 2}],
+        }
+
+        res = client.post("/archive/search", json={"moves": [], "board_size": 9})
+        assert res.json()["count"] == 0
+        off_board = {"moves": [["B", "T19"]], "board_size": 9}
+        res = client.post("/archive/search", json=off_board)
+        assert res.status_code == 422
+
+        res = client.get("/archive/0")
+        assert res.status_code == 200
+        assert res.json()["board_size"] == [9, 9]
+        assert res.json()["moves"] == [["B", "C3"], ["W", "G7"], ["B", "E5"]]
+        assert client.get("/archive/1").status_code == 404
+
+
+def test_archive_disabled(client):
+    assert client.post("/archive/search", json={"moves": []}).status_code == 404
+    assert client.get("/archive/0").status_code == 404
@@ -0,0 +1,19 @@
+def test_send_batch(client, session_id):
+    res = client.post(
+        f"/{session_id}/batch",
+        json={"commands": ["boardsize 9", "clear_board", "play B C3", "bogus", "name"]},
+    )
+    assert res.status_code == 200
+    results = res.json()["results"]
+    assert [result["success"] for result in results] == [True, True, True, False, True]
+    assert results[3]["error"]
+    assert results[4]["payload"]
+
+    # Successful state changes were recorded like single commands.
+    res = client.get(f"/{session_id}/board", params={"format": "raw"})
+    assert sum(res.content[:81]) == 1
+
+
+def test_send_batch_empty_command(client, session_id):
+    res = client.post(f"/{session_id}/batch", json={"commands": ["name", " "]})
+    assert res.status_code == 422
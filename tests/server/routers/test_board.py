@@ -0,0 +1,68 @@
+import pytest
+
+
+@pytest.fixture
+def board_session(client, session_id):
+    client.post(f"/{session_id}/boardsize", json={"x": 9})
+    for color, vertex in [("B", "A2"), ("W", "A1"), ("B", "B1")]:
+        res = client.post(f"/{session_id}/play", json={"color": color, "vertex": vertex})
+        assert res.status_code == 200
+    return session_id
+
+
+def test_get_board_raw(client, board_session):
+    res = client.get(
+        f"/{board_session}/board",
+        params={"format": "raw", "features": "black,white,to_play", "last_n": 1},
+    )
+    assert res.status_code == 200
+    assert res.headers["X-Array-Shape"] == "4,9,9"
+    assert res.headers["X-Feature-Planes"] == "black,white,to_play,last_1"
+
+    planes = res.content
+    assert len(planes) == 4 * 81
+    black, white, to_play, last = (planes[i * 81 : (i + 1) * 81] for i in range(4))
+    # A1 (bottom-left) was captured by B1; rows run from the top edge.
+    assert white == bytes(81)
+    assert black[7 * 9] == 1 and black[8 * 9 + 1] == 1
+    assert sum(black) == 2
+    assert to_play == bytes(81)  # white to play
+    assert last[8 * 9 + 1] == 1 and sum(last) == 1
+
+
+def test_get_board_npy(client, board_session):
+    np = pytest.importorskip("numpy")
+    import io
+
+    res = client.get(f"/{board_session}/board", params={"features": "liberties"})
+    assert res.status_code == 200
+    array = np.load(io.BytesIO(res.content))
+    assert array.shape == (1, 9, 9)
+    assert array.dtype == np.uint8
+    assert array[0, 7, 0] == 3  # A2: liberties at A1, A3 and B2
+
+
+def test_get_positions(client, board_session):
+    res = client.get(f"/{board_session}/positions", params={"format": "raw", "start": 1})
+    assert res.status_code == 200
+    assert res.headers["X-Array-Shape"] == "3,2,9,9"
+
+
+def test_get_boards(client, board_session):
+    res = client.post(
+        "/boards",
+        json={"session_ids": [board_session, board_session], "format": "raw"},
+    )
+    assert res.status_code == 200
+    assert res.headers["X-Array-Shape"] == "2,2,9,9"
+
+
+def test_get_board_unknown_feature(client, board_session):
+    res = client.get(f"/{board_session}/board", params={"features": "ladders"})
+    assert res.status_code == 422
+
+
+def test_get_board_invalid_session(client, invalid_session_id):
+    assert client.get(f"/{invalid_session_id}/board").status_code == 404
+    res = client.post("/boards", json={"session_ids": [invalid_session_id]})
+    assert res.status_code == 404
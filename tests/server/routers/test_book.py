@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, OpeningBook, OpeningBookBuilder, create_app
+
+
+def test_genmove_from_book(gtp_transport, tmp_path):
+    builder = OpeningBookBuilder(max_moves=2)
+    builder.add_sgf("(;SZ[9];B[ab];W[ba])")
+    path = str(tmp_path / "openings.book")
+    builder.write(path)
+
+    book = OpeningBook(path, temperature=0)
+    app = create_app(GTPTransportManager(gtp_transport.copy()), book=book)
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        client.post(f"/{session_id}/boardsize", json={"x": 9})
+        client.post(f"/{session_id}/clear_board")
+
+        # A8 and B9 are equivalent on an empty board; the reply mirrors them.
+        res = client.post(f"/{session_id}/genmove", json={"color": "B"})
+        assert res.status_code == 200
+        first = res.json()["move"]
+        assert first in ("A8", "B9")
+        res = client.post(f"/{session_id}/genmove", json={"color": "W"})
+        assert {first, res.json()["move"]} == {"A8", "B9"}
+        assert book.hits == 2
+
+        # Past the book's depth the engine answers.
+        res = client.post(f"/{session_id}/genmove", json={"color": "B"})
+        assert res.status_code == 200
+        assert book.lookups == 2
+
+        client.post(f"/{session_id}/clear_board")
+        res = client.post(f"/{session_id}/genmove", json={"color": "B", "book": False})
+        assert res.status_code == 200
+        assert book.lookups == 2
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, create_app
+from fastgtp.server import router
+
+
+@pytest.fixture
+def clock_session(client):
+    session_id = client.post("/open_session").json()["session_id"]
+    yield session_id
+    client.post(f"/{session_id}/quit")
+
+
+def test_clock_sends_time_left(client, clock_session):
+    session_id = clock_session
+    client.post(f"/{session_id}/boardsize", json={"x": 9})
+    res = client.post(
+        f"/{session_id}/clock",
+        json={"kind": "canadian", "main_time": 300, "period_time": 30, "stones": 5},
+    )
+    assert res.status_code == 200
+    assert res.json()["running"] == "B"
+    assert res.json()["black"]["main_time"] == 300
+
+    res = client.post(f"/{session_id}/genmove", json={"color": "B"})
+    assert res.status_code == 200
+    state = client.get(f"/{session_id}/clock").json()
+    assert state["running"] == "W"
+    assert 0 < state["black"]["main_time"] < 300
+    assert state["white"]["main_time"] == 300
+
+
+def test_clock_invalid_control(client, clock_session):
+    res = client.post(
+        f"/{clock_session}/clock", json={"kind": "byoyomi", "main_time": 60}
+    )
+    assert res.status_code == 422
+
+
+class SlowTransport:
+    """Engine that takes far longer than its clock allows to move."""
+
+    async def open(self) -> None:
+        return None
+
+    async def send_command(self, command: str) -> str:
+        if command.startswith("genmove"):
+            await asyncio.sleep(5)
+        if command.startswith("known_command"):
+            return "= true\n\n"
+        return "= \n\n"
+
+    async def aclose(self) -> None:
+        return None
+
+    def copy(self) -> "SlowTransport":
+        return SlowTransport()
+
+
+def test_genmove_deadline(monkeypatch):
+    monkeypatch.setattr(router, "_DEADLINE_GRACE", 0.0)
+    app = create_app(GTPTransportManager(SlowTransport()))
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        client.post(
+            f"/{session_id}/clock", json={"kind": "absolute", "main_time": 0.05}
+        )
+        res = client.post(f"/{session_id}/genmove", json={"color": "B"})
+        assert res.status_code == 504
+        assert client.get(f"/{session_id}/clock").json()["black"]["flagged"]
+        res = client.post(f"/{session_id}/genmove", json={"color": "B"})
+        assert res.status_code == 409
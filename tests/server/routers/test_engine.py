@@ -0,0 +1,62 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, Speculator, create_app
+
+
+def wait_done(client, headers):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        body = client.get("/engine", headers=headers).json()
+        if body["done"]:
+            return body
+        time.sleep(0.05)
+    raise AssertionError("migration did not finish")
+
+
+def test_swap_engine(gtp_transport):
+    manager = GTPTransportManager(gtp_transport.copy())
+    speculator = Speculator(gtp_transport.copy())
+    app = create_app(
+        manager,
+        engine_profiles={"next": gtp_transport.copy()},
+        admin_token="secret",
+        speculator=speculator,
+    )
+    headers = {"X-Admin-Token": "secret"}
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        res = client.post(f"/{session_id}/play", json={"color": "B", "vertex": "D4"})
+        assert res.status_code == 200
+        old = dict(manager.sessions())[session_id]
+
+        assert client.get("/engine").status_code == 403
+        res = client.post("/engine", json={"profile": "next"}, headers={})
+        assert res.status_code == 403
+        res = client.post("/engine", json={"profile": "missing"}, headers=headers)
+        assert res.status_code == 404
+
+        res = client.post("/engine", json={"profile": "next"}, headers=headers)
+        assert res.status_code == 202
+        assert res.json()["generation"] == 1
+        assert res.json()["profile"] == "next"
+        # Pondering moved to the new engine as well.
+        assert speculator._prototype is manager.prototype
+
+        body = wait_done(client, headers)
+        assert body["migrated"] == 1 and body["failed"] == 0
+        assert body["profiles"] == ["next"]
+        assert dict(manager.sessions())[session_id] is not old
+
+        # The game continues on the new engine.
+        res = client.post(f"/{session_id}/play", json={"color": "W", "vertex": "D4"})
+        assert res.status_code == 502
+        res = client.post(f"/{session_id}/play", json={"color": "W", "vertex": "Q16"})
+        assert res.status_code == 200
+        client.post(f"/{session_id}/quit")
+
+
+def test_engine_admin_disabled(client):
+    assert client.get("/engine").status_code == 404
+    assert client.post("/engine", json={"profile": "next"}).status_code == 404
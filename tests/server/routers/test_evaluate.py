@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+from fastgtp import EnginePool, GTPTransportManager, create_app
+
+
+def test_evaluate(gtp_transport):
+    app = create_app(
+        GTPTransportManager(gtp_transport.copy()),
+        pool=EnginePool(gtp_transport.copy(), size=1),
+    )
+    with TestClient(app) as client:
+        moves = [["B", "D4"], ["W", "Q16"]]
+        res = client.post("/evaluate", json={"moves": moves})
+        assert res.status_code == 200
+        assert res.json()["move"]
+        assert res.json()["reused_moves"] == 0
+
+        res = client.post("/evaluate", json={"moves": moves + [["B", "pass"]]})
+        assert res.status_code == 200
+        assert res.json()["reused_moves"] == 2
+
+        res = client.post("/evaluate", json={"moves": moves, "evaluate": "score"})
+        assert res.status_code == 200
+        assert res.json()["score"]
+
+        res = client.post("/evaluate", json={"moves": [["B", "D4"], ["W", "D4"]]})
+        assert res.status_code == 422
+        res = client.post("/evaluate", json={"moves": [["B", "4D"]]})
+        assert res.status_code == 422
+
+
+def test_evaluate_disabled(client):
+    assert client.post("/evaluate", json={"moves": []}).status_code == 404
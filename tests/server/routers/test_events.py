@@ -0,0 +1,55 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+
+def test_watch_session(client):
+    session_id = client.post("/open_session").json()["session_id"]
+    client.post(f"/{session_id}/boardsize", json={"x": 9})
+    client.post(f"/{session_id}/play", json={"color": "B", "vertex": "C3"})
+
+    with client.websocket_connect(f"/{session_id}/ws") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["board_size"] == [9, 9]
+        assert snapshot["moves"] == [["B", "C3"]]
+
+        client.post(f"/{session_id}/play", json={"color": "W", "vertex": "G7"})
+        move = websocket.receive_json()
+        assert (move["type"], move["vertex"], move["number"]) == ("move", "G7", 2)
+
+        client.post(f"/{session_id}/quit")
+        assert websocket.receive_json()["type"] == "closed"
+        with pytest.raises(WebSocketDisconnect) as exc:
+            websocket.receive_json()
+        assert exc.value.code == 1000
+
+
+def test_watch_unknown_session(client, invalid_session_id):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(f"/{invalid_session_id}/ws") as websocket:
+            websocket.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_event_stream_closes_with_session(client, gtp_transport_manager):
+    session_id = client.post("/open_session").json()["session_id"]
+    client.post(f"/{session_id}/play", json={"color": "B", "vertex": "D4"})
+    session = asyncio.run(gtp_transport_manager.get_session(session_id))
+
+    # The test client returns only complete bodies, so end the stream by
+    # quitting the session once the spectator has joined.
+    with ThreadPoolExecutor(1) as executor:
+        stream = executor.submit(client.get, f"/{session_id}/events")
+        while not len(session.events) and not stream.done():
+            time.sleep(0.01)
+        client.post(f"/{session_id}/quit")
+        res = stream.result(timeout=10)
+
+    assert res.headers["content-type"].startswith("text/event-stream")
+    frames = res.text.split("\n\n")
+    assert frames[0].startswith("id: 1\nevent: snapshot\ndata: ")
+    assert frames[1].startswith("id: 1\nevent: closed\n")
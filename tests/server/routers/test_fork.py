@@ -0,0 +1,38 @@
+def test_fork_session(client, session_id):
+    client.post(f"/{session_id}/boardsize", json={"x": 9})
+    client.post(f"/{session_id}/play", json={"color": "B", "vertex": "C3"})
+    client.post(f"/{session_id}/play", json={"color": "W", "vertex": "G7"})
+
+    res = client.post(f"/{session_id}/fork")
+    assert res.status_code == 201
+    child_id = res.json()["session_id"]
+    assert child_id != session_id
+
+    child_play = client.post(f"/{child_id}/play", json={"color": "B", "vertex": "E5"})
+    assert child_play.status_code == 200
+
+    # The child has its own engine, so the parent is unaffected by its moves.
+    parent_play = client.post(f"/{session_id}/play", json={"color": "B", "vertex": "E5"})
+    assert parent_play.status_code == 200
+
+    # Both engines reject a move on a point occupied by the replayed history.
+    occupied = client.post(f"/{child_id}/play", json={"color": "W", "vertex": "C3"})
+    assert occupied.status_code == 502
+
+    client.post(f"/{child_id}/quit")
+
+
+def test_fork_session_unknown_history(client, session_id):
+    client.post(f"/{session_id}/sgf", json={"content": "(;GM[1]FF[4]SZ[9];B[cc])"})
+    res = client.post(f"/{session_id}/fork")
+    assert res.status_code == 409
+
+    client.post(f"/{session_id}/clear_board")
+    forked = client.post(f"/{session_id}/fork")
+    assert forked.status_code == 201
+    client.post(f"/{forked.json()['session_id']}/quit")
+
+
+def test_fork_session_invalid_session(client, invalid_session_id):
+    res = client.post(f"/{invalid_session_id}/fork")
+    assert res.status_code == 404
@@ -12,3 +12,34 @@ def test_get_sgf(client, session_id):
 def test_get_sgf_invalid_session(client, invalid_session_id):
     res = client.get(f"/{invalid_session_id}/sgf")
     assert res.status_code == 404
+
+
+def test_get_sgf_not_modified(client, session_id):
+    res = client.get(f"/{session_id}/sgf")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    cached = client.get(f"/{session_id}/sgf", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+
+def test_get_sgf_etag_changes_after_play(client, session_id):
+    client.post(f"/{session_id}/clear_board")
+    etag = client.get(f"/{session_id}/sgf").headers["ETag"]
+
+    play = client.post(f"/{session_id}/play", json={"color": "B", "vertex": "C3"})
+    assert play.status_code == 200
+
+    res = client.get(f"/{session_id}/sgf", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+
+def test_get_sgf_etag_unchanged_after_query(client, session_id):
+    etag = client.get(f"/{session_id}/sgf").headers["ETag"]
+
+    client.get(f"/{session_id}/komi")
+    client.post(f"/{session_id}/command", json={"command": "name"})
+
+    assert client.get(f"/{session_id}/sgf").headers["ETag"] == etag
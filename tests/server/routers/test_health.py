@@ -0,0 +1,58 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, Startup, SubprocessGTPTransport, create_app
+
+
+def wait_for_startup(client, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        res = client.get("/readyz")
+        if res.json()["startup"] not in ("pending", "starting"):
+            return res
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_probes_without_startup(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    res = client.get("/readyz")
+    assert res.status_code == 200
+    assert res.json()["ready"] and res.json()["startup"] == "ready"
+
+
+def test_ready_after_warm_up(gtp_transport):
+    manager = GTPTransportManager(gtp_transport.copy(), max_engines=3)
+    app = create_app(manager, startup=Startup(manager, 2))
+    with TestClient(app) as client:
+        assert client.get("/healthz").status_code == 200
+        res = wait_for_startup(client)
+        assert res.status_code == 200
+        assert res.json()["warm_engines"] == 2
+
+        # Opening a session takes a warm engine instead of spawning one.
+        client.post("/open_session")
+        assert client.get("/readyz").json()["warm_engines"] == 1
+
+
+def test_not_ready_when_saturated(gtp_transport):
+    manager = GTPTransportManager(gtp_transport.copy(), max_engines=1)
+    app = create_app(manager, startup=Startup(manager, 1))
+    with TestClient(app) as client:
+        assert wait_for_startup(client).status_code == 200
+        client.post("/open_session")
+        res = client.get("/readyz")
+        assert res.status_code == 503
+        assert res.json()["detail"] == "No engine capacity available"
+
+
+def test_failed_startup():
+    manager = GTPTransportManager(SubprocessGTPTransport("fastgtp-missing-engine"))
+    app = create_app(manager, startup=Startup(manager, 2))
+    with TestClient(app) as client:
+        res = wait_for_startup(client)
+        assert res.status_code == 503
+        assert res.json()["startup"] == "failed"
+        assert res.json()["detail"]
+        assert client.get("/healthz").status_code == 200
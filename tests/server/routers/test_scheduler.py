@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+
+from fastgtp import CommandScheduler, GTPTransportManager, create_app
+
+
+def test_scheduler_stats(gtp_transport):
+    scheduler = CommandScheduler(2)
+    app = create_app(GTPTransportManager(gtp_transport.copy()), scheduler=scheduler)
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        headers = {"X-Client-Id": "reviewer", "X-Priority": "batch"}
+        assert client.get(f"/{session_id}/name", headers=headers).status_code == 200
+        assert client.get(f"/{session_id}/name").status_code == 200
+
+        res = client.get("/scheduler")
+        assert res.status_code == 200
+        body = res.json()
+        assert body["capacity"] == 2
+        assert body["classes"]["batch"]["dispatched"] == 1
+        assert body["classes"]["interactive"]["dispatched"] == 1
+        assert body["classes"]["interactive"]["running"] == 0
+
+        res = client.get(f"/{session_id}/name", headers={"X-Priority": "urgent"})
+        assert res.status_code == 422
+
+
+def test_scheduler_disabled(client):
+    assert client.get("/scheduler").status_code == 404
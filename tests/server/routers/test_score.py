@@ -0,0 +1,107 @@
+import io
+
+import pytest
+
+# Black walls off columns A-E and white columns F-J of a 9x9 board.
+WALLS = [
+    move
+    for row in range(1, 10)
+    for move in (("B", f"E{row}"), ("W", f"F{row}"))
+]
+
+
+@pytest.fixture
+def walled_session(client, session_id):
+    client.post(f"/{session_id}/boardsize", json={"x": 9})
+    client.post(f"/{session_id}/komi", json={"value": 0.5})
+    for color, vertex in WALLS:
+        res = client.post(f"/{session_id}/play", json={"color": color, "vertex": vertex})
+        assert res.status_code == 200
+    return session_id
+
+
+def test_get_ownership(client, walled_session):
+    res = client.get(f"/{walled_session}/ownership")
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["width"], body["height"]) == (9, 9)
+    ownership = body["ownership"]
+    assert len(ownership) == 81
+    assert ownership[0] > 0.5  # A9
+    assert ownership[8] < -0.5  # J9
+
+
+def test_get_ownership_npy(client, walled_session):
+    np = pytest.importorskip("numpy")
+    res = client.get(f"/{walled_session}/ownership", params={"format": "npy"})
+    assert res.status_code == 200
+    array = np.load(io.BytesIO(res.content))
+    assert array.shape == (9, 9)
+    assert array.dtype == np.float32
+    assert array[4, 4] > 0.5 and array[4, 5] < -0.5
+
+
+def test_get_score(client, walled_session):
+    pytest.importorskip("numpy")
+    res = client.get(f"/{walled_session}/score")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["area"]["result"] == "B+8.5"
+    assert body["territory"]["result"] == "B+8.5"
+
+
+def test_score_batch():
+    pytest.importorskip("numpy")
+    from fastapi.testclient import TestClient
+
+    from fastgtp import create_app, GTPTransportManager, SubprocessGTPTransport
+
+    app = create_app(GTPTransportManager(SubprocessGTPTransport("true")))
+    with TestClient(app) as client:
+        res = client.post(
+            "/score",
+            json={
+                "positions": [
+                    {"board_size": [9, 9], "moves": WALLS, "komi": 6.5},
+                    {
+                        "board_size": [9, 9],
+                        "moves": [*WALLS, ["W", "B5"]],
+                        "dead": ["B5"],
+                    },
+                    {"board_size": [5, 5], "ownership": [-1.0] * 25, "komi": 0.5},
+                ]
+            },
+        )
+    assert res.status_code == 200
+    first, second, third = res.json()["scores"]
+    assert first["source"] == "board"
+    assert first["area"] == {
+        "black": 45.0,
+        "white": 42.5,
+        "margin": 2.5,
+        "result": "B+2.5",
+    }
+    # The dead stone counts as territory and as a prisoner.
+    assert second["area"]["result"] == "B+9"
+    assert second["territory"]["result"] == "B+10"
+    assert third["source"] == "ownership"
+    assert third["area"]["result"] == "W+25.5"
+
+
+def test_score_batch_rejects_bad_ownership():
+    from fastapi.testclient import TestClient
+
+    from fastgtp import create_app, GTPTransportManager, SubprocessGTPTransport
+
+    app = create_app(GTPTransportManager(SubprocessGTPTransport("true")))
+    with TestClient(app) as client:
+        res = client.post(
+            "/score",
+            json={"positions": [{"board_size": [9, 9], "ownership": [0.0]}]},
+        )
+    assert res.status_code == 422
+
+
+def test_score_invalid_session(client, invalid_session_id):
+    assert client.get(f"/{invalid_session_id}/ownership").status_code == 404
+    assert client.get(f"/{invalid_session_id}/score").status_code == 404
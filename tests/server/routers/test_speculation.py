@@ -0,0 +1,108 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, Speculator, create_app
+from fastgtp.server.speculation import parse_policy
+
+
+@pytest.fixture
+def speculating_client(gtp_transport):
+    manager = GTPTransportManager(gtp_transport)
+    speculator = Speculator(gtp_transport, top_k=2)
+    with TestClient(create_app(manager, speculator=speculator)) as c:
+        yield c
+
+
+def test_genmove_with_ponder(speculating_client):
+    client = speculating_client
+    session_id = client.post("/open_session").json()["session_id"]
+    client.post(f"/{session_id}/boardsize", json={"x": 9})
+    client.post(f"/{session_id}/play", json={"color": "B", "vertex": "E5"})
+
+    res = client.post(f"/{session_id}/genmove", json={"color": "W", "ponder": True})
+    assert res.status_code == 200
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        metrics = client.get("/speculation").json()
+        if metrics["predictions"] or metrics["failed"]:
+            break
+        time.sleep(0.05)
+    assert metrics["jobs"] == 1
+    assert metrics["failed"] == 0
+
+    reply = client.post(f"/{session_id}/command", json={"command": "reg_genmove B"})
+    vertex = reply.json()["detail"] if reply.status_code == 200 else "C3"
+    client.post(f"/{session_id}/play", json={"color": "B", "vertex": vertex})
+
+    res = client.post(f"/{session_id}/genmove", json={"color": "W"})
+    assert res.status_code == 200
+    assert res.json()["move"]
+
+    metrics = client.get("/speculation").json()
+    assert metrics["hits"] + metrics["misses"] == 1
+
+    client.post(f"/{session_id}/quit")
+
+
+class ResigningTransport:
+    """Fake spare engine that predicts C3 and resigns in reply to it."""
+
+    async def open(self):
+        pass
+
+    async def send_command(self, command):
+        if command == "list_commands":
+            return "= reg_genmove\n\n"
+        if command.startswith("reg_genmove"):
+            return "= C3\n\n"
+        if command.startswith("genmove"):
+            return "= resign\n\n"
+        return "=\n\n"
+
+    async def aclose(self):
+        pass
+
+    def copy(self):
+        return ResigningTransport()
+
+
+def test_speculated_resignation_is_not_served(gtp_transport):
+    manager = GTPTransportManager(gtp_transport)
+    speculator = Speculator(ResigningTransport())
+    with TestClient(create_app(manager, speculator=speculator)) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        client.post(f"/{session_id}/boardsize", json={"x": 9})
+        client.post(f"/{session_id}/play", json={"color": "B", "vertex": "E5"})
+        body = {"color": "W", "ponder": True}
+        assert client.post(f"/{session_id}/genmove", json=body).status_code == 200
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            metrics = client.get("/speculation").json()
+            if metrics["predictions"] or metrics["failed"]:
+                break
+            time.sleep(0.05)
+        assert metrics["predictions"] == 1
+
+        client.post(f"/{session_id}/play", json={"color": "B", "vertex": "C3"})
+        res = client.post(f"/{session_id}/genmove", json={"color": "W"})
+        assert res.status_code == 200
+        # The session's engine searched instead.
+        assert client.get("/speculation").json()["misses"] == 1
+        client.post(f"/{session_id}/quit")
+
+
+def test_speculation_disabled(client):
+    assert client.get("/speculation").status_code == 404
+
+
+def test_parse_policy():
+    payload = "symmetry 0\nwhiteWin 0.4\npolicy\n0.1 NAN\n0.2 0.7\npolicyPass 0.0"
+    assert sorted(parse_policy(payload, (2, 2)), reverse=True) == [
+        (0.7, "B1"),
+        (0.2, "A1"),
+        (0.1, "A2"),
+    ]
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fastgtp import GTPTransportManager, ResourceMonitor, create_app
+
+
+@pytest.fixture
+def monitored_client(gtp_transport):
+    manager = GTPTransportManager(gtp_transport)
+    monitor = ResourceMonitor(manager, interval=0.05)
+    with TestClient(create_app(manager, monitor=monitor)) as c:
+        yield c
+
+
+def test_get_session_stats(monitored_client):
+    session_id = monitored_client.post("/open_session").json()["session_id"]
+
+    res = monitored_client.get(f"/{session_id}/stats")
+    assert res.status_code == 200
+
+    data = res.json()
+    assert data.keys() == {"pid", "rss_bytes", "cpu_seconds", "cpu_percent"}
+    assert data["pid"] > 0
+    assert data["rss_bytes"] > 0
+
+    monitored_client.post(f"/{session_id}/quit")
+
+
+def test_get_stats(monitored_client):
+    res = monitored_client.get("/stats")
+    assert res.status_code == 200
+    assert res.json()["evictions"] == 0
+
+
+def test_get_stats_disabled(client, session_id):
+    assert client.get("/stats").status_code == 404
+    assert client.get(f"/{session_id}/stats").status_code == 404
+
+
+def test_get_session_stats_invalid_session(monitored_client, invalid_session_id):
+    res = monitored_client.get(f"/{invalid_session_id}/stats")
+    assert res.status_code == 404
+
+
+def test_memory_limit_evicts_session(gtp_transport):
+    manager = GTPTransportManager(gtp_transport)
+    monitor = ResourceMonitor(manager, interval=0.05, max_rss_bytes=1)
+    with TestClient(create_app(manager, monitor=monitor)) as c:
+        session_id = c.post("/open_session").json()["session_id"]
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if c.get(f"/{session_id}/name").status_code == 404:
+                break
+            time.sleep(0.05)
+        assert c.get(f"/{session_id}/name").status_code == 404
+        assert c.get("/stats").json()["evictions"] == 1
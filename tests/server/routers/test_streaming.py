@@ -0,0 +1,19 @@
+from fastgtp.server.responses import STREAM_THRESHOLD
+
+
+def test_short_batch_is_not_streamed(client, session_id):
+    res = client.post(f"/{session_id}/batch", json={"commands": ["name"] * 2})
+    assert res.status_code == 200
+    assert "content-length" in res.headers
+
+
+def test_long_batch_is_streamed(client, session_id):
+    commands = ["name"] * STREAM_THRESHOLD
+    res = client.post(f"/{session_id}/batch", json={"commands": commands})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/json"
+    assert "content-length" not in res.headers
+    results = res.json()["results"]
+    assert len(results) == STREAM_THRESHOLD
+    assert all(result["success"] for result in results)
+    assert set(results[0]) == {"success", "payload", "error"}
@@ -0,0 +1,95 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from fastgtp import (
+    CommandScheduler,
+    EngineMeter,
+    FastGtp,
+    GTPTransportManager,
+    create_app,
+)
+from fastgtp.server.router import _metering
+
+
+def test_usage(gtp_transport):
+    meter = EngineMeter()
+    app = create_app(GTPTransportManager(gtp_transport.copy()), meter=meter)
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        headers = {"X-Client-Id": "team-a"}
+        res = client.post(
+            f"/{session_id}/play", json={"color": "B", "vertex": "D4"}, headers=headers
+        )
+        assert res.status_code == 200
+        res = client.post(
+            f"/{session_id}/batch",
+            json={"commands": ["play W Q16", "name"]},
+            headers=headers,
+        )
+        assert res.status_code == 200
+
+        res = client.get(f"/{session_id}/usage")
+        assert res.status_code == 200
+        assert res.json()["commands"] == 3
+        assert res.json()["wall_seconds"] > 0
+
+        body = client.get("/usage").json()
+        tenant = body["tenants"]["team-a"]
+        assert tenant["commands"] == 3
+        assert tenant["quota"] is None
+        assert set(tenant["by_command"]) == {"play", "batch"}
+        assert tenant["by_command"]["batch"]["commands"] == 2
+
+        res = client.get("/usage", params={"format": "csv"})
+        assert res.headers["content-type"].startswith("text/csv")
+        assert "team-a,play,1," in res.text
+        client.post(f"/{session_id}/quit")
+
+
+def test_usage_quota(gtp_transport):
+    meter = EngineMeter(cpu=False, quotas={"team-a": 1e-9})
+    scheduler = CommandScheduler(1)
+    app = create_app(
+        GTPTransportManager(gtp_transport.copy()), meter=meter, scheduler=scheduler
+    )
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        headers = {"X-Client-Id": "team-a"}
+        assert client.get(f"/{session_id}/name", headers=headers).status_code == 200
+        res = client.get(f"/{session_id}/name", headers=headers)
+        assert res.status_code == 429
+        assert "Retry-After" in res.headers
+        # Other tenants are unaffected.
+        assert client.get(f"/{session_id}/name").status_code == 200
+
+        meter.action = "deprioritize"
+        assert client.get(f"/{session_id}/name", headers=headers).status_code == 200
+        assert client.get("/scheduler").json()["classes"]["batch"]["dispatched"] == 1
+        assert client.get("/usage").json()["rejected"] == 1
+        client.post(f"/{session_id}/quit")
+
+
+def test_usage_disabled(client, session_id):
+    assert client.get("/usage").status_code == 404
+    assert client.get(f"/{session_id}/usage").status_code == 404
+
+
+def test_queue_wait_is_not_billed(gtp_transport):
+    async def scenario():
+        manager = GTPTransportManager(gtp_transport.copy())
+        session = await manager.get_session(await manager.open_session())
+        meter = EngineMeter(cpu=False)
+        _metering.set((meter, "team-a"))
+        # Another command holds the engine while this one waits for it.
+        await session.transport._lock.acquire()
+        query = asyncio.create_task(FastGtp()._query("name", session))
+        await asyncio.sleep(0.3)
+        session.transport._lock.release()
+        await query
+        await manager.close_all()
+        return meter.tenants()["team-a"]
+
+    usage = asyncio.run(scenario())
+    assert usage.commands == 1
+    assert usage.wall_seconds < 0.25
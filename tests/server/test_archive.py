@@ -0,0 +1,129 @@
+import asyncio
+
+from fastgtp import GameArchive
+from fastgtp.server.archive import decode_moves, encode_moves, position_keys
+from fastgtp.server.board import Board
+from fastgtp.server.book import canonical_key
+
+GAME = [("B", "C3"), ("W", "G7"), ("B", "pass"), ("W", "C7"), ("B", "E5")]
+
+
+def test_encode_roundtrip():
+    data = encode_moves((9, 9), GAME)
+    assert len(data) == 2 * len(GAME)
+    assert decode_moves((9, 9), data) == GAME
+
+
+def test_position_keys_match_canonical_key():
+    # A capture and a suicide exercise the incremental update and its reset.
+    moves = [("B", "A2"), ("W", "A1"), ("B", "B1"), ("W", "E5"), ("W", "A1")]
+    keys = list(position_keys((5, 5), encode_moves((5, 5), moves)))
+    board = Board(5, 5)
+    for (color, vertex), key in zip(moves, keys):
+        board.play(color, vertex)
+        assert key == canonical_key(board, "W" if color == "B" else "B")[0]
+    assert len(list(position_keys((5, 5), encode_moves((5, 5), moves), 2))) == 2
+
+
+def test_append_find_and_get(tmp_path):
+    async def scenario():
+        archive = GameArchive(str(tmp_path), fanout=2)
+        archive.append((9, 9), GAME, komi=7.0, finished_at=1.0)
+        # The same opening rotated.
+        archive.append((9, 9), [("B", "G3"), ("W", "C7")], finished_at=2.0)
+        assert archive.pending == 2 and len(archive) == 0
+        assert await archive.flush() == 2
+        archive.append((9, 9), [("B", "C3")])
+        await archive.flush()
+        archive.append((9, 9), [("B", "E5")])
+        await archive.flush()
+        return archive
+
+    archive = asyncio.run(scenario())
+    try:
+        assert len(archive) == 4
+        # Two level-0 segments were merged, the third is pending a partner.
+        assert archive.segments == 2
+
+        board = Board.from_moves((9, 9), [("B", "C3"), ("W", "G7")])
+        count, hits = archive.find(board, "B")
+        assert count == 2
+        assert [(hit.game_id, hit.move_number) for hit in hits] == [(1, 2), (0, 2)]
+
+        board = Board.from_moves((9, 9), [("B", "C3")])
+        count, hits = archive.find(board, "W")
+        assert count == 3 and [hit.game_id for hit in hits] == [2, 1, 0]
+        assert len(archive.find(board, "W", limit=1)[1]) == 1
+        assert archive.find(Board(9, 9), "W") == (0, [])
+
+        game = archive.get(0)
+        assert game.board_size == (9, 9) and game.komi == 7.0
+        assert game.moves == GAME and game.finished_at == 1.0
+        assert archive.get(1).komi is None
+    finally:
+        archive.close()
+
+
+def test_archive_reopens(tmp_path):
+    async def scenario():
+        archive = GameArchive(str(tmp_path), flush_interval=0.01)
+        archive.start()
+        archive.append((19, 19), [("B", "Q16"), ("W", "D4")])
+        await asyncio.sleep(0.2)
+        assert archive.pending == 0 and len(archive) == 1
+        archive.append((19, 19), [("B", "D16")])
+        await archive.stop()
+        archive.close()
+
+    asyncio.run(scenario())
+    archive = GameArchive(str(tmp_path))
+    try:
+        assert len(archive) == 2 and archive.segments == 2
+        assert archive.get(1).moves == [("B", "D16")]
+        board = Board.from_moves((19, 19), [("B", "Q16"), ("W", "D4")])
+        assert archive.find(board, "B")[0] == 1
+    finally:
+        archive.close()
+
+
+def test_failed_flush_is_rolled_back(tmp_path, monkeypatch, caplog):
+    archive = GameArchive(str(tmp_path), flush_interval=0.01)
+    write_manifest = archive._write_manifest
+    failures = [OSError("disk full")] * 2
+
+    def flaky_manifest(segments):
+        if failures:
+            raise failures.pop()
+        write_manifest(segments)
+
+    monkeypatch.setattr(archive, "_write_manifest", flaky_manifest)
+
+    async def scenario():
+        archive.append((9, 9), GAME)
+        try:
+            await archive.flush()
+        except OSError:
+            pass
+        else:
+            raise AssertionError("flush did not fail")
+        assert archive.pending == 1 and len(archive) == 0
+        assert (tmp_path / "games.dat").stat().st_size == 0
+        assert (tmp_path / "games.idx").stat().st_size == 0
+        assert not list(tmp_path.glob("*.seg"))
+
+        # The background flush reports the failure and retries the batch.
+        archive.start()
+        archive.append((9, 9), [("B", "E5")])
+        await asyncio.sleep(0.2)
+        await archive.stop()
+
+    try:
+        asyncio.run(scenario())
+        assert "Archive flush failed" in caplog.text
+        assert archive.pending == 0 and len(archive) == 2
+        assert archive.get(0).moves == GAME
+        assert archive.get(1).moves == [("B", "E5")]
+        board = Board.from_moves((9, 9), [("B", "E5")])
+        assert archive.find(board, "W")[0] == 1
+    finally:
+        archive.close()
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+
+from fastgtp import GTPTransportManager, create_app
+from fastgtp.bench import BenchOptions, parse_mix, percentile, run_bench, scripted_moves
+from fastgtp.cli import main
+
+
+def test_percentile():
+    ordered = [float(i) for i in range(1, 101)]
+    assert percentile(ordered, 0.50) == 50
+    assert percentile(ordered, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_parse_mix():
+    assert parse_mix("game=1, review=2,spectator") == {
+        "game": 1.0,
+        "review": 2.0,
+        "spectator": 1.0,
+    }
+    with pytest.raises(ValueError):
+        parse_mix("ladder=1")
+
+
+def test_scripted_moves_never_touch():
+    moves = scripted_moves(9, 30, random.Random(1))
+    assert len({vertex for _, vertex in moves}) == 30
+    assert [color for color, _ in moves[:4]] == ["B", "W", "B", "W"]
+
+
+def test_run_bench(gtp_transport):
+    async def scenario():
+        app = create_app(GTPTransportManager(gtp_transport.copy()))
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                return await run_bench(
+                    client,
+                    sessions=3,
+                    mix=parse_mix("game=1,review=1,spectator=1"),
+                    iterations=2,
+                    options=BenchOptions(moves=4, polls=3),
+                )
+
+    report = asyncio.run(scenario()).to_dict()
+    assert sum(report["workloads"].values()) == 6
+    assert report["errors"] == 0
+    endpoints = report["endpoints"]
+    assert endpoints["POST /open_session"]["requests"] == 6
+    assert endpoints["POST /{session_id}/quit"]["requests"] == 6
+    assert endpoints["POST /{session_id}/boardsize"]["p99_ms"] > 0
+
+
+def test_cli_json_output(tmp_path, monkeypatch, gtp_transport):
+    import sys
+    import types
+
+    module = types.ModuleType("bench_target")
+    module.app = create_app(GTPTransportManager(gtp_transport.copy()))
+    monkeypatch.setitem(sys.modules, "bench_target", module)
+
+    output = tmp_path / "report.json"
+    code = main(
+        [
+            "bench",
+            "--app",
+            "bench_target:app",
+            "--sessions",
+            "2",
+            "--mix",
+            "review",
+            "--moves",
+            "3",
+            "--json",
+            "--output",
+            str(output),
+        ]
+    )
+    assert code == 0
+    report = json.loads(output.read_text())
+    assert report["requests"] == 2 * (1 + 1 + 3 + 2 + 1)
+    assert "GET /{session_id}/board" in report["endpoints"]
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from fastgtp import OpeningBook, OpeningBookBuilder
+from fastgtp.server.board import Board
+from fastgtp.server.book import canonical_key, parse_sgf
+
+GAME = "(;GM[1]SZ[9]KM[7]RE[B+3.5];B[cc];W[gg](;B[cg];W[gc])(;B[ee]))"
+
+
+def test_parse_sgf_main_line():
+    game = parse_sgf(GAME)
+    assert game.board_size == (9, 9) and game.komi == 7.0 and game.winner == "B"
+    assert game.moves == [("B", "C7"), ("W", "G3"), ("B", "C3"), ("W", "G7")]
+    assert parse_sgf("(;SZ[9]AB[ee][cc];W[])").setup == [("B", "E5"), ("B", "C7")]
+
+
+def test_canonical_key_is_symmetric():
+    corners = ["C3", "C7", "G3", "G7"]
+    keys = {canonical_key(Board.from_moves((9, 9), [("B", v)]), "W")[0] for v in corners}
+    assert len(keys) == 1
+    assert canonical_key(Board(9, 9), "B")[0] != canonical_key(Board(9, 9), "W")[0]
+
+
+@pytest.fixture
+def book_path(tmp_path):
+    builder = OpeningBookBuilder(max_moves=3)
+    builder.add_sgf(GAME)
+    # The same opening rotated, and a second reply that lost.
+    builder.add_sgf("(;SZ[9]RE[B+R];B[gc];W[cg];B[gg])")
+    builder.add_sgf("(;SZ[9]RE[B+R];B[cc];W[ee])")
+    path = tmp_path / "openings.book"
+    assert builder.write(str(path)) == len(builder)
+    return str(path)
+
+
+def test_lookup_maps_moves_back(book_path):
+    with OpeningBook(book_path) as book:
+        assert book.max_moves == 3
+        [first] = book.lookup(Board(9, 9), "B")
+        assert first.weight == 3 and first.value == 1.0
+
+        # White's replies to a stone in the lower right corner are rotated.
+        board = Board.from_moves((9, 9), [("B", "G3")])
+        replies = {move.vertex: move for move in book.lookup(board, "W")}
+        assert replies["C7"].weight == 2 and replies["C7"].value == 0.0
+        assert replies["E5"].weight == 1
+        assert book.lookup(Board.from_moves((9, 9), [("B", "E5")]), "W") == []
+        assert book.hits == 2 and book.lookups == 3
+
+
+def test_choose(book_path):
+    board = Board.from_moves((9, 9), [("B", "C7")])
+    with OpeningBook(book_path, temperature=0) as book:
+        assert book.choose(board, "W") == "G3"
+    with OpeningBook(book_path, min_weight=3) as book:
+        assert book.choose(board, "W") is None
+    with OpeningBook(book_path, temperature=1, seed=1) as book:
+        assert {book.choose(board, "W") for _ in range(50)} == {"G3", "E5"}
+
+
+def test_not_a_book(tmp_path):
+    path = tmp_path / "game.sgf"
+    path.write_text(GAME)
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+
+
+def test_engine_games(gtp_transport, tmp_path):
+    builder = OpeningBookBuilder(max_moves=4)
+    transport = gtp_transport.copy()
+
+    async def build():
+        try:
+            return await builder.add_engine_games(transport, 2, board_size=(9, 9))
+        finally:
+            await transport.aclose()
+
+    assert asyncio.run(build()) > 0
+    path = str(tmp_path / "engine.book")
+    builder.write(path)
+    with OpeningBook(path) as book:
+        assert book.lookup(Board(9, 9), "B")
@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+
+from fastgtp import GTPTransportManager, create_app
+from fastgtp.client import FastGtpClient, FastGtpError, GTPCommandError
+
+
+def run_with_client(gtp_transport, scenario):
+    async def main():
+        app = create_app(GTPTransportManager(gtp_transport.copy()))
+        async with app.router.lifespan_context(app):
+            async with FastGtpClient(
+                "http://fastgtp", transport=httpx.ASGITransport(app=app)
+            ) as client:
+                return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_typed_methods(gtp_transport):
+    async def scenario(client):
+        session = await client.open_session()
+        await session.boardsize(9)
+        await session.komi(6.5)
+        await session.play("B", "C3")
+        move = await session.genmove("W")
+        first = await session.sgf()
+        again = await session.sgf()
+        forked = await session.fork()
+        closed = await forked.quit()
+        return move, first, again, await session.get_komi(), closed
+
+    move, first, again, komi, closed = run_with_client(gtp_transport, scenario)
+    assert move
+    assert first == again and "SZ[9]" in first
+    assert komi == 6.5
+    assert closed
+
+
+def test_command_coalescing(gtp_transport):
+    async def scenario(client):
+        session = await client.open_session()
+        sent = []
+        original = session.batch
+
+        async def spy(commands):
+            sent.append(list(commands))
+            return await original(commands)
+
+        session.batch = spy
+        results = await asyncio.gather(
+            session.command("boardsize 9"),
+            session.command("play B C3"),
+            session.command("name"),
+            session.command("bogus"),
+            return_exceptions=True,
+        )
+        return sent, results
+
+    sent, results = run_with_client(gtp_transport, scenario)
+    assert sent == [["boardsize 9", "play B C3", "name", "bogus"]]
+    assert results[0] == "" and results[1] == ""
+    assert isinstance(results[3], GTPCommandError)
+
+
+def test_streaming_and_errors(gtp_transport):
+    pytest.importorskip("numpy")
+
+    async def scenario(client):
+        session = await client.open_session()
+        commands = ["boardsize 9", "clear_board"] + ["name"] * 5
+        results = [
+            result async for result in session.iter_commands(commands, chunk_size=3)
+        ]
+        scores = [
+            score
+            async for score in client.iter_scores(
+                [{"board_size": [9, 9], "moves": [["B", "E5"]]}] * 3, chunk_size=2
+            )
+        ]
+        with pytest.raises(FastGtpError) as info:
+            await client.session("missing").name()
+        return results, scores, info.value
+
+    results, scores, error = run_with_client(gtp_transport, scenario)
+    assert len(results) == 7 and all(result.success for result in results)
+    assert len(scores) == 3 and scores[0].area.result == "B+81"
+    assert error.status_code == 404
@@ -0,0 +1,75 @@
+import pytest
+
+from fastgtp import GameClock, TimeControl
+
+
+class FakeTime:
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+def make_clock(control, kgs=False):
+    now = FakeTime()
+    return GameClock(control, control.settings_command(kgs), now=now), now
+
+
+def test_absolute_clock_flags():
+    clock, now = make_clock(TimeControl("absolute", 10))
+    now.value = 4
+    assert clock.press("B")
+    assert clock.players["B"].main_time == 6
+    assert clock.running == "W"
+    now.value = 15
+    assert not clock.press("W")
+    assert clock.players["W"].flagged
+
+
+def test_byoyomi_periods():
+    control = TimeControl("byoyomi", 5, period_time=10, periods=3)
+    clock, now = make_clock(control, kgs=True)
+    now.value = 12  # 5s main time, then 7s inside the first period
+    assert clock.press("B")
+    assert clock.players["B"].periods == 3
+    assert clock.time_left("B") == (10, 3)
+    clock.press("W")  # white moves instantly
+    now.value += 14  # still thinking, a period used up and 4s of the next
+    assert clock.time_left("B") == (6, 2)
+    now.value += 11  # two periods used up
+    assert clock.press("B")
+    assert clock.players["B"].periods == 1
+    assert clock.budget("B") == 10
+
+
+def test_canadian_overtime():
+    control = TimeControl("canadian", 0, period_time=30, stones=2)
+    clock, now = make_clock(control)
+    now.value = 10
+    clock.press("B")
+    assert (clock.players["B"].period_time, clock.players["B"].stones) == (20, 1)
+    clock.press("W")
+    now.value = 25
+    clock.press("B")  # second stone completes the period, which restarts
+    assert (clock.players["B"].period_time, clock.players["B"].stones) == (30, 2)
+    assert clock.time_left_command("B") == "time_left B 30 2"
+
+
+def test_settings_commands():
+    control = TimeControl("byoyomi", 600, period_time=30, periods=5)
+    assert control.settings_command() == "time_settings 600 30 1"
+    assert control.settings_command(kgs=True) == "kgs-time_settings byoyomi 600 30 5"
+    assert TimeControl("absolute", 60).settings_command() == "time_settings 60 0 0"
+    with pytest.raises(ValueError):
+        TimeControl("canadian", 60, period_time=30)
+
+
+def test_byoyomi_time_left_with_plain_settings():
+    control = TimeControl("byoyomi", 0, period_time=10, periods=3)
+    clock, now = make_clock(control)
+    now.value = 4
+    # The engine plays byo-yomi as one-stone Canadian periods.
+    assert clock.time_left_command("B") == "time_left B 6 1"
+    now.value = 35
+    assert clock.time_left("B") == (0, 0)
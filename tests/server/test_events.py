@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from fastgtp import GTPSession, SessionEvents
+from fastgtp.server.events import Event
+
+
+def test_slow_subscriber_is_dropped():
+    async def scenario():
+        bus = SessionEvents()
+        fast = bus.subscribe(Event.create("snapshot", 0), max_buffer=4)
+        slow = bus.subscribe(Event.create("snapshot", 0), max_buffer=2)
+        await fast.next()
+        for version in range(1, 4):
+            bus.publish(Event.create("move", version))
+            await fast.next()
+        assert len(bus) == 1 and bus.dropped == 1
+        assert [event.type async for event in slow] == ["dropped"]
+        assert slow.dropped and not fast.closed
+        bus.close(Event.create("closed", 3))
+        return [event.type async for event in fast]
+
+    assert asyncio.run(scenario()) == ["closed"]
+
+
+def test_session_publishes_deltas():
+    async def scenario():
+        session = GTPSession("s", transport=None)  # type: ignore[arg-type]
+        session.record("play B D4", "")
+        subscription = session.events.subscribe(session.snapshot())
+        session.record("komi 6.5", "")
+        session.record("genmove W", "Q16")
+        session.record("undo", "")
+        session.record("boardsize 9", "")
+        session.record("loadsgf game.sgf", "black")
+        subscription.close()
+        return [json.loads(event.data) async for event in subscription]
+
+    snapshot, *deltas = asyncio.run(scenario())
+    assert snapshot["moves"] == [["B", "D4"]] and snapshot["to_play"] == "W"
+    assert [delta["type"] for delta in deltas] == [
+        "komi",
+        "move",
+        "undo",
+        "reset",
+        "unknown",
+    ]
+    assert deltas[1] == {
+        "type": "move",
+        "version": 0,
+        "color": "W",
+        "vertex": "Q16",
+        "number": 2,
+    }
+    assert deltas[3]["board_size"] == [9, 9]
+
+
+def test_sse_frame():
+    event = Event.create("move", 3, vertex="D4")
+    assert event.sse() == b'id: 3\nevent: move\ndata: {"type":"move","version":3,"vertex":"D4"}\n\n'
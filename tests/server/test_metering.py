@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from fastgtp import EngineMeter, QuotaExceededError
+from fastgtp.server.metering import tenant_id
+from fastgtp.server.monitor import read_cpu_seconds
+from fastgtp.server.session import GTPSession
+
+
+def make_session():
+    return GTPSession("session", transport=None)  # type: ignore[arg-type]
+
+
+def test_tenant_id_hides_api_keys():
+    assert tenant_id(None, "team-a", "10.0.0.1") == "team-a"
+    assert tenant_id(None, None, "10.0.0.1") == "10.0.0.1"
+    assert tenant_id(None, None, None) == "anonymous"
+    keyed = tenant_id("secret", "team-a", "10.0.0.1")
+    assert keyed.startswith("key:") and "secret" not in keyed
+    assert keyed == tenant_id("secret", None, None)
+
+
+def test_read_cpu_seconds():
+    assert read_cpu_seconds(os.getpid()) >= 0
+    assert read_cpu_seconds(2**31 - 1) is None
+
+
+def test_record_attributes_usage():
+    meter = EngineMeter(cpu=False)
+    session = make_session()
+    meter.record(session, "team-a", "genmove", 0.5, None)
+    meter.record(session, "team-a", "play", 0.1, None)
+    meter.record(session, "team-b", "batch", 0.2, None, count=4)
+
+    assert session.usage.commands == 6
+    assert session.usage.wall_seconds == pytest.approx(0.8)
+    assert session.usage.max_wall_seconds == 0.5
+    assert meter.tenants()["team-a"].commands == 2
+    assert set(meter.commands("team-a")) == {"genmove", "play"}
+    assert meter.commands("nobody") == {}
+
+    records = {(r.tenant, r.command): r for r in meter.export()}
+    assert records["team-b", "batch"].commands == 4
+    lines = meter.export_csv().splitlines()
+    assert lines[0] == (
+        "tenant,command,commands,wall_seconds,cpu_seconds,max_wall_seconds"
+    )
+    assert "team-a,genmove,1,0.500000,0.000000,0.500000" in lines
+
+
+def test_record_charges_process_cpu():
+    meter = EngineMeter()
+    session = make_session()
+    pid = os.getpid()
+    meter.prime(pid)
+    deadline = read_cpu_seconds(pid) + 0.05
+    while read_cpu_seconds(pid) < deadline:
+        pass
+    meter.record(session, "team-a", "genmove", 0.05, pid)
+    assert session.usage.cpu_seconds > 0
+
+
+def test_quota_rejects():
+    meter = EngineMeter(cpu=False, quotas={"team-a": 1.0}, window=60)
+    session = make_session()
+    assert meter.admit("team-a")
+    meter.record(session, "team-a", "genmove", 1.5, None)
+    assert meter.used("team-a") == pytest.approx(1.5)
+    with pytest.raises(QuotaExceededError) as info:
+        meter.admit("team-a")
+    assert info.value.retry_after == pytest.approx(1.0)
+    assert meter.rejected == 1
+    # Tenants without a quota are never limited.
+    meter.record(session, "team-b", "genmove", 100.0, None)
+    assert meter.admit("team-b")
+    assert meter.used("team-b") == 0.0
+
+
+def test_quota_deprioritizes():
+    meter = EngineMeter(cpu=False, default_quota=1.0, action="deprioritize")
+    meter.record(make_session(), "team-a", "genmove", 2.0, None)
+    assert not meter.admit("team-a")
+    assert meter.demoted == 1
+
+
+def test_quota_window_rolls(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("fastgtp.server.metering.time.monotonic", lambda: now[0])
+    meter = EngineMeter(cpu=False, default_quota=1.0, window=60, buckets=6)
+    meter.record(make_session(), "team-a", "genmove", 2.0, None)
+    now[0] += 30
+    assert meter.used("team-a") == 2.0
+    now[0] += 31
+    assert meter.used("team-a") == 0.0
+    assert meter.admit("team-a")
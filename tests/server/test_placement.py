@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+import pytest
+
+from fastgtp import GTPTransportManager, PlacementScheduler
+from fastgtp.server.placement import parse_cpu_list
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8,10-11\n") == {0, 1, 2, 3, 8, 10, 11}
+
+
+def test_assign_balances_load():
+    scheduler = PlacementScheduler(2, cpus=range(4))
+
+    first = scheduler.assign("a")
+    second = scheduler.assign("b")
+    assert first.isdisjoint(second)
+    assert scheduler.load() == {0: 1, 1: 1, 2: 1, 3: 1}
+
+    scheduler.release("a")
+    assert scheduler.assign("c") == first
+
+
+def test_command_args():
+    scheduler = PlacementScheduler(
+        2, cpus=range(4), thread_args=("-override-config", "numSearchThreads={threads}")
+    )
+    cpus = scheduler.assign("a")
+    assert scheduler.command_args(cpus) == (
+        "-override-config",
+        "numSearchThreads=2",
+    )
+
+
+def test_invalid_cpus_per_engine():
+    with pytest.raises(ValueError):
+        PlacementScheduler(3, cpus=range(2))
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_getaffinity"), reason="CPU affinity is not supported"
+)
+def test_manager_pins_engine(gtp_transport):
+    cpu = min(os.sched_getaffinity(0))
+    manager = GTPTransportManager(
+        gtp_transport, placement=PlacementScheduler(1, cpus=[cpu])
+    )
+
+    async def scenario():
+        session_id = await manager.open_session()
+        try:
+            transport = await manager.get_transport(session_id)
+            return os.sched_getaffinity(transport.pid)
+        finally:
+            await manager.close_all()
+
+    assert asyncio.run(scenario()) == {cpu}
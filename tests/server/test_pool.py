@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from fastgtp import EnginePool
+from fastgtp.server.pool import PositionError, QueryError
+
+GAME_A = [("B", "D4"), ("W", "Q16"), ("B", "Q4")]
+GAME_B = [("B", "C3"), ("W", "R17")]
+
+
+def test_pool_applies_diffs(gtp_transport):
+    async def scenario():
+        pool = EnginePool(gtp_transport, size=1)
+        try:
+            first = await pool.evaluate(GAME_A[:2])
+            reg_genmove = pool._all[0].reg_genmove
+            extended = await pool.evaluate(GAME_A)
+            shortened = await pool.evaluate(GAME_A[:1], kind="score")
+            with pytest.raises(PositionError) as info:
+                await pool.evaluate([("B", "D4"), ("W", "D4")])
+            recovered = await pool.evaluate(GAME_A)
+            results = first, extended, shortened, info.value, recovered
+            return results, reg_genmove, pool.metrics
+        finally:
+            await pool.aclose()
+
+    results, reg_genmove, metrics = asyncio.run(scenario())
+    first, extended, shortened, error, recovered = results
+    assert first.move and first.reused_moves == 0
+    assert extended.reused_moves == 2
+    # Without reg_genmove the first query's own move is taken back as well.
+    assert extended.sync_commands == (1 if reg_genmove else 2)
+    assert shortened.score and shortened.reused_moves == 1
+    assert error.index == 1
+    assert recovered.move and recovered.reused_moves == 1
+    assert metrics.spawned == 1 and metrics.queries == 5
+
+
+def test_pool_routes_by_prefix(gtp_transport):
+    async def scenario():
+        pool = EnginePool(gtp_transport, size=2)
+        try:
+            await asyncio.gather(pool.evaluate(GAME_A), pool.evaluate(GAME_B))
+            results = [
+                await pool.evaluate(GAME_B + [("B", "D16")]),
+                await pool.evaluate(GAME_A + [("W", "D16")]),
+            ]
+            return results, pool.engines
+        finally:
+            await pool.aclose()
+
+    (b, a), engines = asyncio.run(scenario())
+    assert engines == 2
+    assert b.reused_moves == len(GAME_B)
+    assert a.reused_moves == len(GAME_A)
+
+
+class FlakyTransport:
+    """Fake engine whose ``genmove`` fails while ``crashes`` is not empty."""
+
+    def __init__(self, crashes: list[str], name: str = "first"):
+        self.crashes = crashes
+        self.name = name
+        self.closed = False
+
+    async def open(self):
+        pass
+
+    async def send_command(self, command):
+        if command == "list_commands":
+            return "= play\ngenmove\nfinal_score\n\n"
+        if command.startswith("genmove"):
+            if self.crashes:
+                kind = self.crashes.pop()
+                if kind == "exit":
+                    raise RuntimeError("engine exited")
+                return "? cannot generate\n\n"
+            return "= D4\n\n"
+        return "=\n\n"
+
+    async def aclose(self):
+        self.closed = True
+
+    def copy(self):
+        return FlakyTransport(self.crashes, self.name)
+
+
+def test_pool_drops_crashed_engines():
+    async def scenario():
+        crashes: list[str] = []
+        pool = EnginePool(FlakyTransport(crashes), size=1)
+        try:
+            await pool.evaluate(GAME_A)
+            first = pool._all[0].transport
+            crashes.append("gtp")
+            with pytest.raises(QueryError):
+                await pool.evaluate(GAME_A)
+            # A GTP failure leaves the engine and its position usable.
+            kept = await pool.evaluate(GAME_A)
+            crashes.append("exit")
+            with pytest.raises(RuntimeError):
+                await pool.evaluate(GAME_A)
+            # The position of a crashed engine is unknown; load it afresh.
+            reloaded = await pool.evaluate(GAME_A)
+            return kept, reloaded, first, pool
+        finally:
+            await pool.aclose()
+
+    kept, reloaded, first, pool = asyncio.run(scenario())
+    assert kept.reused_moves == len(GAME_A) and kept.sync_commands == 0
+    assert first.closed
+    assert reloaded.reused_moves == 0 and reloaded.sync_commands == 6
+    assert pool.metrics.spawned == 2
+
+
+def test_pool_swap_engine():
+    async def scenario():
+        pool = EnginePool(FlakyTransport([]), size=1)
+        try:
+            await pool.evaluate(GAME_A)
+            old = pool._all[0].transport
+            await pool.swap_engine(FlakyTransport([], "second"))
+            swapped = await pool.evaluate(GAME_A)
+            return old, swapped, [engine.transport.name for engine in pool._all]
+        finally:
+            await pool.aclose()
+
+    old, swapped, names = asyncio.run(scenario())
+    assert old.closed
+    assert swapped.reused_moves == 0
+    assert names == ["second"]
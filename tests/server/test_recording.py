@@ -0,0 +1,98 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fastgtp import (
+    GTPTransportManager,
+    RecordingGTPTransport,
+    ReplayGTPTransport,
+    create_app,
+    parse_response,
+)
+
+GAME = ["boardsize 9", "clear_board", "play B C3", "genmove W", "name"]
+
+
+def record(gtp_transport, path):
+    async def scenario():
+        recorder = RecordingGTPTransport(gtp_transport, path)
+        transport = recorder.copy()
+        try:
+            responses = [await transport.send_command(command) for command in GAME]
+            responses.append(await transport.send_command("5 protocol_version"))
+        finally:
+            await transport.aclose()
+            recorder.close_recording()
+        return responses
+
+    return asyncio.run(scenario())
+
+
+def test_record_and_replay(gtp_transport, tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    recorded = record(gtp_transport, path)
+
+    with gzip.open(path, "rt") as handle:
+        lines = [json.loads(line) for line in handle]
+    assert lines[0] == {"fastgtp_recording": 1}
+    assert [line["c"] for line in lines[1:]] == [*GAME, "protocol_version"]
+    assert all(line["s"] == 1 and line["t"] >= 0 for line in lines[1:])
+
+    async def scenario():
+        transport = ReplayGTPTransport(path).copy()
+        replayed = [await transport.send_command(command) for command in GAME]
+        replayed.append(await transport.send_command("9 protocol_version"))
+        # Off-script commands fall back to any recorded answer.
+        replayed.append(await transport.send_command("name"))
+        replayed.append(await transport.send_command("showboard"))
+        return replayed
+
+    replayed = asyncio.run(scenario())
+    assert replayed[: len(GAME)] == recorded[: len(GAME)]
+    assert replayed[len(GAME)].startswith("=9 ")
+    assert replayed[-2] == recorded[GAME.index("name")]
+    assert not parse_response(replayed[-1]).success
+
+
+def test_replay_strict_and_realtime(gtp_transport, tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    record(gtp_transport, path)
+
+    async def scenario():
+        strict = ReplayGTPTransport(path, strict=True)
+        with pytest.raises(LookupError):
+            await strict.send_command("showboard")
+
+        realtime = ReplayGTPTransport(path, realtime=True, speed=1e6)
+        return await realtime.send_command("boardsize 9")
+
+    assert parse_response(asyncio.run(scenario())).success
+
+
+def test_replay_behind_router(gtp_transport, tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    record(gtp_transport, path)
+
+    app = create_app(GTPTransportManager(ReplayGTPTransport(path)))
+    with TestClient(app) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        assert client.post(f"/{session_id}/boardsize", json={"x": 9}).status_code == 200
+        assert client.get(f"/{session_id}/name").status_code == 200
+
+
+def test_recording_closed_on_shutdown(gtp_transport, tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    recorder = RecordingGTPTransport(gtp_transport, path)
+    with TestClient(create_app(GTPTransportManager(recorder))) as client:
+        session_id = client.post("/open_session").json()["session_id"]
+        assert client.get(f"/{session_id}/name").status_code == 200
+        # Entries are written in batches, not per command.
+        assert not path.exists()
+
+    # Shutdown wrote the pending entries and the gzip trailer.
+    with gzip.open(path, "rt") as handle:
+        lines = [json.loads(line) for line in handle]
+    assert [line["c"] for line in lines[1:]] == ["name"]
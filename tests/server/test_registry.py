@@ -0,0 +1,18 @@
+from fastgtp.server.registry import SessionRegistry
+
+
+def test_registry_insert_get_pop():
+    registry: SessionRegistry[int] = SessionRegistry(shards=4)
+    assert registry.insert("a", 1)
+    assert not registry.insert("a", 2)
+    assert registry.insert("b", 3)
+
+    assert registry.get("a") == 1
+    assert "b" in registry
+    assert len(registry) == 2
+    assert sorted(registry.items()) == [("a", 1), ("b", 3)]
+
+    assert registry.pop("a") == 1
+    assert registry.pop("a") is None
+    assert registry.drain() == [3]
+    assert len(registry) == 0
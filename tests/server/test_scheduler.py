@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from fastgtp import CommandScheduler, QueueFullError
+from fastgtp.server.scheduler import command_priority
+
+
+def test_command_priority():
+    assert command_priority("genmove B") == "interactive"
+    assert command_priority("kata-raw-nn 0") == "analysis"
+    assert command_priority("play B D4", "batch") == "batch"
+    assert command_priority("final_score", "interactive") == "analysis"
+
+
+async def run_order(scheduler, requests):
+    """Queue ``requests`` behind a held slot and return the grant order."""
+    order = []
+    gate = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot("interactive", "holder"):
+            await gate.wait()
+
+    async def request(label, priority, client):
+        async with scheduler.slot(priority, client):
+            order.append(label)
+
+    held = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    tasks = []
+    for label, priority, client in requests:
+        tasks.append(asyncio.create_task(request(label, priority, client)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(held, *tasks)
+    return order
+
+
+def test_priority_classes():
+    scheduler = CommandScheduler(1)
+    order = asyncio.run(
+        run_order(
+            scheduler,
+            [
+                ("batch", "batch", "a"),
+                ("analysis", "analysis", "a"),
+                ("play", "interactive", "b"),
+            ],
+        )
+    )
+    assert order == ["play", "analysis", "batch"]
+    stats = scheduler.stats()
+    assert stats["batch"].dispatched == 1 and stats["batch"].queued == 0
+    assert stats["batch"].max_wait >= stats["interactive"].max_wait
+
+
+def test_weighted_fair_share():
+    scheduler = CommandScheduler(1, weights={"heavy": 1.0, "light": 1.0})
+    requests = [(f"heavy{i}", "analysis", "heavy") for i in range(4)]
+    requests += [(f"light{i}", "analysis", "light") for i in range(2)]
+    order = asyncio.run(run_order(scheduler, requests))
+    # The light client is interleaved instead of waiting behind all of heavy.
+    assert order[:4] == ["heavy0", "light0", "heavy1", "light1"]
+
+
+def test_aging_prevents_starvation():
+    scheduler = CommandScheduler(1, aging=0.0)
+    order = asyncio.run(
+        run_order(
+            scheduler,
+            [("batch", "batch", "a"), ("play", "interactive", "b")],
+        )
+    )
+    assert order == ["batch", "play"]
+    assert scheduler.stats()["batch"].promoted == 1
+
+
+def test_max_queued():
+    async def scenario():
+        scheduler = CommandScheduler(1, max_queued=1)
+        async with scheduler.slot("interactive", "a"):
+            waiting = asyncio.create_task(
+                scheduler.slot("batch", "a").__aenter__()
+            )
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFullError):
+                async with scheduler.slot("batch", "b"):
+                    pass
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+        assert scheduler.stats()["batch"].queued == 0
+
+    asyncio.run(scenario())
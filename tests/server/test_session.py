@@ -0,0 +1,36 @@
+import asyncio
+
+from fastgtp import GTPTransportManager
+from fastgtp.server.session import MoveHistory
+
+
+def test_move_history_copy_on_write():
+    parent = MoveHistory([("B", "D4"), ("W", "Q16")])
+    child = parent.copy()
+    child.append(("B", "C3"))
+
+    assert list(parent) == [("B", "D4"), ("W", "Q16")]
+    assert list(child) == [("B", "D4"), ("W", "Q16"), ("B", "C3")]
+    assert child.parent() == parent
+    assert child.last == ("B", "C3")
+    assert len(child) == 3
+
+    assert child.pop() == ("B", "C3")
+    assert child == parent
+    assert MoveHistory([("B", "D4")]) != parent
+
+
+def test_warm_engines(gtp_transport):
+    manager = GTPTransportManager(gtp_transport, max_engines=2, warm_engines=2)
+
+    async def scenario():
+        await manager.warm_up()
+        assert manager.warm_engines == 2
+        await manager.open_session()
+        await manager.warm_up()
+        warm = manager.warm_engines
+        await manager.close_all()
+        return warm
+
+    # The session holds one of the two slots, so only one engine stays warm.
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,226 @@
+import asyncio
+
+import pytest
+
+from fastgtp import (
+    EngineStartupError,
+    GTPTransportManager,
+    QueueFullError,
+    QueueTimeoutError,
+    Startup,
+    SubprocessGTPTransport,
+    parse_response,
+)
+from fastgtp.server.transport import command_turn
+
+
+def test_queue_depth_limit(gtp_transport):
+    async def scenario():
+        transport = gtp_transport.copy()
+        transport._max_queue_depth = 1
+        try:
+            results = await asyncio.gather(
+                transport.send_command("name"),
+                transport.send_command("name"),
+                return_exceptions=True,
+            )
+        finally:
+            await transport.aclose()
+        return results
+
+    first, second = asyncio.run(scenario())
+    assert first.startswith("=")
+    assert isinstance(second, QueueFullError)
+
+
+def test_queue_timeout(gtp_transport):
+    async def scenario():
+        transport = gtp_transport.copy()
+        transport._queue_timeout = 0.01
+        await transport._lock.acquire()
+        try:
+            with pytest.raises(QueueTimeoutError):
+                await transport.send_command("name")
+        finally:
+            transport._lock.release()
+            await transport.aclose()
+        assert transport.queue_depth == 0
+
+    asyncio.run(scenario())
+
+
+def test_pipelined_commands(gtp_transport):
+    async def scenario():
+        transport = gtp_transport.copy()
+        transport._pipelined = True
+        try:
+            commands = ["boardsize 9", "clear_board", "play B C3"] + ["name"] * 8
+            commands += ["get_komi", "7 protocol_version"]
+            return await asyncio.gather(
+                *(transport.send_command(command) for command in commands)
+            )
+        finally:
+            await transport.aclose()
+
+    responses = [parse_response(raw) for raw in asyncio.run(scenario())]
+    assert all(response.success for response in responses)
+    assert responses[2].payload == ""
+    assert len({response.payload for response in responses[3:11]}) == 1
+    float(responses[11].payload)
+    assert responses[12].identifier == "7"
+    assert responses[12].payload == "2"
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_turn_taken_when_engine_is_free(gtp_transport, pipelined):
+    class Turn:
+        def __init__(self):
+            self.events = []
+
+        async def acquire(self, commands):
+            self.events.append(("acquire", commands))
+
+        def release(self, seconds):
+            self.events.append(("release", seconds >= 0))
+
+    async def scenario():
+        transport = gtp_transport.copy()
+        transport._pipelined = pipelined
+        turn = Turn()
+        token = command_turn.set(turn)
+        try:
+            await transport._lock.acquire()
+            queued = asyncio.create_task(transport.send_command("name"))
+            await asyncio.sleep(0.05)
+            # Only pipelined commands go on the wire before the engine is free.
+            assert turn.events == ([("acquire", 1)] if pipelined else [])
+            transport._lock.release()
+            await queued
+            await transport.send_commands(["name", "name"])
+        finally:
+            command_turn.reset(token)
+            await transport.aclose()
+        return turn.events
+
+    events = asyncio.run(scenario())
+    assert events == [("acquire", 1), ("release", True)] + [
+        ("acquire", 2),
+        ("release", True),
+    ]
+
+
+def test_start_validates_engines(gtp_transport):
+    async def scenario():
+        manager = GTPTransportManager(gtp_transport, max_engines=2)
+        commands = await manager.start(3)
+        warm = manager.warm_engines
+        await manager.close_all()
+
+        manager = GTPTransportManager(gtp_transport, max_engines=2)
+        with pytest.raises(EngineStartupError, match="no-such-command"):
+            await manager.start(2, required_commands=["no-such-command"])
+        # The engines were closed and their slots released.
+        assert manager.warm_engines == 0 and manager.has_capacity
+        return commands, warm
+
+    commands, warm = asyncio.run(scenario())
+    assert "protocol_version" in commands
+    assert warm == 2
+
+
+def test_start_timeout_closes_engines():
+    copies = []
+
+    class Engine:
+        """Fake engine; the second copy is too slow to finish its handshake."""
+
+        def __init__(self, delay):
+            self.delay = delay
+            self.closed = False
+
+        async def open(self):
+            return None
+
+        async def send_command(self, command):
+            await asyncio.sleep(self.delay)
+            return "= 2\n\n" if command == "protocol_version" else "= name\n\n"
+
+        async def aclose(self):
+            self.closed = True
+
+        def copy(self):
+            copies.append(Engine(5.0 if len(copies) == 1 else 0.0))
+            return copies[-1]
+
+    async def scenario():
+        manager = GTPTransportManager(Engine(0.0), max_engines=3)
+        startup = Startup(manager, 3, timeout=0.5)
+        await startup.run()
+        assert startup.status == "failed"
+        assert len(copies) == 3 and all(engine.closed for engine in copies)
+        assert manager.warm_engines == 0
+        assert manager._slots._value == 3
+
+    asyncio.run(scenario())
+
+
+def test_start_reports_missing_engine():
+    async def scenario():
+        manager = GTPTransportManager(SubprocessGTPTransport("fastgtp-missing-engine"))
+        with pytest.raises(EngineStartupError):
+            await manager.start(2)
+        assert manager.warm_engines == 0
+
+    asyncio.run(scenario())
+
+
+def test_swap_engine_migrates_sessions(gtp_transport):
+    async def scenario():
+        manager = GTPTransportManager(gtp_transport.copy(), max_engines=2)
+        session = await manager.get_session(await manager.open_session())
+        for command in ("play B D4", "play W Q16"):
+            await session.transport.send_command(command)
+            session.record(command, "")
+        unknown = await manager.get_session(await manager.open_session())
+        unknown.history_known = False
+        old = session.transport
+
+        with pytest.raises(EngineStartupError):
+            await manager.swap_engine(SubprocessGTPTransport("fastgtp-missing-engine"))
+        assert manager.generation == 0
+
+        swap = await manager.swap_engine(gtp_transport.copy(), concurrency=1)
+        assert manager.generation == 1
+        await manager._migration
+        assert swap.done and swap.sessions == 2
+        assert swap.migrated == 1 and swap.skipped == 1
+        assert session.transport is not old and session.generation == 1
+        assert unknown.generation == 0
+        # The replayed game is on the new engine.
+        raw = await session.transport.send_command("play B Q16")
+        assert not parse_response(raw).success
+        # The old engine's slot passed to the new one.
+        assert not manager.has_capacity
+        await manager.close_all()
+        assert manager.has_capacity
+
+    asyncio.run(scenario())
+
+
+def test_swap_engine_waits_for_commands(gtp_transport):
+    async def scenario():
+        manager = GTPTransportManager(gtp_transport.copy())
+        session = await manager.get_session(await manager.open_session())
+        old = session.transport
+        session.in_flight += 1
+        swap = await manager.swap_engine(gtp_transport.copy())
+        # Longer than a long genmove; the session is requeued, not failed.
+        await asyncio.sleep(0.5)
+        assert session.transport is old and not swap.done
+        session.in_flight -= 1
+        await manager._migration
+        assert session.transport is not old
+        assert swap.migrated == 1 and swap.failed == 0 and swap.sessions == 1
+        await manager.close_all()
+
+    asyncio.run(scenario())